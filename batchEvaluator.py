@@ -0,0 +1,34 @@
+# External libraries
+import numpy as np
+
+# Internal libraries
+from card import RANK_MASK
+from handEvaluator import FLUSH_RANKS, QUINARY_MASK_KEYS, VALUE_RANKS
+
+# NumPy copies of the handEvaluator tables, the value table becomes a sorted array of keys searched with searchsorted
+FLUSH_RANKS_ARRAY: np.ndarray = np.array(FLUSH_RANKS, dtype=np.int64)
+QUINARY_MASK_KEYS_ARRAY: np.ndarray = np.array(QUINARY_MASK_KEYS, dtype=np.int64)
+VALUE_KEYS_ARRAY: np.ndarray = np.array(sorted(VALUE_RANKS), dtype=np.int64)
+VALUE_RANKS_ARRAY: np.ndarray = np.array([VALUE_RANKS[key] for key in VALUE_KEYS_ARRAY.tolist()], dtype=np.int64)
+
+
+def cards_to_masks(cards: np.ndarray) -> np.ndarray:
+    """Turn a (N, k) array of card indexes (0-51, -1 for no card) into a (N,) array of 52 bits masks"""
+    cards = np.asarray(cards, dtype=np.int64)
+    bits: np.ndarray = np.where(cards >= 0, np.left_shift(np.int64(1), np.maximum(cards, 0)), 0)
+    return np.bitwise_or.reduce(bits, axis=1)
+
+def evaluate_masks(masks: np.ndarray) -> np.ndarray:
+    """Return the rank of every 52 bits mask of a (N,) array (same ranks as handEvaluator.evaluate_mask)"""
+    masks = np.asarray(masks, dtype=np.int64)
+    suits: np.ndarray = np.stack([(masks >> (13 * suit)) & RANK_MASK for suit in range(4)], axis=1)
+    keys: np.ndarray = QUINARY_MASK_KEYS_ARRAY[suits].sum(axis=1)
+    ranks: np.ndarray = VALUE_RANKS_ARRAY[np.searchsorted(VALUE_KEYS_ARRAY, keys)]
+    return np.maximum(ranks, FLUSH_RANKS_ARRAY[suits].max(axis=1))
+
+def evaluate_batch(cards: np.ndarray) -> np.ndarray:
+    """Return the rank of every hand of a (N, 7) array of card indexes, as a (N,) array
+
+    Hands can have less than 7 cards by padding the rows with -1. As with handEvaluator, `rank >> 20` is the value
+    of the hand's CardCombinations."""
+    return evaluate_masks(cards_to_masks(cards))
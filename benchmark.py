@@ -0,0 +1,218 @@
+# External libraries
+import argparse
+import gc
+import json
+import platform
+import random
+import statistics
+import sys
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from time import perf_counter
+from typing import Callable
+
+# Internal libraries
+from card import CARDS, Card
+from cfrSolver import CFRTrainer
+from combinationHandler import CombinationHandler
+from deck import Deck
+from gameManager import GameManager
+from randomGenerator import RandomGenerator
+
+BENCHMARK_SEED: int = 2024 # Every benchmark works on the same data at each run
+PLAYER_COUNTS: range = range(2, 10)
+DEFINE_WINNERS_PASSES: int = 20 # define_winners is fast, each repetition goes over the same tables several times
+
+
+@dataclass
+class Benchmark:
+    name: str
+    unit: str # What is counted, the results being in <unit> per second
+    prepare: Callable[[float], Callable[[], int]] # Called (untimed) with the scale before each repetition, returns the timed function, which returns the number of operations done
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    unit: str
+    rates: list[float] = field(default_factory=list) # Operations per second of each repetition
+
+    @property
+    def mean(self) -> float:
+        return statistics.fmean(self.rates)
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.rates)
+
+    @property
+    def stdev(self) -> float:
+        return statistics.stdev(self.rates) if len(self.rates) > 1 else 0.0
+
+    def to_dict(self) -> dict:
+        return asdict(self) | {"mean": self.mean, "median": self.median, "stdev": self.stdev, "min": min(self.rates), "max": max(self.rates)}
+
+
+# Benchmarks
+def prepare_evaluations(scale: float) -> Callable[[], int]:
+    """7 cards evaluations through CombinationHandler.combination"""
+    rng: random.Random = random.Random(BENCHMARK_SEED)
+    hands: list[list[Card]] = [rng.sample(CARDS, 7) for _ in range(int(5000 * scale))]
+
+    def run() -> int:
+        for cards in hands:
+            CombinationHandler(cards).combination
+        return len(hands)
+    return run
+
+def prepare_dealing(scale: float) -> Callable[[], int]:
+    """Build, shuffle and deal a 6 players hand (12 hole cards and a board of 5)"""
+    deck: Deck = Deck(RandomGenerator(BENCHMARK_SEED))
+    decks_nbr: int = int(20000 * scale)
+
+    def run() -> int:
+        for _ in range(decks_nbr):
+            deck.build_deck()
+            for _ in range(17):
+                deck.draw()
+        return decks_nbr
+    return run
+
+def deal_games(player_nbr: int, games_nbr: int) -> list[GameManager]:
+    """Return headless games of bots whose first hand is dealt, the decks and the bots drawing from the same seeded generator"""
+    rng: random.Random = random.Random(BENCHMARK_SEED)
+    games: list[GameManager] = []
+    for _ in range(games_nbr):
+        game: GameManager = GameManager(player_nbr, headless=True)
+        game.deck.rng = rng
+        for player in game.players:
+            player.rng = rng
+        game.round_start()
+        games.append(game)
+    return games
+
+def prepare_define_winners(player_nbr: int) -> Callable[[float], Callable[[], int]]:
+    """define_winners on tables dealt up to the river"""
+    def prepare(scale: float) -> Callable[[], int]:
+        games: list[GameManager] = deal_games(player_nbr, int(500 * scale))
+        for game in games:
+            for _ in range(3):
+                game.put_card_on_table()
+
+        def run() -> int:
+            for _ in range(DEFINE_WINNERS_PASSES):
+                for game in games:
+                    game.define_winners()
+            return DEFINE_WINNERS_PASSES * len(games)
+        return run
+    return prepare
+
+def prepare_betting_rounds(scale: float) -> Callable[[], int]:
+    """Betting loop of a 6 bots hand, from the blinds to the showdown"""
+    games: list[GameManager] = deal_games(6, int(300 * scale))
+
+    def run() -> int:
+        for game in games:
+            game.players_play_turn()
+        return len(games)
+    return run
+
+def prepare_headless_games(scale: float) -> Callable[[], int]:
+    """Full headless games of 6 bots (hands played per second)"""
+    seeds: list[int] = RandomGenerator(BENCHMARK_SEED).seeds(max(int(20 * scale), 1))
+
+    def run() -> int:
+        hands: int = 0
+        for seed in seeds:
+            game: GameManager = GameManager(6, headless=True, rng=RandomGenerator(seed))
+            game.play()
+            hands += game.turns
+        return hands
+    return run
+
+def prepare_cfr_training(scale: float) -> Callable[[], int]:
+    """CFR+ training on random deals of the default abstract game, in this process (deals traversed per second)"""
+    trainer: CFRTrainer = CFRTrainer(seed=BENCHMARK_SEED)
+    iterations: int = max(int(2000 * scale), 1)
+
+    def run() -> int:
+        trainer.train(iterations, workers=1, batch_size=min(iterations, 500))
+        return iterations
+    return run
+
+BENCHMARKS: list[Benchmark] = [
+    Benchmark("evaluator.combination", "evaluations", prepare_evaluations),
+    Benchmark("deck.deal", "hands", prepare_dealing),
+    *(Benchmark(f"game.define_winners.{player_nbr}", "calls", prepare_define_winners(player_nbr)) for player_nbr in PLAYER_COUNTS),
+    Benchmark("game.betting_round", "hands", prepare_betting_rounds),
+    Benchmark("game.headless", "hands", prepare_headless_games),
+    Benchmark("cfr.train", "iterations", prepare_cfr_training),
+]
+
+
+# Running and comparing
+def run_benchmark(benchmark: Benchmark, warmup: int = 1, repetitions: int = 5, scale: float = 1.0) -> BenchmarkResult:
+    """Run a benchmark `warmup` times untimed, then `repetitions` times timed (without garbage collection, like timeit)"""
+    result: BenchmarkResult = BenchmarkResult(benchmark.name, benchmark.unit)
+    for repetition in range(warmup + repetitions):
+        run: Callable[[], int] = benchmark.prepare(scale)
+        gc.collect()
+        gc.disable()
+        try:
+            start: float = perf_counter()
+            operations: int = run()
+            elapsed: float = perf_counter() - start
+        finally:
+            gc.enable()
+        if repetition >= warmup:
+            result.rates.append(operations / elapsed)
+    return result
+
+def run_benchmarks(names: list[str] | None = None, warmup: int = 1, repetitions: int = 5, scale: float = 1.0,
+                   on_result: Callable[[BenchmarkResult], None] | None = None) -> dict:
+    """Run the benchmarks whose name starts with one of `names` (all of them by default) and return the JSON report"""
+    results: list[BenchmarkResult] = []
+    for benchmark in BENCHMARKS:
+        if names and not any(benchmark.name.startswith(name) for name in names):
+            continue
+        results.append(run_benchmark(benchmark, warmup, repetitions, scale))
+        if on_result is not None:
+            on_result(results[-1])
+    return {"python": platform.python_version(), "platform": platform.platform(), "warmup": warmup,
+            "repetitions": repetitions, "scale": scale, "results": {result.name: result.to_dict() for result in results}}
+
+def compare_reports(report: dict, baseline: dict, tolerance: float = 0.1) -> list[tuple[str, float, bool]]:
+    """Return (name, median rate / baseline median rate, regressed) for every benchmark in both reports
+    A benchmark regressed when it is more than `tolerance` slower than the baseline (the median ignores outlier repetitions)"""
+    comparisons: list[tuple[str, float, bool]] = []
+    for name, result in report["results"].items():
+        if name in baseline["results"]:
+            ratio: float = result["median"] / baseline["results"][name]["median"]
+            comparisons.append((name, ratio, ratio < 1 - tolerance))
+    return comparisons
+
+def format_result(result: BenchmarkResult) -> str:
+    return f"{result.name:<26} {result.median:>14,.1f} {result.unit + '/s':<14} ± {result.stdev / result.mean:>6.2%} (median, stdev)"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the throughput of the evaluator, the deck and the game, and compare it with a baseline")
+    parser.add_argument("names", nargs="*", help="run only the benchmarks whose name starts with one of these (e.g. game.define_winners)")
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--repetitions", type=int, default=5)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplies the work done by each repetition")
+    parser.add_argument("--output", type=Path, default=None, help="save the results as JSON (e.g. as the next baseline)")
+    parser.add_argument("--baseline", type=Path, default=None, help="JSON results to compare with, exits with 1 on a regression")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="slowdown allowed before a benchmark counts as a regression")
+    arguments = parser.parse_args()
+
+    report: dict = run_benchmarks(arguments.names, arguments.warmup, arguments.repetitions, arguments.scale,
+                                  on_result=lambda result: print(format_result(result), flush=True))
+    if arguments.output is not None:
+        arguments.output.write_text(json.dumps(report, indent=2))
+
+    if arguments.baseline is not None:
+        comparisons: list[tuple[str, float, bool]] = compare_reports(report, json.loads(arguments.baseline.read_text()), arguments.tolerance)
+        for name, ratio, regressed in comparisons:
+            print(f"{name:<26} {ratio:>8.2%} of the baseline" + (" REGRESSION" if regressed else ""))
+        if any(regressed for _, _, regressed in comparisons):
+            sys.exit(1)
@@ -1,6 +1,6 @@
 # External libraries
 from enum import Enum, IntEnum
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from termcolor import colored
 
 class CardValues(IntEnum):
@@ -28,10 +28,25 @@ class CardSuits(Enum):
 SUITS = {CardSuits.HEARTS : "♥", CardSuits.DIAMONDS : "♦", CardSuits.CLUBS : "♣", CardSuits.SPADES : "♠"}
 SUITS_COLORS = {CardSuits.HEARTS : "red", CardSuits.DIAMONDS : "red", CardSuits.CLUBS : "blue", CardSuits.SPADES : "blue"}
 
+# Compact encoding: every card has an index from 0 to 51 (suit * 13 + value - 2), a set of cards is a 52 bits mask
+# where each suit owns 13 consecutive bits (one per value, bit 0 being a TWO)
+SUIT_INDEXES: dict[CardSuits: int] = {suit: i for i, suit in enumerate(CardSuits)}
+RANK_MASK: int = 0x1FFF
+FULL_DECK_MASK: int = (1 << 52) - 1
+
 @dataclass(frozen=True, slots=True)
 class Card:
     value: int
     suit: CardSuits
+    index: int = field(init=False, repr=False, compare=False) # Position of the card in the compact encoding (0-51)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "index", SUIT_INDEXES[self.suit] * 13 + self.value - 2)
+
+    @property
+    def mask(self) -> int:
+        """Bit of the card in a 52 bits hand mask"""
+        return 1 << self.index
 
     # TODO : color the card based on the suit
     def __str__(self) -> str:
@@ -60,3 +75,35 @@ class Card:
     
     def __gt__(self, other) -> bool:
         return self.value > other.value
+
+
+# The 52 canonical cards, ordered by index
+CARDS: tuple[Card, ...] = tuple(Card(value=value, suit=suit) for suit in CardSuits for value in range(2, 15))
+
+def card_to_index(card: Card) -> int:
+    """Return the index (0-51) of a card"""
+    return card.index
+
+def index_to_card(index: int) -> Card:
+    """Return the card of an index (0-51)"""
+    return CARDS[index]
+
+def cards_to_mask(cards: list[Card]) -> int:
+    """Return the 52 bits mask of a list of cards"""
+    mask: int = 0
+    for card in cards:
+        mask |= 1 << card.index
+    return mask
+
+def mask_to_cards(mask: int) -> list[Card]:
+    """Return the cards of a 52 bits mask, ordered by index"""
+    cards: list[Card] = []
+    while mask:
+        low_bit: int = mask & -mask
+        cards.append(CARDS[low_bit.bit_length() - 1])
+        mask ^= low_bit
+    return cards
+
+def suit_masks(mask: int) -> tuple[int, int, int, int]:
+    """Split a 52 bits mask into one 13 bits value mask per suit (in the CardSuits order)"""
+    return (mask & RANK_MASK, (mask >> 13) & RANK_MASK, (mask >> 26) & RANK_MASK, (mask >> 39) & RANK_MASK)
@@ -0,0 +1,39 @@
+# Internal libraries
+from card import Card
+from cfrSolver import STREET_INDEXES, CFRPolicy, get_bucket, get_default_policy
+from player import PlayerAction
+from playerBot import Bot
+
+
+class CFRBot(Bot):
+    """Bot that plays the strategy trained by cfrSolver (heads-up abstraction, used as is at bigger tables)"""
+    def __init__(self, name, policy: CFRPolicy | None = None, rng=None) -> None:
+        super().__init__(name=name, rng=rng)
+        self.policy: CFRPolicy = policy or get_default_policy()
+
+    def to_possible_action(self, action: PlayerAction) -> PlayerAction:
+        """Return the closest possible action when the abstract action can't be played at the table"""
+        if action in self.possible_actions:
+            return action
+        if action == PlayerAction.FOLD:
+            return self.safe_action
+        if action in (PlayerAction.CHECK, PlayerAction.CALL):
+            return self.follow_action
+        return self.risk_action
+
+    def choose_action(self, table: list[Card], highest_player_bet: int, pot: int = 0, opponents_nbr: int = 1) -> PlayerAction:
+        """Draw an action from the policy, or follow the bet when the situation is not in the abstraction"""
+        self.update_possible_actions(highest_player_bet)
+        if self.possible_actions[0] == PlayerAction.NONE:
+            return PlayerAction.NONE
+
+        street: int = STREET_INDEXES[len(table)]
+        bucket: int = get_bucket(self.hand, table, self.policy.buckets)
+        strategy: dict[PlayerAction: float] | None = self.policy.get_strategy(street, self.current_bet, highest_player_bet,
+                                                                               self.total_tokens + self.current_bet, bucket)
+        if strategy is None:
+            new_action: PlayerAction = self.follow_action
+        else:
+            new_action = self.to_possible_action(self.rng.choices(list(strategy), weights=list(strategy.values()))[0])
+        self.action_history.append(new_action)
+        return new_action
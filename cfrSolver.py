@@ -0,0 +1,422 @@
+# External libraries
+import argparse
+import os
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from time import perf_counter
+from typing import Callable
+
+import numpy as np
+
+# Internal libraries
+from card import Card, cards_to_mask
+from handRange import COMBO_MASKS, combo_index, rank_combos
+from gameManager import BLINDS_AMOUNT
+from player import STARTING_TOKENS, PlayerAction
+from preflopEquity import HAND_CLASSES, PreflopEquityTable
+
+# Abstract game: heads-up, the small blind acts first on every street (as in GameManager), a raise doubles the
+# highest bet (as in Player.raise_bet) and the hands are replaced by hand strength buckets. Bets are counted in
+# units of a small blind, so the stack of each player is 2 * stack_blinds units.
+ACTIONS: tuple[PlayerAction, ...] = (PlayerAction.FOLD, PlayerAction.CHECK, PlayerAction.CALL, PlayerAction.RAISE, PlayerAction.ALL_IN)
+SMALL_BLIND: int = 1
+BIG_BLIND: int = 2
+STREETS: int = 4
+STREET_INDEXES: dict[int: int] = {0: 0, 3: 1, 4: 2, 5: 3} # Number of cards on the table -> street
+DEFAULT_STACK_BLINDS: int = STARTING_TOKENS // BLINDS_AMOUNT[0] # Stack of the players of a new game, in first big blinds
+DEFAULT_BUCKETS: int = 8
+
+# Node kinds of the game tree
+DECISION: int = 0
+FOLDED: int = 1
+SHOWDOWN: int = 2
+
+POLICY_VERSION: int = 1
+POLICY_PATH: Path = Path(__file__).with_name("cfrPolicy.npz")
+CHECKPOINT_PATH: Path = Path(__file__).with_name("cfrCheckpoint.npz")
+
+
+# Game tree
+class GameTree:
+    """Betting tree of the abstract game, stored in flat lists indexed by node
+
+    Decision nodes with the same (street, bet of the player to act, highest bet) share an information set: that is
+    all a bot sees at the table, and it fixes the legal actions."""
+    def __init__(self, stack_blinds: int) -> None:
+        self.stack_blinds: int = stack_blinds
+        self.stack: int = stack_blinds * BIG_BLIND
+        self.kinds: list[int] = []
+        self.players: list[int] = [] # Player to act (0: small blind, 1: big blind) or winner of a folded node
+        self.streets: list[int] = []
+        self.infosets: list[int] = []
+        self.amounts: list[int] = [] # Units won by the winner on a folded or showdown node
+        self.children: list[list[int]] = [] # Child of each action, -1 when the action is illegal
+        self.infoset_keys: list[tuple[int, int, int]] = []
+        self.infoset_indexes: dict[tuple[int, int, int]: int] = {}
+        self.nodes: dict[tuple: int] = {}
+        self.root: int = self.build(0, (SMALL_BLIND, BIG_BLIND), 0, (False, False))
+        self.legal: np.ndarray = np.array([[key_action_is_legal(self.stack, key, action) for action in ACTIONS] for key in self.infoset_keys])
+
+    def add_node(self, kind: int, player: int, street: int, infoset: int, amount: int) -> int:
+        self.kinds.append(kind)
+        self.players.append(player)
+        self.streets.append(street)
+        self.infosets.append(infoset)
+        self.amounts.append(amount)
+        self.children.append([-1] * len(ACTIONS))
+        return len(self.kinds) - 1
+
+    def end_street(self, street: int, bets: tuple[int, int]) -> int:
+        if max(bets) == self.stack or street == STREETS - 1:
+            return self.add_node(SHOWDOWN, -1, street, -1, min(bets))
+        return self.build(street + 1, bets, 0, (False, False))
+
+    def build(self, street: int, bets: tuple[int, int], player: int, acted: tuple[bool, bool]) -> int:
+        """Return the node of a state, building its subtree the first time"""
+        state: tuple = (street, bets, player, acted)
+        if state in self.nodes:
+            return self.nodes[state]
+
+        key: tuple[int, int, int] = (street, bets[player], bets[1 - player])
+        if key not in self.infoset_indexes:
+            self.infoset_indexes[key] = len(self.infoset_keys)
+            self.infoset_keys.append(key)
+        node: int = self.add_node(DECISION, player, street, self.infoset_indexes[key], 0)
+        self.nodes[state] = node
+
+        highest: int = max(bets)
+        for position, action in enumerate(ACTIONS):
+            if not key_action_is_legal(self.stack, key, action):
+                continue
+            if action == PlayerAction.FOLD:
+                child: int = self.add_node(FOLDED, 1 - player, street, -1, bets[player])
+            else:
+                new_bets: list[int] = list(bets)
+                new_acted: list[bool] = list(acted)
+                new_acted[player] = True
+                if action == PlayerAction.CALL:
+                    new_bets[player] = highest
+                elif action == PlayerAction.RAISE:
+                    new_bets[player] = 2 * highest
+                    new_acted[1 - player] = False
+                elif action == PlayerAction.ALL_IN:
+                    new_bets[player] = self.stack
+                    new_acted[1 - player] = bets[1 - player] == self.stack
+
+                if all(new_acted) and new_bets[0] == new_bets[1]:
+                    child = self.end_street(street, (new_bets[0], new_bets[1]))
+                else:
+                    child = self.build(street, (new_bets[0], new_bets[1]), 1 - player, (new_acted[0], new_acted[1]))
+            self.children[node][position] = child
+        return node
+
+def key_action_is_legal(stack: int, key: tuple[int, int, int], action: PlayerAction) -> bool:
+    """Same rules as Player.define_possible_actions, for the player to act of an information set"""
+    _, bet, highest = key
+    tokens: int = stack - bet
+    if action == PlayerAction.FOLD:
+        return highest > bet
+    if action == PlayerAction.CHECK:
+        return highest == bet
+    if action == PlayerAction.CALL:
+        return highest > bet and tokens > highest - bet
+    if action == PlayerAction.RAISE:
+        return tokens > highest * 2
+    return tokens > 0 # All in
+
+@lru_cache
+def build_game_tree(stack_blinds: int) -> GameTree:
+    return GameTree(stack_blinds)
+
+
+# Card buckets
+_preflop_percentiles: np.ndarray | None = None
+
+def get_preflop_percentiles() -> np.ndarray:
+    """Return, for each starting hand class, the share of the starting hands it beats on heads-up equity"""
+    global _preflop_percentiles
+    if _preflop_percentiles is None:
+        table: PreflopEquityTable = PreflopEquityTable.load()
+        equities: np.ndarray = np.array(table.equities[:HAND_CLASSES])
+        rows, columns = np.divmod(np.arange(HAND_CLASSES), 13)
+        combos: np.ndarray = np.where(rows == columns, 6, np.where(rows > columns, 4, 12)) # Pairs, suited, offsuit
+        lower: np.ndarray = (combos[None, :] * (equities[None, :] < equities[:, None])).sum(axis=1)
+        equal: np.ndarray = (combos[None, :] * (equities[None, :] == equities[:, None])).sum(axis=1)
+        _preflop_percentiles = (lower + equal / 2) / combos.sum()
+    return _preflop_percentiles
+
+def hand_class_indexes(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    """Vectorized preflopEquity.hand_class_index on card indexes"""
+    first_values, second_values = first % 13, second % 13
+    high, low = np.maximum(first_values, second_values), np.minimum(first_values, second_values)
+    return np.where(first // 13 == second // 13, high * 13 + low, low * 13 + high)
+
+def board_strengths(hand_masks: np.ndarray, board_masks: np.ndarray, ranks: np.ndarray, hand_combos: np.ndarray) -> np.ndarray:
+    """Share of the random opponent hands beaten (ties count half) by each hand on its board, ranks from rank_combos"""
+    hand_ranks: np.ndarray = ranks[np.arange(len(ranks)), hand_combos][:, None]
+    playable: np.ndarray = (COMBO_MASKS[None, :] & (hand_masks | board_masks)[:, None]) == 0
+    lower: np.ndarray = (playable & (ranks < hand_ranks)).sum(axis=1)
+    equal: np.ndarray = (playable & (ranks == hand_ranks)).sum(axis=1)
+    return (lower + equal / 2) / playable.sum(axis=1)
+
+def strength_bucket(strength: np.ndarray | float, buckets: int) -> np.ndarray:
+    return np.minimum((np.asarray(strength) * buckets).astype(np.int64), buckets - 1)
+
+def get_bucket(hand: list[Card], table: list[Card], buckets: int) -> int:
+    """Return the bucket of a hand on a table (the same buckets as the training deals)"""
+    first, second = hand[0].index, hand[1].index
+    if not table:
+        return int(strength_bucket(get_preflop_percentiles()[hand_class_indexes(first, second)], buckets))
+    board_mask: np.ndarray = np.array([cards_to_mask(table)], dtype=np.int64)
+    hand_mask: np.ndarray = np.array([1 << first | 1 << second], dtype=np.int64)
+    strengths: np.ndarray = board_strengths(hand_mask, board_mask, rank_combos(board_mask), np.array([combo_index(*hand)]))
+    return int(strength_bucket(strengths[0], buckets))
+
+def deal_buckets(rng: np.random.Generator, deals: int, buckets: int) -> tuple[np.ndarray, np.ndarray]:
+    """Deal random hands and boards, return the bucket of both players on each street (deals, 2, STREETS) and the
+    showdown result for the small blind (1 won, 0 split, -1 lost)"""
+    cards: np.ndarray = np.argsort(rng.random((deals, 52)), axis=1)[:, :9]
+    hands: np.ndarray = cards[:, :4].reshape(deals, 2, 2)
+    low, high = np.minimum(hands[..., 0], hands[..., 1]), np.maximum(hands[..., 0], hands[..., 1])
+    hand_combos: np.ndarray = high * (high - 1) // 2 + low # Same order as handRange.COMBOS
+    hand_masks: np.ndarray = (np.int64(1) << hands[..., 0]) | (np.int64(1) << hands[..., 1])
+
+    result: np.ndarray = np.empty((deals, 2, STREETS), dtype=np.int64)
+    result[:, :, 0] = strength_bucket(get_preflop_percentiles()[hand_class_indexes(hands[..., 0], hands[..., 1])], buckets)
+    for street, cards_nbr in enumerate((3, 4, 5), start=1):
+        board_masks = np.bitwise_or.reduce(np.int64(1) << cards[:, 4:4 + cards_nbr], axis=1)
+        ranks: np.ndarray = rank_combos(board_masks)
+        for player in (0, 1):
+            result[:, player, street] = strength_bucket(board_strengths(hand_masks[:, player], board_masks, ranks, hand_combos[:, player]), buckets)
+    showdown: np.ndarray = np.sign(ranks[np.arange(deals), hand_combos[:, 0]] - ranks[np.arange(deals), hand_combos[:, 1]])
+    return result, showdown
+
+
+# Training
+def regret_matching(regrets: np.ndarray, legal: np.ndarray) -> np.ndarray:
+    """Play each legal action in proportion to its positive regret (uniformly when no regret is positive)"""
+    positive: np.ndarray = np.maximum(regrets, 0) * legal
+    totals: np.ndarray = positive.sum(axis=1, keepdims=True)
+    uniform: np.ndarray = legal / legal.sum(axis=1, keepdims=True)
+    return np.where(totals > 0, positive / np.where(totals > 0, totals, 1), uniform)
+
+class BatchTraversal:
+    """One pass of chance sampled CFR over the betting tree for a batch of deals at once
+
+    Every node handles the whole batch with NumPy arrays: the reach probabilities and utilities have one element
+    per deal, and the regrets of the information sets (one row per infoset and bucket) are gathered with the
+    buckets of the deals."""
+    def __init__(self, tree: GameTree, buckets: int, strategy: np.ndarray, deal_buckets: np.ndarray, showdown: np.ndarray) -> None:
+        self.tree: GameTree = tree
+        self.buckets: int = buckets
+        self.strategy: np.ndarray = strategy
+        self.deal_buckets: np.ndarray = deal_buckets
+        self.showdown: np.ndarray = showdown
+        self.regret_delta: np.ndarray = np.zeros(strategy.shape)
+        self.strategy_delta: np.ndarray = np.zeros(strategy.shape)
+
+    def traverse(self, node: int, reaches: np.ndarray) -> np.ndarray:
+        """Return the utility of the small blind on every deal, in units, and accumulate the regrets of the subtree"""
+        tree: GameTree = self.tree
+        kind: int = tree.kinds[node]
+        if kind == FOLDED:
+            return np.full(len(self.showdown), tree.amounts[node] if tree.players[node] == 0 else -tree.amounts[node], dtype=float)
+        if kind == SHOWDOWN:
+            return self.showdown * float(tree.amounts[node])
+
+        player: int = tree.players[node]
+        rows: np.ndarray = tree.infosets[node] * self.buckets + self.deal_buckets[:, player, tree.streets[node]]
+        strategy: np.ndarray = self.strategy[rows]
+        utilities: np.ndarray = np.zeros(strategy.shape)
+        for action, child in enumerate(tree.children[node]):
+            if child == -1:
+                continue
+            child_reaches: np.ndarray = reaches.copy()
+            child_reaches[player] *= strategy[:, action]
+            if child_reaches.any(): # A subtree that no player reaches changes neither the regrets nor the strategies
+                utilities[:, action] = self.traverse(child, child_reaches)
+        node_utility: np.ndarray = (strategy * utilities).sum(axis=1)
+
+        sign: float = 1.0 if player == 0 else -1.0
+        regrets: np.ndarray = (sign * reaches[1 - player])[:, None] * (utilities - node_utility[:, None])
+        played: np.ndarray = reaches[player][:, None] * strategy
+        size: int = len(self.strategy)
+        for action, child in enumerate(tree.children[node]):
+            if child != -1:
+                self.regret_delta[:, action] += np.bincount(rows, regrets[:, action], minlength=size)
+                self.strategy_delta[:, action] += np.bincount(rows, played[:, action], minlength=size)
+        return node_utility
+
+def train_batch(stack_blinds: int, buckets: int, strategy: np.ndarray, deals: int, seed: int) -> tuple[np.ndarray, np.ndarray, float]:
+    """Traverse the tree for a batch of random deals with a fixed strategy, return the regrets and strategy weights
+    to add (averaged over the deals) and the average utility of the small blind"""
+    tree: GameTree = build_game_tree(stack_blinds)
+    players_buckets, showdown = deal_buckets(np.random.default_rng(seed), deals, buckets)
+    traversal: BatchTraversal = BatchTraversal(tree, buckets, strategy, players_buckets, showdown)
+    utilities: np.ndarray = traversal.traverse(tree.root, np.ones((2, deals)))
+    return traversal.regret_delta / deals, traversal.strategy_delta / deals, float(utilities.mean())
+
+
+class CFRTrainer:
+    """CFR+ trainer: regrets floored at 0 after each update, average strategy weighted by the update number
+
+    Each update traverses `workers` batches of deals in parallel with the same strategy, then sums their regrets.
+    A batch seed only depends on the trainer seed and the batch number, so a resumed training deals the same cards."""
+    def __init__(self, stack_blinds: int = DEFAULT_STACK_BLINDS, buckets: int = DEFAULT_BUCKETS, seed: int | None = None) -> None:
+        self.tree: GameTree = build_game_tree(stack_blinds)
+        self.stack_blinds: int = stack_blinds
+        self.buckets: int = buckets
+        self.seed: int = np.random.SeedSequence(seed).entropy
+        self.legal: np.ndarray = np.repeat(self.tree.legal, buckets, axis=0) # (infosets * buckets, actions)
+        self.regrets: np.ndarray = np.zeros(self.legal.shape, dtype=np.float32)
+        self.strategy_sum: np.ndarray = np.zeros(self.legal.shape, dtype=np.float32)
+        self.updates: int = 0
+        self.batches: int = 0
+        self.iterations: int = 0 # Deals traversed
+
+    def batch_seed(self, batch: int) -> int:
+        return int(np.random.SeedSequence([self.seed, batch]).generate_state(1, np.uint64)[0])
+
+    def update(self, results: list[tuple[np.ndarray, np.ndarray, float]]) -> None:
+        self.updates += 1
+        regret_delta: np.ndarray = sum(result[0] for result in results) / len(results)
+        strategy_delta: np.ndarray = sum(result[1] for result in results) / len(results)
+        self.regrets = np.maximum(self.regrets + regret_delta, 0).astype(np.float32)
+        self.strategy_sum += (self.updates * strategy_delta).astype(np.float32)
+
+    def train(self, iterations: int, workers: int | None = 1, batch_size: int = 1_000,
+              on_update: Callable[["CFRTrainer"], None] | None = None) -> float:
+        """Train on `iterations` random deals and return the number of iterations per second"""
+        workers = os.cpu_count() if workers is None else workers
+        batches: int = -(-iterations // batch_size)
+        start: float = perf_counter()
+        start_iterations: int = self.iterations
+        executor: ProcessPoolExecutor | None = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        try:
+            while batches > 0:
+                strategy: np.ndarray = regret_matching(self.regrets, self.legal)
+                seeds: list[int] = [self.batch_seed(self.batches + offset) for offset in range(min(workers, batches))]
+                arguments: tuple = (self.stack_blinds, self.buckets, strategy, batch_size)
+                if executor is None:
+                    results = [train_batch(*arguments, seed) for seed in seeds]
+                else:
+                    results = list(executor.map(train_batch, *zip(*[arguments + (seed,) for seed in seeds])))
+                self.update(results)
+                self.batches += len(seeds)
+                self.iterations += len(seeds) * batch_size
+                batches -= len(seeds)
+                if on_update is not None:
+                    on_update(self)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        return (self.iterations - start_iterations) / (perf_counter() - start)
+
+    def average_strategy(self) -> np.ndarray:
+        """Return the average strategy of every infoset row, the one that converges to an equilibrium"""
+        return regret_matching(self.strategy_sum, self.legal)
+
+    # Saving
+    def save_checkpoint(self, path: Path = CHECKPOINT_PATH) -> None:
+        np.savez_compressed(path, version=POLICY_VERSION, stack_blinds=self.stack_blinds, buckets=self.buckets, seed=str(self.seed),
+                            regrets=self.regrets, strategy_sum=self.strategy_sum, counters=[self.updates, self.batches, self.iterations])
+
+    @classmethod
+    def load_checkpoint(cls, path: Path = CHECKPOINT_PATH) -> "CFRTrainer":
+        with np.load(path) as data:
+            if int(data["version"]) != POLICY_VERSION:
+                raise ValueError(f"{path} is not a version {POLICY_VERSION} checkpoint")
+            trainer: CFRTrainer = cls(int(data["stack_blinds"]), int(data["buckets"]), int(str(data["seed"])))
+            trainer.regrets = data["regrets"]
+            trainer.strategy_sum = data["strategy_sum"]
+            trainer.updates, trainer.batches, trainer.iterations = (int(counter) for counter in data["counters"])
+        return trainer
+
+    def export_policy(self, path: Path = POLICY_PATH) -> None:
+        """Write the average strategy, as float16, with the infoset keys a bot needs to find it"""
+        np.savez_compressed(path, version=POLICY_VERSION, stack_blinds=self.stack_blinds, buckets=self.buckets,
+                            keys=np.array(self.tree.infoset_keys, dtype=np.int16), strategy=self.average_strategy().astype(np.float16))
+
+
+# Playing
+class CFRPolicy:
+    """Average strategy exported by a CFRTrainer, looked up in O(1) from what a player sees at the table"""
+    def __init__(self, stack_blinds: int, buckets: int, keys: np.ndarray, strategy: np.ndarray) -> None:
+        self.stack: int = stack_blinds * BIG_BLIND
+        self.buckets: int = buckets
+        self.strategy: np.ndarray = strategy.astype(np.float32)
+        self.infoset_indexes: dict[tuple[int, int, int]: int] = {tuple(key): index for index, key in enumerate(keys.tolist())}
+        self.highest_bets: list[list[int]] = [sorted({highest for street, _, highest in keys.tolist() if street == index}) for index in range(STREETS)]
+        self.bets: dict[tuple[int, int]: list[int]] = {} # Bets of the player to act, by street and highest bet of its infosets
+        for street, bet, highest in keys.tolist():
+            self.bets.setdefault((street, highest), []).append(bet)
+        for bets in self.bets.values():
+            bets.sort()
+
+    @classmethod
+    def load(cls, path: Path = POLICY_PATH) -> "CFRPolicy":
+        with np.load(path) as data:
+            if int(data["version"]) != POLICY_VERSION:
+                raise ValueError(f"{path} is not a version {POLICY_VERSION} policy, train it again with: python cfrSolver.py")
+            return cls(int(data["stack_blinds"]), int(data["buckets"]), data["keys"], data["strategy"])
+
+    @staticmethod
+    def snap_bet(bets: list[int], bet: float) -> int:
+        """Return the bet of a sorted list closest to a bet (already in units of the abstract stack)"""
+        position: int = bisect_left(bets, bet)
+        return min(bets[max(position - 1, 0):position + 1], key=lambda abstract_bet: abs(abstract_bet - bet))
+
+    def get_strategy(self, street: int, bet: int, highest_bet: int, stack: int, bucket: int) -> dict[PlayerAction: float] | None:
+        """Return the probability of each action for a player that put `bet` of its `stack` tokens (counted at the start
+        of the round) against `highest_bet`, or None when the street has no situation in the abstract game
+
+        The highest bet is snapped to the closest one of the street, then the bet to the closest one facing it, so
+        the situation always falls on an infoset of the abstract game."""
+        if not self.highest_bets[street]:
+            return None
+        scale: float = self.stack / max(stack, 1)
+        highest: int = self.snap_bet(self.highest_bets[street], highest_bet * scale)
+        key: tuple[int, int, int] = (street, self.snap_bet(self.bets[street, highest], bet * scale), highest)
+        probabilities: np.ndarray = self.strategy[self.infoset_indexes[key] * self.buckets + bucket]
+        return {action: float(probability) for action, probability in zip(ACTIONS, probabilities) if probability > 0}
+
+_default_policy: CFRPolicy | None = None
+
+def get_default_policy() -> CFRPolicy:
+    """Return the policy shipped with the game, loaded once"""
+    global _default_policy
+    if _default_policy is None:
+        _default_policy = CFRPolicy.load()
+    return _default_policy
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the CFR+ bot on the abstract heads-up game and export its policy")
+    parser.add_argument("--iterations", type=int, default=200_000, help="random deals to train on")
+    parser.add_argument("--batch-size", type=int, default=1_000)
+    parser.add_argument("--workers", type=int, default=None, help="number of processes (default: one per core)")
+    parser.add_argument("--stack", type=int, default=DEFAULT_STACK_BLINDS, help="stack of each player, in big blinds")
+    parser.add_argument("--buckets", type=int, default=DEFAULT_BUCKETS)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--checkpoint", type=Path, default=CHECKPOINT_PATH)
+    parser.add_argument("--checkpoint-every", type=int, default=50, help="updates between two checkpoints")
+    parser.add_argument("--resume", action="store_true", help="continue the training saved in the checkpoint")
+    parser.add_argument("--output", type=Path, default=POLICY_PATH)
+    arguments = parser.parse_args()
+
+    if arguments.resume:
+        trainer: CFRTrainer = CFRTrainer.load_checkpoint(arguments.checkpoint)
+    else:
+        trainer = CFRTrainer(arguments.stack, arguments.buckets, arguments.seed)
+
+    def on_update(trainer: CFRTrainer) -> None:
+        if trainer.updates % arguments.checkpoint_every == 0:
+            trainer.save_checkpoint(arguments.checkpoint)
+            print(f"{trainer.iterations} iterations, checkpoint saved")
+
+    iterations_per_second: float = trainer.train(arguments.iterations, arguments.workers, arguments.batch_size, on_update)
+    trainer.save_checkpoint(arguments.checkpoint)
+    trainer.export_policy(arguments.output)
+    print(f"{trainer.iterations} iterations | {iterations_per_second:.0f} iterations/s | {len(trainer.tree.infoset_keys)} infosets x {trainer.buckets} buckets")
@@ -1,9 +1,11 @@
 # External libraries
 from enum import Enum
+from functools import cached_property
 
 # Internal libraries
-from card import Card, CardSuits
+from card import Card, CardSuits, cards_to_mask, mask_to_cards
 from collections import defaultdict
+import handEvaluator
 
 
 class CardCombinations(Enum):
@@ -20,16 +22,28 @@ class CardCombinations(Enum):
 
 
 class CombinationHandler:
-    def __init__(self, cards) -> None:
+    def __init__(self, cards: list[Card], mask: int | None = None) -> None:
         self.cards: list[Card] = cards
+        self.mask: int = cards_to_mask(cards) if mask is None else mask # 52 bits mask of the cards
 
-    @property
+    @classmethod
+    def from_mask(cls, mask: int) -> "CombinationHandler":
+        """Create a handler from a 52 bits mask of cards"""
+        return cls(mask_to_cards(mask), mask)
+
+    @cached_property
     def combination(self) -> tuple[CardCombinations, list[Card]]:
         return self.get_final_combination()
     
     @property
     def power(self) -> int:
-        return self.combination[0].value
+        """Strength of the hand as a single integer (combination and every kicker), two hands tie only if their powers are equal"""
+        return self.rank
+
+    @cached_property
+    def rank(self) -> int:
+        """Raw integer rank of the hand, only meant to be compared with other ranks (the higher the better)"""
+        return handEvaluator.evaluate_mask(self.mask)
 
     def get_card_num_occurences(self) -> dict[int: list[Card]]:
         """Create a dictionary with the occurences of each card depending on their value"""
@@ -177,34 +191,47 @@ class CombinationHandler:
             return sorted(straight_flush_cards, key=lambda x: x.value, reverse=True) # MODIFIED
         return False
     
-    def get_final_combination(self) -> tuple[CardCombinations, list[Card]]:
-        """Return the best combination of cards in the cards"""
-        result = self.get_best_royal_flush()
-        if result: return (CardCombinations.ROYAL_FLUSH, result)
+    def get_cards_of_values(self, values: list[int], suit: CardSuits | None = None) -> list[Card]:
+        """Return one card for each value (from the given suit if any), in the order of the values"""
+        cards_by_value: dict[int: Card] = {}
+        for card in self.cards:
+            if suit is None or card.suit == suit:
+                cards_by_value.setdefault(card.value, card)
+        return [cards_by_value[value] for value in values]
+
+    def get_flush_suit(self) -> CardSuits:
+        """Return the suit that has at least 5 cards"""
+        return next(suit for suit, cards in self.get_card_suit_occurences().items() if len(cards) >= 5)
 
-        result = self.get_best_straight_flush()
-        if result: return (CardCombinations.STRAIGHT_FLUSH, result)
+    def get_final_combination(self) -> tuple[CardCombinations, list[Card]]:
+        """Return the best combination of cards in the cards, using the precomputed rank tables"""
+        rank: int = self.rank
+        combination: CardCombinations = CardCombinations(handEvaluator.rank_category(rank))
+        values: list[int] = handEvaluator.rank_values(rank)
 
-        result = self.get_best_four_of_a_kind()
-        if result: return (CardCombinations.FOUR_OF_A_KIND, result)
+        if combination in (CardCombinations.ROYAL_FLUSH, CardCombinations.STRAIGHT_FLUSH, CardCombinations.STRAIGHT):
+            # A straight is stored with its highest card only, the ace plays low in A-2-3-4-5
+            straight_values: list[int] = [value if value > 1 else 14 for value in range(values[0], values[0] - 5, -1)]
+            suit: CardSuits | None = self.get_flush_suit() if combination != CardCombinations.STRAIGHT else None
+            return (combination, self.get_cards_of_values(straight_values, suit))
 
-        result = self.get_best_full_house()
-        if result: return (CardCombinations.FULL_HOUSE, result)
+        if combination == CardCombinations.FLUSH:
+            return (combination, self.get_cards_of_values(values, self.get_flush_suit()))
 
-        result = self.get_best_flush()
-        if result: return (CardCombinations.FLUSH, result)
+        occurences: dict[int: list[Card]] = self.get_card_num_occurences()
+        if combination == CardCombinations.FOUR_OF_A_KIND:
+            return (combination, occurences[values[0]])
 
-        result = self.get_best_straight()
-        if result: return (CardCombinations.STRAIGHT, result)
+        if combination == CardCombinations.FULL_HOUSE:
+            return (combination, occurences[values[0]][:3] + occurences[values[1]][:2])
 
-        result = self.get_best_three_of_a_kind()
-        if result: return (CardCombinations.THREE_OF_A_KIND, result)
+        if combination == CardCombinations.THREE_OF_A_KIND:
+            return (combination, occurences[values[0]])
 
-        result = self.get_best_two_pair()
-        if result: return (CardCombinations.TWO_PAIR, result)
+        if combination == CardCombinations.TWO_PAIR:
+            return (combination, [occurences[values[0]], occurences[values[1]]])
 
-        result = self.get_best_pair()
-        if result: return (CardCombinations.PAIR, result)
+        if combination == CardCombinations.PAIR:
+            return (combination, occurences[values[0]])
 
-        result = sorted(self.cards, key=lambda x: x.value, reverse=True)
-        return (CardCombinations.HIGH_CARD, result)
+        return (combination, sorted(self.cards, key=lambda x: x.value, reverse=True))
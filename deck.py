@@ -1,23 +1,82 @@
 # External libraries
 import random
+from typing import Iterator
 
 # Internal libraries
-from card import Card, CardSuits
+from card import Card, CARDS, FULL_DECK_MASK
 
+CARD_INDEXES: tuple[int, ...] = tuple(card.index for card in CARDS)
 
-class Deck(list): # list[Card]
-    def __init__(self) -> None:
-        super().__init__()
+
+class Deck:
+    """The 52 canonical cards, dealt from a permutation of their indexes
+
+    Nothing is allocated once the deck is built: shuffling permutes the indexes in place, and drawing moves a cursor
+    down the permutation (the cards at and above the cursor are dealt). Removing known cards swaps them above the
+    cursor, in O(1) per card."""
+    def __init__(self, rng=None) -> None:
+        self.rng = random if rng is None else rng # Random stream used to shuffle (see randomGenerator.RandomGenerator)
+        self.order: list[int] = list(CARD_INDEXES) # The cards left are order[:cursor], the last one is drawn first
+        self.cursor: int = 0
+        self.positions: list[int] = list(CARD_INDEXES) # Position of each card index in order (see remove_cards)
+        self.positions_valid: bool = False
+        self.mask: int = 0 # 52 bits mask of the cards left in the deck
         self.build_deck()
 
-    def build_deck(self, shuffle: bool=True) -> None:
-        self.clear()
-        self.extend([Card(value=value, suit=suit) for suit in list(CardSuits) for value in range(2, 15)])
-        if shuffle:
+    def __len__(self) -> int:
+        return self.cursor
+
+    def __iter__(self) -> Iterator[Card]:
+        """Iterate over the cards left, the next one drawn last"""
+        order: list[int] = self.order
+        return (CARDS[order[position]] for position in range(self.cursor))
+
+    def build_deck(self, shuffle: bool=True, order: list[int] | None = None) -> None:
+        """Put back all the cards, shuffled, or in a given order of card indexes (the last ones are drawn first)"""
+        self.order[:] = CARD_INDEXES if order is None else order
+        self.cursor = len(CARD_INDEXES)
+        self.mask = FULL_DECK_MASK
+        self.positions_valid = False
+        if shuffle and order is None:
             self.shuffle()
 
     def shuffle(self) -> None:
-        random.shuffle(self)
+        """Shuffle the cards left in the deck"""
+        if self.cursor == len(self.order):
+            self.rng.shuffle(self.order)
+        else:
+            cards_left: list[int] = self.order[:self.cursor]
+            self.rng.shuffle(cards_left)
+            self.order[:self.cursor] = cards_left
+        self.positions_valid = False
 
     def draw(self) -> Card:
-        return self.pop()
+        if not self.cursor:
+            raise IndexError("draw from an empty deck")
+        self.cursor -= 1
+        index: int = self.order[self.cursor]
+        self.mask ^= 1 << index
+        return CARDS[index]
+
+    def remove_cards(self, mask: int) -> None:
+        """Remove the cards of a 52 bits mask from the deck (e.g. cards already known to be dealt)"""
+        mask &= self.mask
+        if not mask:
+            return
+        order: list[int] = self.order
+        positions: list[int] = self.positions
+        if not self.positions_valid: # Once per shuffle, the cards drawn don't move
+            for position, index in enumerate(order):
+                positions[index] = position
+            self.positions_valid = True
+
+        self.mask ^= mask
+        while mask:
+            index: int = (mask & -mask).bit_length() - 1
+            mask &= mask - 1
+            # Swap the card with the last card left, then deal it
+            self.cursor -= 1
+            position: int = positions[index]
+            last: int = order[self.cursor]
+            order[position], positions[last] = last, position
+            order[self.cursor], positions[index] = index, self.cursor
@@ -0,0 +1,270 @@
+# External libraries
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import permutations
+from math import comb, sqrt
+from statistics import NormalDist
+
+# Internal libraries
+from card import Card, cards_to_mask, suit_masks
+from deck import Deck
+from handEvaluator import CARD_KEYS, HandState
+
+CHUNK_SAMPLES: int = 2_000 # Samples simulated by a single task, each task gets its own seed
+EXACT_MAX_RUNOUTS: int = 50_000 # Above this number of runouts, calculate_equity samples instead of enumerating
+
+
+@dataclass
+class EquityResult:
+    samples: int = 0
+    wins: int = 0 # Runouts won alone
+    ties: int = 0 # Runouts split with other players
+    equity_sum: float = 0.0 # Sum of the share of the pot won on each runout (1/n for a n-way tie)
+    equity_squares_sum: float = 0.0 # Used to compute the variance of the equity
+
+    @property
+    def win(self) -> float:
+        return self.wins / self.samples
+
+    @property
+    def tie(self) -> float:
+        return self.ties / self.samples
+
+    @property
+    def lose(self) -> float:
+        return 1 - self.win - self.tie
+
+    @property
+    def equity(self) -> float:
+        """Average share of the pot won"""
+        return self.equity_sum / self.samples
+
+    def confidence_interval(self, confidence: float = 0.95) -> tuple[float, float]:
+        """Return the confidence interval of the equity (normal approximation)"""
+        variance: float = max(self.equity_squares_sum / self.samples - self.equity ** 2, 0.0)
+        margin: float = NormalDist().inv_cdf((1 + confidence) / 2) * sqrt(variance / self.samples)
+        return (max(self.equity - margin, 0.0), min(self.equity + margin, 1.0))
+
+    def merge(self, other: "EquityResult") -> None:
+        """Add the samples of another result to this one"""
+        self.samples += other.samples
+        self.wins += other.wins
+        self.ties += other.ties
+        self.equity_sum += other.equity_sum
+        self.equity_squares_sum += other.equity_squares_sum
+
+
+def get_remaining_cards(known_mask: int, deck: Deck | None = None) -> list[int]:
+    """Return the indexes of the cards of the deck that are not known (in a hand, on the board or dead)"""
+    if deck is None:
+        deck = Deck()
+        deck.build_deck(shuffle=False)
+    return [card.index for card in deck if not known_mask >> card.index & 1]
+
+def simulate_runouts(hand_masks: list[int], board_mask: int, remaining: list[int], samples: int, seed: int) -> list[EquityResult]:
+    """Deal `samples` random runouts of the board and count how each hand does"""
+    rng: random.Random = random.Random(seed)
+    missing: int = 5 - board_mask.bit_count()
+    states: list[HandState] = [HandState.from_mask(hand_mask | board_mask) for hand_mask in hand_masks]
+    results: list[EquityResult] = [EquityResult(samples=samples) for _ in hand_masks]
+    for _ in range(samples):
+        runout_mask: int = 0
+        runout_key: int = 0
+        for index in rng.sample(remaining, missing):
+            runout_mask |= 1 << index
+            runout_key += CARD_KEYS[index]
+
+        ranks: list[int] = [state.rank_with(runout_mask, runout_key) for state in states]
+        best_rank: int = max(ranks)
+        winners: int = ranks.count(best_rank)
+        share: float = 1 / winners
+        for result, rank in zip(results, ranks):
+            if rank != best_rank:
+                continue
+            if winners == 1:
+                result.wins += 1
+            else:
+                result.ties += 1
+            result.equity_sum += share
+            result.equity_squares_sum += share * share
+    return results
+
+def simulate_against_random_hands(hand_mask: int, board_mask: int, opponents_nbr: int, remaining: list[int], samples: int,
+                                  rng: random.Random) -> EquityResult:
+    """Deal `samples` random runouts where the opponents' hands are unknown, and count how the hand does against them"""
+    missing: int = 5 - board_mask.bit_count()
+    state: HandState = HandState.from_mask(hand_mask | board_mask)
+    board_state: HandState = HandState.from_mask(board_mask)
+    result: EquityResult = EquityResult(samples=samples)
+    for _ in range(samples):
+        dealt: list[int] = rng.sample(remaining, missing + 2 * opponents_nbr)
+        runout_mask: int = 0
+        runout_key: int = 0
+        for index in dealt[:missing]:
+            runout_mask |= 1 << index
+            runout_key += CARD_KEYS[index]
+
+        rank: int = state.rank_with(runout_mask, runout_key)
+        winners: int = 1
+        for position in range(missing, len(dealt), 2):
+            first, second = dealt[position], dealt[position + 1]
+            opponent_rank: int = board_state.rank_with(runout_mask | 1 << first | 1 << second, runout_key + CARD_KEYS[first] + CARD_KEYS[second])
+            if opponent_rank > rank:
+                winners = 0
+                break
+            if opponent_rank == rank:
+                winners += 1
+        if winners == 1:
+            result.wins += 1
+        elif winners:
+            result.ties += 1
+        if winners:
+            result.equity_sum += 1 / winners
+            result.equity_squares_sum += 1 / winners ** 2
+    return result
+
+def merge_results(results: list[EquityResult], chunks_results) -> None:
+    """Add the results of every chunk to the results of each hand"""
+    for chunk_results in chunks_results:
+        for result, chunk_result in zip(results, chunk_results):
+            result.merge(chunk_result)
+
+def monte_carlo_equity(hands: list[list[Card]], board: list[Card] | None = None, dead: list[Card] | None = None, samples: int = 10_000,
+                       workers: int | None = 1, seed: int | None = None, deck: Deck | None = None) -> list[EquityResult]:
+    """Estimate the win/tie/lose frequencies of each hand by sampling random runouts of the board
+
+    The samples are split into fixed size chunks with their own seed, so a seeded run gives the same result whatever
+    the number of workers. `workers` processes are used (None for one per core, 1 to stay in this process)."""
+    board = board or []
+    if len(board) > 5:
+        raise ValueError("The board can't have more than 5 cards.")
+
+    hand_masks: list[int] = [cards_to_mask(hand) for hand in hands]
+    board_mask: int = cards_to_mask(board)
+    known_mask: int = board_mask | cards_to_mask(dead or [])
+    for hand_mask in hand_masks:
+        known_mask |= hand_mask
+    remaining: list[int] = get_remaining_cards(known_mask, deck)
+
+    master_rng: random.Random = random.Random(seed)
+    chunks_samples: list[int] = [min(CHUNK_SAMPLES, samples - start) for start in range(0, samples, CHUNK_SAMPLES)]
+    chunks_seeds: list[int] = [master_rng.getrandbits(64) for _ in chunks_samples]
+    chunks_count: int = len(chunks_samples)
+    arguments = ([hand_masks] * chunks_count, [board_mask] * chunks_count, [remaining] * chunks_count, chunks_samples, chunks_seeds)
+
+    results: list[EquityResult] = [EquityResult() for _ in hands]
+    workers = os.cpu_count() if workers is None else workers
+    if workers <= 1 or chunks_count <= 1:
+        merge_results(results, map(simulate_runouts, *arguments))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            merge_results(results, executor.map(simulate_runouts, *arguments))
+    return results
+
+
+# Exact enumeration
+def permute_suits(mask: int, suits_permutation: tuple[int, ...]) -> int:
+    """Return the mask where the cards of the suit i are moved to the suit suits_permutation[i]"""
+    permuted_mask: int = 0
+    for suit, suit_mask in enumerate(suit_masks(mask)):
+        permuted_mask |= suit_mask << (13 * suits_permutation[suit])
+    return permuted_mask
+
+def get_suit_symmetries(known_masks: list[int]) -> list[tuple[int, ...]]:
+    """Return the suit permutations that leave every known set of cards (each hand, the board, the dead cards)
+    unchanged. The identity is always the first one."""
+    return [suits_permutation for suits_permutation in permutations(range(4))
+            if all(permute_suits(mask, suits_permutation) == mask for mask in known_masks)]
+
+def enumerate_runouts(remaining: list[int], missing: int, symmetries: list[tuple[int, ...]]):
+    """Yield (runout mask, runout quinary key, multiplicity) for one runout of each class of suit-isomorphic runouts
+
+    The runouts are built from the highest card to the lowest one, each card extending the mask and the key of a
+    shared prefix. A runout is kept only if its mask is the largest among the masks of its symmetric images. Since
+    removing the lowest card of a kept runout gives a kept runout too, the branches that stop being maximal are pruned."""
+    if missing == 0:
+        yield 0, 0, 1
+        return
+
+    shifts: list[tuple[int, ...]] = [tuple(13 * suit for suit in suits_permutation) for suits_permutation in symmetries[1:]]
+    cards: list[tuple[int, int]] = [(1 << index, CARD_KEYS[index]) for index in sorted(remaining, reverse=True)]
+
+    def stabilizer_size(runout_mask: int) -> int:
+        """Number of symmetries that leave the runout unchanged, 0 if one of them gives a larger runout"""
+        hearts, diamonds, clubs, spades = suit_masks(runout_mask)
+        size: int = 1
+        for hearts_shift, diamonds_shift, clubs_shift, spades_shift in shifts:
+            image: int = hearts << hearts_shift | diamonds << diamonds_shift | clubs << clubs_shift | spades << spades_shift
+            if image > runout_mask:
+                return 0
+            if image == runout_mask:
+                size += 1
+        return size
+
+    def extend(runout_mask: int, runout_key: int, cards_left: int, start: int):
+        for position in range(start, len(cards) - cards_left + 1):
+            bit, key = cards[position]
+            new_runout_mask: int = runout_mask | bit
+            size: int = stabilizer_size(new_runout_mask) if shifts else 1
+            if not size:
+                continue
+            if cards_left == 1:
+                yield new_runout_mask, runout_key + key, len(symmetries) // size
+            else:
+                yield from extend(new_runout_mask, runout_key + key, cards_left - 1, position + 1)
+
+    yield from extend(0, 0, missing, 0)
+
+def exact_equity(hands: list[list[Card]], board: list[Card] | None = None, dead: list[Card] | None = None,
+                 deck: Deck | None = None) -> list[EquityResult]:
+    """Calculate the exact win/tie/lose frequencies of each hand by walking every runout of the board
+
+    Suit-isomorphic runouts give the same result, so only one runout per class is evaluated and weighted by the
+    size of its class."""
+    board = board or []
+    if len(board) > 5:
+        raise ValueError("The board can't have more than 5 cards.")
+
+    hand_masks: list[int] = [cards_to_mask(hand) for hand in hands]
+    board_mask: int = cards_to_mask(board)
+    dead_mask: int = cards_to_mask(dead or [])
+    known_mask: int = board_mask | dead_mask
+    for hand_mask in hand_masks:
+        known_mask |= hand_mask
+    remaining: list[int] = sorted(get_remaining_cards(known_mask, deck))
+    symmetries: list[tuple[int, ...]] = get_suit_symmetries(hand_masks + [board_mask, dead_mask])
+
+    # Every hand starts from the state of its cards and the board, only the runout is added for each evaluation
+    states: list[HandState] = [HandState.from_mask(hand_mask | board_mask) for hand_mask in hand_masks]
+    results: list[EquityResult] = [EquityResult() for _ in hands]
+    for runout_mask, runout_key, weight in enumerate_runouts(remaining, 5 - len(board), symmetries):
+        ranks: list[int] = [state.rank_with(runout_mask, runout_key) for state in states]
+        best_rank: int = max(ranks)
+        winners: int = ranks.count(best_rank)
+        share: float = 1 / winners
+        for result, rank in zip(results, ranks):
+            result.samples += weight
+            if rank != best_rank:
+                continue
+            if winners == 1:
+                result.wins += weight
+            else:
+                result.ties += weight
+            result.equity_sum += share * weight
+            result.equity_squares_sum += share * share * weight
+    return results
+
+def calculate_equity(hands: list[list[Card]], board: list[Card] | None = None, dead: list[Card] | None = None,
+                     exact: bool | None = None, **sampling_options) -> list[EquityResult]:
+    """Calculate the equity of each hand, exactly or by sampling (monte_carlo_equity options are passed through)
+
+    By default the runouts are enumerated when there are at most EXACT_MAX_RUNOUTS of them (turn, river and most
+    flops), and sampled otherwise."""
+    if exact is None:
+        known_cards: int = len(board or []) + len(dead or []) + sum(len(hand) for hand in hands)
+        exact = comb(52 - known_cards, 5 - len(board or [])) <= EXACT_MAX_RUNOUTS
+    if exact:
+        return exact_equity(hands, board, dead, sampling_options.get("deck"))
+    return monte_carlo_equity(hands, board, dead, **sampling_options)
@@ -0,0 +1,63 @@
+# External libraries
+from time import perf_counter
+
+# Internal libraries
+from card import Card, cards_to_mask
+from equity import EquityResult, get_remaining_cards, simulate_against_random_hands
+from player import PlayerAction
+from playerBot import Bot
+from preflopEquity import MAX_PLAYERS, get_preflop_equity
+
+SAMPLES_PER_STEP: int = 50 # Runouts simulated between two checks of the time budget
+
+
+class EquityBot(Bot):
+    """Bot that compares its estimated equity with the price of calling instead of looking at its combination"""
+    def __init__(self, name, max_samples: int = 500, time_budget: float | None = None, rng=None) -> None:
+        super().__init__(name=name, rng=rng)
+        if max_samples < 1:
+            raise ValueError(f"An EquityBot needs at least one sample per decision (max_samples={max_samples})")
+        self.max_samples: int = max_samples # Maximum number of runouts simulated per decision
+        self.time_budget: float | None = time_budget # Maximum number of seconds per decision (None for no limit)
+        self.all_in_equity: float = 0.85 # Above this equity against the table, the bot goes all in
+
+    def estimate_equity(self, table: list[Card], opponents_nbr: int) -> float:
+        """Return the share of the pot the hand wins on average against `opponents_nbr` random hands, within the budget"""
+        if not table and opponents_nbr + 1 <= MAX_PLAYERS:
+            return get_preflop_equity(self.hand, opponents_nbr + 1)
+
+        board_mask: int = cards_to_mask(table)
+        remaining: list[int] = get_remaining_cards(self.hand_mask | board_mask)
+        result: EquityResult = EquityResult()
+        start: float = perf_counter()
+        while result.samples < self.max_samples:
+            result.merge(simulate_against_random_hands(self.hand_mask, board_mask, opponents_nbr, remaining,
+                                                       min(SAMPLES_PER_STEP, self.max_samples - result.samples), self.rng))
+            if self.time_budget is not None and perf_counter() - start >= self.time_budget:
+                break
+        return result.equity
+
+    def choose_action(self, table: list[Card], highest_player_bet: int, pot: int = 0, opponents_nbr: int = 1) -> PlayerAction:
+        """Call when the equity pays for the price of the call, raise when it is clearly above a fair share of the pot"""
+        self.update_possible_actions(highest_player_bet)
+        if self.possible_actions[0] == PlayerAction.NONE:
+            return PlayerAction.NONE
+
+        equity: float = self.estimate_equity(table, max(opponents_nbr, 1))
+        to_call: int = min(highest_player_bet - self.current_bet, self.total_tokens)
+        price: float = to_call / (pot + to_call) if to_call > 0 else 0.0
+        fair_share: float = 1 / (max(opponents_nbr, 1) + 1)
+
+        if equity >= self.all_in_equity:
+            new_action: PlayerAction = PlayerAction.ALL_IN
+        elif equity >= fair_share * 1.5 and equity > price and PlayerAction.RAISE in self.possible_actions:
+            new_action = PlayerAction.RAISE
+        elif equity > price and (PlayerAction.CALL in self.possible_actions or PlayerAction.CHECK in self.possible_actions):
+            new_action = self.follow_action
+        elif equity > price and equity > self.total_tokens / (pot + self.total_tokens): # Calling would take the whole stack
+            new_action = PlayerAction.ALL_IN
+        else:
+            new_action = self.safe_action
+
+        self.action_history.append(new_action)
+        return new_action
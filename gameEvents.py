@@ -0,0 +1,132 @@
+# External libraries
+from dataclasses import dataclass
+from queue import Queue
+from typing import Callable, Generator
+
+# Internal libraries
+from card import Card
+from player import Player, PlayerAction
+
+
+# Events of a game, in the order GameManager.iter_round yields them
+@dataclass(slots=True)
+class DealEvent:
+    """The blinds are paid and the hole cards dealt"""
+    hand: int
+    players: list[Player] # Players dealt in, the first two posted the small and the big blind
+
+@dataclass(slots=True)
+class ActionRequest:
+    """A player has to act: send the action back to the round (None lets the player choose with choose_action)"""
+    player: Player
+    table: list[Card]
+    highest_bet: int
+    pot: int
+    opponents_nbr: int # Opponents still in the round
+    possible_actions: list[PlayerAction]
+
+@dataclass(slots=True)
+class ActionEvent:
+    player: Player
+    action: PlayerAction
+    bet: int # Bet of the player in the round after the action
+
+@dataclass(slots=True)
+class StreetEvent:
+    """Cards were put on the table"""
+    cards: list[Card] # The new cards
+    table: list[Card]
+
+@dataclass(slots=True)
+class ShowdownEvent:
+    """Several players are still in the round once the betting is over and show their hands: their combination powers
+    can be sent back to the round when they were computed elsewhere (None lets the game evaluate them)"""
+    players: list[Player]
+    table: list[Card]
+
+@dataclass(slots=True)
+class PayoutEvent:
+    """The pots were given to the winners"""
+    payouts: dict[Player: int] # Tokens won by each player
+    winners: list[Player]
+    table: list[Card]
+
+@dataclass(slots=True)
+class GameOverEvent:
+    winner: Player
+
+GameEvent = DealEvent | ActionRequest | ActionEvent | StreetEvent | ShowdownEvent | PayoutEvent | GameOverEvent
+
+
+def notify(listeners: list[Callable[[GameEvent], PlayerAction | None]], event: GameEvent) -> PlayerAction | None:
+    """Give an event to the listeners, and return the action one of them answered an ActionRequest with (e.g. a
+    view asking the player at its terminal), None to let the player choose it"""
+    answer: PlayerAction | None = None
+    for listener in listeners:
+        action: PlayerAction | None = listener(event)
+        if action is not None:
+            answer = action
+    return answer if isinstance(event, ActionRequest) else None
+
+
+class GameSession:
+    """Step through a game one event at a time (e.g. from a UI, a test or a server), without blocking on any player
+
+    After an ActionRequest, the action of the requested player is given to the next call of next_event; without
+    one, a listener's answer is used (see notify), or the player chooses it itself (bots). The listeners of the game
+    still see every event."""
+    def __init__(self, game) -> None:
+        self.game = game
+        self.events: Generator = game.iter_game()
+        self.request: ActionRequest | None = None # Last action request, until the next event
+        self.answer: PlayerAction | None = None # Action a listener answered the last request with
+        self.finished: bool = False
+
+    def __iter__(self) -> "GameSession":
+        return self
+
+    def __next__(self) -> GameEvent:
+        event: GameEvent | None = self.next_event()
+        if event is None:
+            raise StopIteration
+        return event
+
+    def next_event(self, action: PlayerAction | None = None) -> GameEvent | None:
+        """Return the next event of the game, None once it is over"""
+        if action is not None and (self.request is None or action not in self.request.possible_actions):
+            raise ValueError(f"{action} doesn't answer an action request (possible actions: {self.request and self.request.possible_actions})")
+        if self.finished:
+            return None
+        answer: PlayerAction | None = None
+        if self.request is not None: # Only an action request is answered, the other events are sent None
+            answer = action if action is not None else self.answer
+        try:
+            event: GameEvent = self.events.send(answer)
+        except StopIteration:
+            self.finished = True
+            return None
+        self.request = event if isinstance(event, ActionRequest) else None
+        self.answer = notify(self.game.listeners, event)
+        return event
+
+    def close(self) -> None:
+        """Stop the game where it is (the rounds being stepped are closed too)"""
+        self.events.close()
+        self.request = None
+        self.answer = None
+        self.finished = True
+
+
+class QueuePlayer(Player):
+    """Player whose actions are put in a queue (e.g. by a UI thread), the game waiting for them when it is its turn"""
+    def __init__(self, name: str, starting_tokens: int = 10_000) -> None:
+        super().__init__(name, starting_tokens)
+        self.actions: Queue[PlayerAction] = Queue()
+
+    def choose_action(self, table: list[Card], highest_player_bet: int, pot: int = 0, opponents_nbr: int = 1) -> PlayerAction:
+        possible_actions: list[PlayerAction] = self.define_possible_actions(highest_player_bet)
+        if possible_actions[0] == PlayerAction.NONE:
+            return PlayerAction.NONE
+        while (action := self.actions.get()) not in possible_actions: # Actions that can't be played are dropped
+            pass
+        return action
@@ -1,44 +1,102 @@
 # External libraries
-import os
-from termcolor import colored
-from time import sleep
+from typing import Callable, Generator
 
 # Internal libraries
 from combinationHandler import CardCombinations
 from player import Player, PlayerAction
-from card import Card, CardSuits
+from card import Card, CardSuits, cards_to_mask
 from deck import Deck
+from gameEvents import ActionEvent, ActionRequest, DealEvent, GameEvent, GameOverEvent, PayoutEvent, ShowdownEvent, StreetEvent, notify
 from playerBot import Bot
+from potSettlement import build_pots, settle_pots
+from tableState import TableState
+from terminalView import TerminalView
+
+
+BLINDS_AMOUNT: tuple[int, ...] = (500, 1000, 2000, 5000) # Big blind of each level
+DECK_ORDERS_CHUNK: int = 64 # Deck orders drawn at once by a game given a random stream
+
+
+def silent_output(*args, **kwargs) -> None:
+    """Output sink used by headless games"""
 
 
 class GameManager:
-    def __init__(self, player_nbr: int) -> None:
-        # Data setup
-        self.players: list[Player] = [Bot(str(i)) for i in range(player_nbr - 1)] + [Player("Moi")]
+    def __init__(self, player_nbr: int, headless: bool = False, output: Callable | None = None, players: list[Player] | None = None,
+                 recorder=None, opponent_model=None, rng=None, listeners: list[Callable[[GameEvent], PlayerAction | None]] | None = None) -> None:
+        # Display setup (a headless game only has bots, never waits and prints nothing unless given an output)
+        self.headless: bool = headless
+        self.output: Callable = output or (silent_output if headless else print)
+        self.action_delay: float = 0 if headless else 2 # Seconds to wait after each action
+        self.listeners: list[Callable[[GameEvent], PlayerAction | None]] = list(listeners or []) # Given every event of the game (see gameEvents.notify)
+        self.recorder = recorder # Hand history recorder (see handHistory.HandHistoryRecorder), None to keep nothing
+        self.opponent_model = opponent_model # Statistics of every player (see opponentModel.OpponentModel), None to keep nothing
+        self.observers: list = [observer for observer in (recorder, opponent_model) if observer is not None] # Called at each step of a hand
+
+        # Data setup (the players can be given, e.g. to mix different kinds of bots)
+        if players is not None:
+            self.players: list[Player] = list(players)
+        elif headless:
+            self.players: list[Player] = [Bot(str(i)) for i in range(player_nbr)]
+        else:
+            self.players: list[Player] = [Bot(str(i)) for i in range(player_nbr - 1)] + [Player("Moi")]
         # self.players = [Player("A"), Player("B"), Player("C")]
-        self.active_players = self.players # The players that are still in the game (haven't folded or lost all their money)
+        if output is not None or not headless: # The view asks their actions to the plain players, the people at this terminal
+            self.listeners.append(TerminalView(self.output, pause=not headless, action_delay=self.action_delay,
+                                               players=[player for player in self.players if type(player) is Player]))
+        self.state: TableState = TableState(self.players) # Seats of the players dealt in, those that haven't folded and the bets (a copy, folding never changes self.players)
+        if opponent_model is not None:
+            for player in self.players:
+                player.opponent_model = opponent_model
         self.turns: int = 0
 
+        # Random setup (with a randomGenerator.RandomGenerator, the game only depends on its seed: each hand shuffles
+        # the deck with its own stream, and each bot decides with its own one; otherwise the global random module is used)
+        self.rng = rng
+        if rng is not None:
+            self.hands_rng = rng.stream(0) # Only draws the deck orders, so the n-th hand of a seed always has the same deck
+            self.deck_orders: list[list[int]] = []
+            for index, player in enumerate(self.players):
+                if isinstance(player, Bot):
+                    player.rng = rng.stream(index + 1)
+
         # Blinds setup
-        self.blinds_amount: list[int] = [500, 1000, 2000, 5000]
+        self.blinds_amount: list[int] = list(BLINDS_AMOUNT)
         
         # Card setup
-        self.deck: Deck = Deck()
+        self.deck: Deck = Deck(rng)
         self.table: list[Card] = [Card(2, CardSuits.HEARTS), Card(5, CardSuits.DIAMONDS), Card(12, CardSuits.SPADES)]
+        self.table_mask: int = cards_to_mask(self.table) # 52 bits mask of the cards on the table
 
 
     # Properties
+    @property
+    def active_players(self) -> tuple[Player, ...]:
+        """The players that are still in the round (haven't folded or lost all their money)"""
+        return self.state.active_players
+
+    @active_players.setter
+    def active_players(self, players: list[Player]) -> None:
+        self.state.start_hand(players)
+
     @property
     def total_bet(self) -> int:
-        return sum(player.current_bet for player in self.players)
+        return self.state.pot
     
     @property
     def highest_bet(self) -> int:
-        return max([player.current_bet for player in self.players] + [self.blinds_amount[self.current_blind_index]])
+        return max(self.state.highest, self.blinds_amount[self.current_blind_index])
 
     @property
     def current_blind_index(self) -> None:
-        return self.turns // len(self.blinds_amount)
+        return min(self.turns // len(self.blinds_amount), len(self.blinds_amount) - 1) # The last blind level is kept until the end
+
+
+    def next_deck_order(self) -> list[int]:
+        """Return the order of the cards of the next hand's deck (drawn DECK_ORDERS_CHUNK hands at a time)"""
+        if not self.deck_orders:
+            self.deck_orders = self.hands_rng.permutations(DECK_ORDERS_CHUNK).tolist()[::-1]
+        return self.deck_orders.pop()
 
 
     # Reset methods (usually start/end of a round)
@@ -46,6 +104,7 @@ class GameManager:
         """Reset the current bet of each player"""
         for player in self.players:
             player.current_bet = 0
+        self.state.reset_bets()
 
     def reset_checked_players(self) -> None:
         """Reset the checked state of each player"""
@@ -57,34 +116,63 @@ class GameManager:
         for player in self.players:
             player.all_ined = False
 
+    def eliminate_players(self) -> None:
+        """Remove the players that have no more tokens from the game"""
+        self.players = [player for player in self.players if player.total_tokens > 0]
+
     def rotate_blinds_roles(self) -> None:
         """Rotate the blinds roles among the players"""
         self.players.append(self.players.pop(0)) # Instead of rotating the blinds clockwise, we just rotate the players anticlockwise (to the right)
 
     def distribute_starting_bets(self) -> None:
         """Distribute the starting bets (small blind and big blind) according to the current blinds amount and roles"""
-        self.active_players[0].bet(int(self.blinds_amount[self.current_blind_index] / 2)) # Small blind
-        self.active_players[1].bet(int(self.blinds_amount[self.current_blind_index])) # Big blind
+        small_blind, big_blind = self.active_players[0], self.active_players[1]
+        small_blind.bet(int(self.blinds_amount[self.current_blind_index] / 2)) # Small blind
+        big_blind.bet(int(self.blinds_amount[self.current_blind_index])) # Big blind
+        self.state.add_bet(small_blind, small_blind.current_bet)
+        self.state.add_bet(big_blind, big_blind.current_bet)
 
     def put_card_on_table(self) -> None:
         """Draw a card from the deck and put it on the table (3 for the "flop"), up to 5 cards"""
-        if len(self.table) == 0:
+        cards_nbr: int = len(self.table)
+        if cards_nbr == 0:
             for _ in range(3):
-                self.table.append(self.deck.draw())
-        elif len(self.table) < 5:
-            self.table.append(self.deck.draw())
+                self.add_card_to_table(self.deck.draw())
+        elif cards_nbr < 5:
+            self.add_card_to_table(self.deck.draw())
+
+        if len(self.table) > cards_nbr:
+            for observer in self.observers:
+                observer.record_board(self.table[cards_nbr:])
+
+    def add_card_to_table(self, card: Card) -> None:
+        """Put a card on the table (the players' cached combinations are renewed since the table mask changes)"""
+        self.table.append(card)
+        self.table_mask |= 1 << card.index
+        for player in self.active_players:
+            player.see_table_card(card)
 
 
     # Player methods
     def get_players_combinations(self) -> dict[Player: tuple[CardCombinations, list[Card]]]:
-        return {player: player.get_combination(self.table) for player in self.active_players}
+        return {player: player.get_combination(self.table, self.table_mask) for player in self.active_players}
     
     def get_players_combination_power(self) -> dict[Player: int]:
-        return {player: player.get_combination_power(self.table) for player in self.active_players}
+        return {player: player.get_combination_power(self.table, self.table_mask) for player in self.active_players}
+
+    @staticmethod
+    def get_tables_combination_power(games: list["GameManager"]) -> list[dict[Player: int]]:
+        """Same as get_players_combination_power for many tables at once: every hand is evaluated in a single NumPy batch"""
+        from batchEvaluator import evaluate_masks # NumPy is only needed to settle tables in batch
+
+        masks: list[int] = [player.hand_mask | game.table_mask for game in games for player in game.active_players]
+        powers = iter(evaluate_masks(masks).tolist())
+        return [{player: next(powers) for player in game.active_players} for game in games]
 
     def process_player_action(self, player: Player, action: PlayerAction) -> None:
+        bet_before: int = player.current_bet
         if action == PlayerAction.FOLD:
-            self.active_players.remove(player)
+            self.state.fold(player)
 
         elif action == PlayerAction.CHECK:
             player.checked = True
@@ -102,19 +190,32 @@ class GameManager:
             player.all_ined = True     
             player.all_in_bet()   
 
+        elif action == PlayerAction.NONE: # No more tokens, the player waits for the end of the round
+            player.checked = True
+
+        if player.current_bet != bet_before:
+            self.state.add_bet(player, player.current_bet - bet_before)
+        for observer in self.observers:
+            observer.record_action(player, action)
+
     def players_play_turn(self) -> None:
+        self.run_events(self.iter_betting())
+
+    def iter_betting(self) -> Generator[GameEvent, PlayerAction | None, None]:
+        """Play the betting of a round up to the river (or until a single player is left), yielding its events
+        The action answering an ActionRequest can be sent back, otherwise (or if it isn't one of the possible actions)
+        the player chooses it with choose_action"""
         playing = True
         while playing:
             turn = True
             while turn:
-                # os.system("cls")
                 for player in self.players:
                     # Folded players
-                    if player not in self.active_players:
+                    if not self.state.is_active(player):
                         continue
                     
                     # If there is only one player left, he wins
-                    if len(self.active_players) == 1:
+                    if self.state.active_count == 1:
                         playing = False
                         turn = False
                         break
@@ -124,64 +225,56 @@ class GameManager:
                         turn = False
                         break
 
-                    print("--------------------------------------------------------------------------------------------------")
-                    print(colored(f"Player {player.name}", "yellow", attrs=["bold"]))
-                    print(f"The highest bet is: {self.highest_bet}")
-                    print(f"Your current bet is: {player.current_bet}")
-                    print(f"Total tokens: {player.total_tokens} tokens.\n")
-
-                    action: PlayerAction = player.choose_action(self.table, self.highest_bet)
+                    highest_bet: int = self.highest_bet
+                    possible_actions: list[PlayerAction] = player.define_possible_actions(highest_bet)
+                    action: PlayerAction | None = yield ActionRequest(player, self.table, highest_bet, self.total_bet, self.state.active_count - 1,
+                                                                      possible_actions)
+                    if action not in possible_actions: # No answer, or one that can't be played: the player chooses it
+                        action = player.choose_action(self.table, highest_bet, self.total_bet, self.state.active_count - 1)
                     self.process_player_action(player, action)
-                
-                    sleep(2)
+                    yield ActionEvent(player, action, player.current_bet)
 
             if len(self.table) == 5:
                 return
             
             # If the turn ends, we put a card on the table and reset the checked players
+            cards_nbr: int = len(self.table)
             self.put_card_on_table()
             self.reset_checked_players()
+            yield StreetEvent(self.table[cards_nbr:], list(self.table))
 
-    def define_winners(self) -> list[Player]:
-        """Define the winner of the round"""
-        # We get the player(s) with the best combinations
-        players_combinations: dict[Player: tuple[CardCombinations, list[Card]]] = self.get_players_combinations()
-        players_combinations_power: dict[str: int] = self.get_players_combination_power()
+    def define_winners(self, players_combinations_power: dict[Player: int] | None = None) -> list[Player]:
+        """Define the winner(s) of the round: the players with the highest combination power (kickers included)
+        The powers can be given when they were already computed (e.g. with get_tables_combination_power)"""
+        if players_combinations_power is None:
+            players_combinations_power = self.get_players_combination_power()
         maximum_power: int = max(players_combinations_power.values())
-        players_at_equality_power = {key: players_combinations_power[key] for key in players_combinations_power.keys() if players_combinations_power[key] == maximum_power}
-        
-        # If there is only one player with the best combination, he wins
-        if len(players_at_equality_power) == 1:
-            for equal_player in players_at_equality_power:
-                for player in players_combinations:
-                    if equal_player == player:
-                        return [player]
-        else:
-            # We get the players with the best combinations and we check cards by cards to see who has the best cards
-            players_at_equality_combinations = {key: players_combinations[key] for key in players_combinations.keys() if key in players_at_equality_power}
-            max_combination_value = max(players_at_equality_combinations.values())
-            # Collect all players with the maximum combination value
-            winners = [key for key, value in players_at_equality_combinations.items() if value == max_combination_value]
-            return winners        
+        return [player for player, power in players_combinations_power.items() if power == maximum_power]
                             
-    def process_winners(self, winners: list[Player]) -> None:
-        """Process the winnners of the round and give them the tokens"""
+    def settle_pots(self, powers: dict[Player: int] | None = None) -> dict[Player: int]:
+        """Build the main and side pots from the bets of the round, and return the tokens each player wins
+        The powers of the players at the showdown can be given when they were already computed (e.g. with get_tables_combination_power)"""
+        if len(self.active_players) == 1: # Everyone else folded, no need to compare the combinations
+            powers = {self.active_players[0]: 0}
+        elif powers is None:
+            powers = self.get_players_combination_power()
+        return settle_pots(build_pots(self.players, self.active_players), powers)
+
+    def process_winners(self, payouts: dict[Player: int]) -> list[Player]:
+        """Give the tokens of the pots to the players that won them, and return the winners"""
+        winners: list[Player] = [player for player in self.active_players if payouts.get(player, 0) > 0]
         for winner in winners:
-            print(f"Player {winner} won with a {self.get_players_combinations()[winner][0].name.replace("_", " ")} : {self.get_players_combinations()[winner][1]} !")
-            if winner.all_ined:
-                winner.total_tokens += winner.current_bet
-            else:
-                amount: int = self.total_bet // len(winners)
-                winner.total_tokens += amount
+            winner.total_tokens += payouts[winner]
 
-        input("Press Enter to continue...")
-        os.system("cls")
+        for observer in self.observers:
+            observer.end_hand(self, winners)
+        return winners
 
     # Round methods
     def distribute_starting_hands(self) -> None:
         """Draw 2 cards for each player"""
         for player in self.active_players:
-            player.hand.clear()
+            player.clear_hand()
             
         for _ in range(2):
             for player in self.active_players:
@@ -189,28 +282,92 @@ class GameManager:
     
     def round_start(self) -> None:
         """Start a new round"""
-        self.active_players: list[Player] = [player for player in self.players if player.total_tokens > 0]
-        self.deck.build_deck(shuffle=True)
+        self.state.start_hand([player for player in self.players if player.total_tokens > 0])
+        if self.rng is not None:
+            self.deck.build_deck(order=self.next_deck_order())
+        else:
+            self.deck.build_deck(shuffle=True)
         self.table.clear()
+        self.table_mask = 0
         self.distribute_starting_bets()
         self.distribute_starting_hands()
+        for observer in self.observers:
+            observer.start_hand(self)
+
+    def run_events(self, events: Generator[GameEvent, PlayerAction | dict[Player: int] | None, None]) -> None:
+        """Play the steps of a round or a game to the end, and give every event to the listeners: the actions they answer
+        are played, the other players choose theirs"""
+        listeners: list[Callable[[GameEvent], PlayerAction | None]] = self.listeners
+        answer: PlayerAction | None = None
+        while True:
+            try:
+                event: GameEvent = events.send(answer)
+            except StopIteration:
+                return
+            answer = notify(listeners, event) if listeners else None
 
     def play_round(self) -> None:
         """Play a entire round from start to finish"""
-        self.round_start()
-        self.players_play_turn()
+        self.run_events(self.iter_round())
 
-        winner: Player = self.define_winners()
-        self.process_winners(winner)
+    def iter_round(self) -> Generator[GameEvent, PlayerAction | dict[Player: int] | None, None]:
+        """Play a entire round from start to finish, yielding its events (see iter_betting for the action requests)"""
+        self.round_start()
+        yield DealEvent(self.turns, self.state.players)
+        yield from self.iter_betting()
+
+        powers: dict[Player: int] | None = None
+        if len(self.active_players) > 1: # The combination powers can be sent back for the showdown (see play_tables)
+            powers = yield ShowdownEvent(list(self.active_players), list(self.table))
+        payouts: dict[Player: int] = self.settle_pots(powers)
+        winners: list[Player] = self.process_winners(payouts)
+        yield PayoutEvent(payouts, winners, list(self.table))
         
         self.rotate_blinds_roles()
         self.reset_checked_players()
         self.reset_all_ined_players()
         self.reset_players_bet()
+        self.eliminate_players()
 
         self.turns += 1
 
-    def play(self) -> None:
+    def play(self) -> Player:
+        """Play rounds until only one player has tokens left and return the winner"""
+        self.run_events(self.iter_game())
+        return self.players[0]
+
+    def iter_game(self) -> Generator[GameEvent, PlayerAction | dict[Player: int] | None, None]:
+        """Play rounds until only one player has tokens left, yielding their events (see gameEvents.GameSession to step through it)"""
         while len(self.players) > 1:
-            self.play_round()
-        print(f"Player {self.players[0]} won the game with {self.players[0].total_tokens} tokens !")
+            yield from self.iter_round()
+        yield GameOverEvent(self.players[0])
+
+    def run_to_showdown(self, events: Generator[GameEvent, PlayerAction | dict[Player: int] | None, None],
+                        powers: dict[Player: int] | None = None) -> bool:
+        """Send the powers of the last showdown to the events of a game, and play them up to the next showdown
+        Return False once the game is over"""
+        try:
+            event: GameEvent = events.send(powers)
+            while True:
+                answer: PlayerAction | None = notify(self.listeners, event)
+                if isinstance(event, ShowdownEvent):
+                    return True
+                event = events.send(answer)
+        except StopIteration:
+            return False
+
+    @staticmethod
+    def play_tables(games: list["GameManager"]) -> None:
+        """Play many games to the end side by side: the tables waiting for a showdown are settled together, their hands
+        being evaluated in a single batch (see get_tables_combination_power)"""
+        events: dict[GameManager: Generator] = {game: game.iter_game() for game in games}
+        powers: dict[GameManager: dict[Player: int] | None] = dict.fromkeys(games)
+        while events:
+            showdowns: list[GameManager] = []
+            for game in list(events):
+                if game.run_to_showdown(events[game], powers[game]):
+                    showdowns.append(game)
+                else:
+                    del events[game]
+            if showdowns:
+                powers.update(zip(showdowns, GameManager.get_tables_combination_power(showdowns)))
@@ -0,0 +1,194 @@
+# Internal libraries
+from card import Card, RANK_MASK, cards_to_mask
+
+
+# A hand rank is a single integer: the combination category (same values as CardCombinations) in the high bits,
+# followed by up to five card values (4 bits each) ordered by importance. Comparing two ranks compares the hands.
+CATEGORY_SHIFT: int = 20
+KICKER_BITS: int = 4
+
+HIGH_CARD: int = 1
+PAIR: int = 2
+TWO_PAIR: int = 3
+THREE_OF_A_KIND: int = 4
+STRAIGHT: int = 5
+FLUSH: int = 6
+FULL_HOUSE: int = 7
+FOUR_OF_A_KIND: int = 8
+STRAIGHT_FLUSH: int = 9
+ROYAL_FLUSH: int = 10
+
+MAX_CARDS: int = 7
+
+
+def make_rank(category: int, values: list[int]) -> int:
+    """Pack a category and its ordered card values into a single comparable integer"""
+    rank: int = category
+    for i in range(5):
+        rank = (rank << KICKER_BITS) | (values[i] if i < len(values) else 0)
+    return rank
+
+def rank_category(rank: int) -> int:
+    """Return the category (CardCombinations value) of a rank"""
+    return rank >> CATEGORY_SHIFT
+
+def rank_values(rank: int) -> list[int]:
+    """Return the card values packed in a rank, from the most to the least important"""
+    values: list[int] = []
+    for shift in range(CATEGORY_SHIFT - KICKER_BITS, -1, -KICKER_BITS):
+        value: int = (rank >> shift) & 0xF
+        if value:
+            values.append(value)
+    return values
+
+
+# Tables built once at import
+def _build_straight_table() -> list[int]:
+    """For every 13 bits value mask, the highest card of the best straight it contains (0 if none)"""
+    straights: list[tuple[int, int]] = [(0x1F << (high - 6), high) for high in range(14, 5, -1)]
+    straights.append((0b1_0000_0000_1111, 5)) # A-2-3-4-5, the ace plays low
+    table: list[int] = [0] * (RANK_MASK + 1)
+    for mask in range(RANK_MASK + 1):
+        for straight_mask, high in straights:
+            if mask & straight_mask == straight_mask:
+                table[mask] = high
+                break
+    return table
+
+def _mask_values(mask: int) -> list[int]:
+    """Card values of a 13 bits mask, in descending order"""
+    return [bit + 2 for bit in range(12, -1, -1) if mask >> bit & 1]
+
+STRAIGHT_HIGH: list[int] = _build_straight_table()
+
+def _build_flush_table() -> list[int]:
+    """For every 13 bits mask of a single suit, the rank of the best flush it makes (0 if less than 5 cards)"""
+    table: list[int] = [0] * (RANK_MASK + 1)
+    for mask in range(RANK_MASK + 1):
+        if mask.bit_count() < 5:
+            continue
+        high: int = STRAIGHT_HIGH[mask]
+        if high == 14:
+            table[mask] = make_rank(ROYAL_FLUSH, [high])
+        elif high:
+            table[mask] = make_rank(STRAIGHT_FLUSH, [high])
+        else:
+            table[mask] = make_rank(FLUSH, _mask_values(mask)[:5])
+    return table
+
+FLUSH_RANKS: list[int] = _build_flush_table()
+
+# Every value is a digit in base 5 (there are at most 4 cards of a value), so summing the keys of the cards
+# gives a perfect hash of the hand's values, whatever their suits
+QUINARY_KEYS: list[int] = [0, 0] + [5 ** (value - 2) for value in range(2, 15)]
+
+def _build_quinary_mask_keys() -> list[int]:
+    """For every 13 bits mask of a single suit, the sum of the quinary keys of its cards"""
+    table: list[int] = [0] * (RANK_MASK + 1)
+    for mask in range(1, RANK_MASK + 1):
+        low_bit: int = mask & -mask
+        table[mask] = table[mask ^ low_bit] + 5 ** (low_bit.bit_length() - 1)
+    return table
+
+QUINARY_MASK_KEYS: list[int] = _build_quinary_mask_keys()
+
+def _rank_groups(mask: int, quads: tuple[int, ...], trips: tuple[int, ...], pairs: tuple[int, ...], singles: tuple[int, ...]) -> int:
+    """Rank a hand (ignoring flushes) from its card values grouped by number of occurences, in descending order"""
+    if quads:
+        kickers: list[int] = sorted(quads[1:] + trips + pairs + singles, reverse=True)
+        return make_rank(FOUR_OF_A_KIND, [quads[0]] + kickers[:1])
+    if trips and (len(trips) >= 2 or pairs):
+        return make_rank(FULL_HOUSE, [trips[0], max(trips[1:] + pairs)])
+    if STRAIGHT_HIGH[mask]:
+        return make_rank(STRAIGHT, [STRAIGHT_HIGH[mask]])
+    if trips:
+        return make_rank(THREE_OF_A_KIND, [trips[0], *singles[:2]])
+    if len(pairs) >= 2:
+        kickers = sorted(pairs[2:] + singles, reverse=True)
+        return make_rank(TWO_PAIR, [pairs[0], pairs[1]] + kickers[:1])
+    if pairs:
+        return make_rank(PAIR, [pairs[0], *singles[:3]])
+    return make_rank(HIGH_CARD, list(singles[:5]))
+
+def _fill_value_table(table: dict[int: int], value: int, remaining: int, key: int, mask: int,
+                      quads: tuple[int, ...], trips: tuple[int, ...], pairs: tuple[int, ...], singles: tuple[int, ...]) -> None:
+    """Recursively spread up to `remaining` cards over the values from `value` down to TWO, ranking every hand"""
+    if value < 2 or remaining == 0:
+        table[key] = _rank_groups(mask, quads, trips, pairs, singles)
+        return
+    bit: int = value - 2
+    _fill_value_table(table, value - 1, remaining, key, mask, quads, trips, pairs, singles)
+    _fill_value_table(table, value - 1, remaining - 1, key + 5 ** bit, mask | 1 << bit, quads, trips, pairs, singles + (value,))
+    if remaining >= 2:
+        _fill_value_table(table, value - 1, remaining - 2, key + 2 * 5 ** bit, mask | 1 << bit, quads, trips, pairs + (value,), singles)
+    if remaining >= 3:
+        _fill_value_table(table, value - 1, remaining - 3, key + 3 * 5 ** bit, mask | 1 << bit, quads, trips + (value,), pairs, singles)
+    if remaining >= 4:
+        _fill_value_table(table, value - 1, remaining - 4, key + 4 * 5 ** bit, mask | 1 << bit, quads + (value,), trips, pairs, singles)
+
+def _build_value_table() -> dict[int: int]:
+    """Rank of every possible group of up to 7 card values, indexed by the sum of their quinary keys"""
+    table: dict[int: int] = {}
+    _fill_value_table(table, 14, MAX_CARDS, 0, 0, (), (), (), ())
+    return table
+
+VALUE_RANKS: dict[int: int] = _build_value_table()
+
+
+# Evaluation
+def evaluate_suit_masks(hearts: int, diamonds: int, clubs: int, spades: int) -> int:
+    """Return the rank of the hand made of the cards of each suit (13 bits value masks)"""
+    rank: int = VALUE_RANKS[QUINARY_MASK_KEYS[hearts] + QUINARY_MASK_KEYS[diamonds] + QUINARY_MASK_KEYS[clubs] + QUINARY_MASK_KEYS[spades]]
+    return max(rank, FLUSH_RANKS[hearts], FLUSH_RANKS[diamonds], FLUSH_RANKS[clubs], FLUSH_RANKS[spades])
+
+def evaluate_mask(mask: int) -> int:
+    """Return the rank of the best hand (up to 7 cards) that can be made with the cards of a 52 bits mask"""
+    hearts: int = mask & RANK_MASK
+    diamonds: int = (mask >> 13) & RANK_MASK
+    clubs: int = (mask >> 26) & RANK_MASK
+    spades: int = mask >> 39
+    rank: int = VALUE_RANKS[QUINARY_MASK_KEYS[hearts] + QUINARY_MASK_KEYS[diamonds] + QUINARY_MASK_KEYS[clubs] + QUINARY_MASK_KEYS[spades]]
+    return max(rank, FLUSH_RANKS[hearts], FLUSH_RANKS[diamonds], FLUSH_RANKS[clubs], FLUSH_RANKS[spades])
+
+def evaluate(cards: list[Card]) -> int:
+    """Return the rank of the best hand (up to 7 cards) that can be made with the cards"""
+    return evaluate_mask(cards_to_mask(cards))
+
+
+# Incremental evaluation
+CARD_KEYS: list[int] = [5 ** (index % 13) for index in range(52)] # Quinary key of each card index
+
+class HandState:
+    """Running state of a hand that absorbs one card at a time: the quinary key holds the number of cards of each
+    value and the 52 bits mask holds the cards of each suit (hence the straight and flush masks), so adding a card
+    and ranking the hand are both a few operations whatever the number of cards already in it"""
+    __slots__ = ("key", "mask")
+
+    def __init__(self, key: int = 0, mask: int = 0) -> None:
+        self.key: int = key
+        self.mask: int = mask
+
+    @classmethod
+    def from_mask(cls, mask: int) -> "HandState":
+        """Create the state of the cards of a 52 bits mask"""
+        return cls(sum(QUINARY_MASK_KEYS[suit_mask] for suit_mask in (mask & RANK_MASK, (mask >> 13) & RANK_MASK, (mask >> 26) & RANK_MASK, mask >> 39)), mask)
+
+    def add_card(self, index: int) -> None:
+        """Add a card (by index) to the hand"""
+        self.key += CARD_KEYS[index]
+        self.mask |= 1 << index
+
+    def with_card(self, index: int) -> "HandState":
+        """Return a new state with one more card, leaving this one untouched (to share a common prefix)"""
+        return HandState(self.key + CARD_KEYS[index], self.mask | 1 << index)
+
+    @property
+    def rank(self) -> int:
+        """Rank of the best hand that can be made with the cards of the state"""
+        return self.rank_with(0, 0)
+
+    def rank_with(self, mask: int, key: int) -> int:
+        """Rank of the hand completed by other cards (given by their mask and the sum of their quinary keys)"""
+        mask |= self.mask
+        return max(VALUE_RANKS[self.key + key], FLUSH_RANKS[mask & RANK_MASK], FLUSH_RANKS[(mask >> 13) & RANK_MASK],
+                   FLUSH_RANKS[(mask >> 26) & RANK_MASK], FLUSH_RANKS[mask >> 39])
@@ -0,0 +1,203 @@
+# External libraries
+import argparse
+import gzip
+import struct
+from abc import ABC, abstractmethod
+from array import array
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, Callable, Iterator
+
+# Internal libraries
+from card import Card
+from deck import CARD_INDEXES, Deck
+from gameManager import GameManager
+from player import Player, PlayerAction
+
+# Each hand is written as one binary record: a header with its number of uint32 words and the size of the names,
+# the words (little-endian), then the names of the seats (UTF-8, separated by NUL). Streams can be gzipped, and
+# appended to by several recorders one after another (gzip members are simply concatenated).
+RECORD_HEADER: struct.Struct = struct.Struct("<IH")
+CODE_ACTIONS: list[PlayerAction] = list(PlayerAction)
+ACTION_CODES: dict[PlayerAction: int] = {action: code for code, action in enumerate(CODE_ACTIONS)}
+GZIP_MAGIC: bytes = b"\x1f\x8b"
+
+
+@dataclass
+class HandRecord:
+    hand_id: int
+    blind_level: int # Index of the blind level (in GameManager.blinds_amount)
+    seats: list[str] # Names of the players dealt in, the first two post the small and the big blind
+    stacks: list[int] # Tokens of each seat before the blinds
+    hands: list[list[int]] # Hole cards of each seat (card indexes)
+    blinds: list[int] # Tokens each seat posted as a blind (0 for the other seats)
+    board: list[int] = field(default_factory=list)
+    actions: list[int] = field(default_factory=list) # 2 ints per action: street << 8 | seat << 4 | action code, bet after the action
+    winners: list[int] = field(default_factory=list)
+    final_stacks: list[int] = field(default_factory=list) # Tokens of each seat once the pot is given
+
+    def to_bytes(self) -> bytes:
+        # Words: id, blind level, seats, stacks, final stacks, blinds, hole cards, board size, board, winners size, winners, actions
+        words: list[int] = [self.hand_id, self.blind_level, len(self.seats), *self.stacks, *self.final_stacks, *self.blinds]
+        for hand in self.hands:
+            words += hand
+        words += [len(self.board), *self.board, len(self.winners), *self.winners, *self.actions]
+        names: bytes = "\0".join(self.seats).encode()
+        return RECORD_HEADER.pack(len(words), len(names)) + array("I", words).tobytes() + names
+
+    @classmethod
+    def from_bytes(cls, data: bytes, names: bytes) -> "HandRecord":
+        """Decode the words and the names of a record (without its header)"""
+        words: array = array("I")
+        words.frombytes(data)
+        hand_id, blind_level, seats_nbr = words[:3]
+        position: int = 3 + 3 * seats_nbr
+        hands: list[list[int]] = [words[index:index + 2].tolist() for index in range(position, position + 2 * seats_nbr, 2)]
+        position += 2 * seats_nbr
+        board: list[int] = words[position + 1:position + 1 + words[position]].tolist()
+        position += 1 + len(board)
+        winners: list[int] = words[position + 1:position + 1 + words[position]].tolist()
+        position += 1 + len(winners)
+        return cls(hand_id=hand_id, blind_level=blind_level, seats=names.decode().split("\0"), stacks=words[3:3 + seats_nbr].tolist(),
+                   hands=hands, blinds=words[3 + 2 * seats_nbr:3 + 3 * seats_nbr].tolist(), board=board, actions=words[position:].tolist(),
+                   winners=winners, final_stacks=words[3 + seats_nbr:3 + 2 * seats_nbr].tolist())
+
+    def get_actions(self) -> Iterator[tuple[int, int, PlayerAction, int]]:
+        """Yield (street, seat, action, bet after the action) for every action of the hand, in order"""
+        for index in range(0, len(self.actions), 2):
+            event: int = self.actions[index]
+            yield event >> 8, event >> 4 & 0xF, CODE_ACTIONS[event & 0xF], self.actions[index + 1]
+
+
+class HandRecorder(ABC):
+    """Build a HandRecord of every hand played by the games it is given to (GameManager(recorder=...)), and pass
+    it to write_record once the hand is over (subclasses decide where it goes)"""
+    def __init__(self) -> None:
+        self.hands: int = 0
+        self.record: HandRecord | None = None
+        self.seats: dict[Player: int] = {}
+        self.street: int = 0
+
+    def __enter__(self) -> "HandRecorder":
+        return self
+
+    def __exit__(self, *exception) -> None:
+        self.close()
+
+    @abstractmethod
+    def write_record(self, record: HandRecord) -> None:
+        """Keep a finished hand"""
+
+    def close(self) -> None:
+        pass
+
+    # Hooks called by GameManager
+    def start_hand(self, game: GameManager) -> None:
+        """Once the blinds are paid and the cards dealt"""
+        players: tuple[Player, ...] = game.active_players
+        self.seats = {player: seat for seat, player in enumerate(players)}
+        self.record = HandRecord(hand_id=self.hands, blind_level=game.current_blind_index, seats=[player.name for player in players],
+                                 stacks=[player.total_tokens + player.current_bet for player in players],
+                                 hands=[[card.index for card in player.hand] for player in players],
+                                 blinds=[player.current_bet for player in players])
+        self.street = 0
+        self.hands += 1
+
+    def record_action(self, player: Player, action: PlayerAction) -> None:
+        self.record.actions += (self.street << 8 | self.seats[player] << 4 | ACTION_CODES[action], player.current_bet)
+
+    def record_board(self, cards: list[Card]) -> None:
+        """When cards are put on the table, which starts a new street"""
+        self.record.board.extend(card.index for card in cards)
+        self.street += 1
+
+    def end_hand(self, game: GameManager, winners: list[Player]) -> None:
+        """Once the pot is given to the winners"""
+        self.record.winners = [self.seats[winner] for winner in winners]
+        self.record.final_stacks = [player.total_tokens for player in self.seats]
+        self.write_record(self.record)
+        self.record = None
+
+class HandHistoryRecorder(HandRecorder):
+    """Append every hand to a hand history file"""
+    def __init__(self, path: Path | str, compress: bool | None = None, compress_level: int = 1) -> None:
+        super().__init__()
+        self.path: Path = Path(path)
+        compress = self.path.suffix == ".gz" if compress is None else compress
+        self.stream: IO[bytes] = gzip.open(self.path, "ab", compresslevel=compress_level) if compress else open(self.path, "ab")
+
+    def write_record(self, record: HandRecord) -> None:
+        self.stream.write(record.to_bytes())
+
+    def close(self) -> None:
+        self.stream.close()
+
+
+def read_hand_history(path: Path | str) -> Iterator[HandRecord]:
+    """Lazily yield the hands of a history file (compressed or not), one record at a time"""
+    with open(path, "rb") as file:
+        compressed: bool = file.read(2) == GZIP_MAGIC
+    with (gzip.open(path, "rb") if compressed else open(path, "rb")) as stream:
+        while header := stream.read(RECORD_HEADER.size):
+            words_nbr, names_size = RECORD_HEADER.unpack(header)
+            yield HandRecord.from_bytes(stream.read(4 * words_nbr), stream.read(names_size))
+
+
+# Replay
+class ReplayDeck(Deck):
+    """Deck that deals the cards of a recorded hand, in the order GameManager draws them"""
+    def __init__(self, record: HandRecord) -> None:
+        # Hole cards are dealt one at a time to each seat, twice, then the board
+        self.dealt: list[int] = [hand[round_index] for round_index in range(2) for hand in record.hands] + record.board
+        super().__init__()
+
+    def shuffle(self) -> None:
+        dealt_mask: int = sum(1 << index for index in self.dealt)
+        self.order[:] = [index for index in CARD_INDEXES if not dealt_mask >> index & 1] + self.dealt[::-1]
+        self.positions_valid = False
+
+class ReplayPlayer(Player):
+    """Player that plays the actions of a recorded seat"""
+    def __init__(self, name: str, starting_tokens: int, actions: list[PlayerAction]) -> None:
+        super().__init__(name, starting_tokens)
+        self.actions: deque[PlayerAction] = deque(actions)
+
+    def choose_action(self, table: list[Card], highest_player_bet: int, pot: int = 0, opponents_nbr: int = 1) -> PlayerAction:
+        self.define_possible_actions(highest_player_bet) # Keeps the checked state as in the recorded game
+        return self.actions.popleft()
+
+def replay_hand(record: HandRecord, output: Callable | None = None) -> GameManager:
+    """Play a recorded hand again in a headless GameManager and return the game once the hand is over"""
+    actions: list[list[PlayerAction]] = [[] for _ in record.seats]
+    for _, seat, action, _ in record.get_actions():
+        actions[seat].append(action)
+    players: list[ReplayPlayer] = [ReplayPlayer(name, stack, seat_actions) for name, stack, seat_actions in zip(record.seats, record.stacks, actions)]
+
+    game: GameManager = GameManager(len(players), headless=True, output=output, players=players)
+    game.deck = ReplayDeck(record)
+    game.turns = record.blind_level * len(game.blinds_amount)
+    game.play_round()
+    return game
+
+def replay_hand_history(path: Path | str) -> Iterator[tuple[HandRecord, GameManager]]:
+    """Lazily replay every hand of a history file"""
+    for record in read_hand_history(path):
+        yield record, replay_hand(record)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Read a hand history file, and check that every hand replays to the recorded stacks")
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--replay", action="store_true")
+    arguments = parser.parse_args()
+
+    hands: int = 0
+    mismatches: int = 0
+    for record in read_hand_history(arguments.path):
+        hands += 1
+        if arguments.replay:
+            game: GameManager = replay_hand(record)
+            stacks: dict[str: int] = {player.name: player.total_tokens for player in game.players} # Busted players are eliminated
+            mismatches += stacks != {name: stack for name, stack in zip(record.seats, record.final_stacks) if stack > 0}
+    print(f"{hands} hands" + (f" | {mismatches} replayed with different stacks" if arguments.replay else ""))
@@ -0,0 +1,206 @@
+# External libraries
+import re
+from dataclasses import dataclass
+from itertools import combinations
+from math import comb
+
+import numpy as np
+
+# Internal libraries
+from card import Card, CardSuits, cards_to_mask, suit_masks
+from batchEvaluator import FLUSH_RANKS_ARRAY, VALUE_KEYS_ARRAY, VALUE_RANKS_ARRAY
+from handEvaluator import CARD_KEYS, QUINARY_MASK_KEYS
+
+# A range gives a weight (0 to 1) to each of the 1326 two cards combos. Combos are ordered by their highest card
+# index then their lowest one, so the combo of the cards a < b is b * (b - 1) / 2 + a
+COMBOS_COUNT: int = 1326
+COMBOS: np.ndarray = np.array([(low, high) for high in range(52) for low in range(high)], dtype=np.int64)
+COMBO_MASKS: np.ndarray = (np.int64(1) << COMBOS[:, 0]) | (np.int64(1) << COMBOS[:, 1])
+CARD_COMBOS: np.ndarray = np.array([[k for k, (low, high) in enumerate(COMBOS.tolist()) if card in (low, high)] for card in range(52)], dtype=np.int64) # (52, 51)
+COMBO_CARD_POSITIONS: np.ndarray = np.array([[CARD_COMBOS[card].tolist().index(k) for card in (low, high)] for k, (low, high) in enumerate(COMBOS.tolist())], dtype=np.int64) # (1326, 2)
+
+# Combos are ranked in bulk: the values part only depends on the 91 pairs of values of the combos, the flush part on the
+# cards of the combo in the suit of the board that has at least 3 cards
+COMBO_KEYS: np.ndarray = np.array([CARD_KEYS[low] + CARD_KEYS[high] for low, high in COMBOS.tolist()], dtype=np.int64)
+UNIQUE_COMBO_KEYS, COMBO_KEY_INDEXES = np.unique(COMBO_KEYS, return_inverse=True)
+COMBO_SUIT_MASKS: np.ndarray = np.array([suit_masks(mask) for mask in COMBO_MASKS.tolist()], dtype=np.int64) # (1326, 4)
+
+VALUE_NAMES: str = "23456789TJQKA"
+SUIT_NAMES: dict[str: CardSuits] = {"h": CardSuits.HEARTS, "d": CardSuits.DIAMONDS, "c": CardSuits.CLUBS, "s": CardSuits.SPADES}
+MAX_EXACT_RUNOUTS: int = 2_000 # Above this number of runouts (preflop), runouts are sampled
+
+
+def combo_index(first: Card, second: Card) -> int:
+    """Return the index (0-1325) of the combo made of two cards"""
+    low, high = sorted((first.index, second.index))
+    return high * (high - 1) // 2 + low
+
+def hand_to_range(hand: list[Card]) -> np.ndarray:
+    """Return the range that only holds one hand"""
+    weights: np.ndarray = np.zeros(COMBOS_COUNT)
+    weights[combo_index(*hand)] = 1.0
+    return weights
+
+
+# Parsing
+def get_class_combos(high: int, low: int, kind: str) -> list[int]:
+    """Return the combos of a hand class given by its values, kind being "s" (suited), "o" (offsuit) or "" (both)"""
+    combos: list[int] = []
+    for first_suit in CardSuits:
+        for second_suit in CardSuits:
+            if high == low and list(CardSuits).index(second_suit) <= list(CardSuits).index(first_suit):
+                continue
+            suited: bool = first_suit == second_suit
+            if high == low or kind == "" or suited == (kind == "s"):
+                combos.append(combo_index(Card(high, first_suit), Card(low, second_suit)))
+    return combos
+
+def parse_token(token: str) -> list[int]:
+    """Return the combos of one element of a range (e.g. "AKs", "TT+", "A2s-A5s", "K9o+", "AhKd")"""
+    match = re.fullmatch(r"([2-9TJQKA])([hdcs])([2-9TJQKA])([hdcs])", token)
+    if match:
+        first = Card(VALUE_NAMES.index(match[1]) + 2, SUIT_NAMES[match[2]])
+        second = Card(VALUE_NAMES.index(match[3]) + 2, SUIT_NAMES[match[4]])
+        return [combo_index(first, second)]
+
+    match = re.fullmatch(r"([2-9TJQKA])([2-9TJQKA])([so]?)(\+?)(?:-([2-9TJQKA])([2-9TJQKA])([so]?))?", token)
+    if not match:
+        raise ValueError(f"Invalid range element: {token}")
+    high, low = VALUE_NAMES.index(match[1]) + 2, VALUE_NAMES.index(match[2]) + 2
+    high, low = max(high, low), min(high, low)
+    kind: str = match[3]
+    if high == low and kind:
+        raise ValueError(f"A pair can't be suited or offsuit: {token}")
+
+    if match[4]: # "TT+" goes up to AA, "A9s+" raises the lowest card up to AKs
+        classes = [(value, value) for value in range(low, 15)] if high == low else [(high, value) for value in range(low, high)]
+    elif match[5]: # "22-55" or "A2s-A5s"
+        end_high, end_low = VALUE_NAMES.index(match[5]) + 2, VALUE_NAMES.index(match[6]) + 2
+        end_high, end_low = max(end_high, end_low), min(end_high, end_low)
+        if high == low and end_high == end_low:
+            classes = [(value, value) for value in range(min(low, end_low), max(low, end_low) + 1)]
+        elif high == end_high and high != low and end_high != end_low:
+            classes = [(high, value) for value in range(min(low, end_low), max(low, end_low) + 1)]
+        else:
+            raise ValueError(f"Invalid range element: {token}")
+    else:
+        classes = [(high, low)]
+    return [combo for class_high, class_low in classes for combo in get_class_combos(class_high, class_low, kind)]
+
+def parse_range(notation: str) -> np.ndarray:
+    """Parse a range in the usual notation (e.g. "QQ+, AKs, AQo:0.5, 76s-54s, AhKd") into 1326 combo weights"""
+    weights: np.ndarray = np.zeros(COMBOS_COUNT)
+    for element in notation.replace(" ", "").split(","):
+        if not element:
+            continue
+        token, _, weight = element.partition(":")
+        weights[parse_token(token)] = float(weight) if weight else 1.0
+    return weights
+
+def remove_blocked_combos(weights: np.ndarray, blocked_mask: int) -> np.ndarray:
+    """Return the weights where every combo that uses a blocked card (on the board or dead) is removed"""
+    return np.where(COMBO_MASKS & np.int64(blocked_mask), 0.0, weights)
+
+
+# Equity
+@dataclass
+class RangeEquity:
+    equity: float # Share of the pot the first range wins on average against the second one
+    combos_equity: np.ndarray # Equity of each combo of the first range (NaN when the combo can't be dealt)
+    runouts: int # Number of runouts evaluated (enumerated or sampled)
+
+def rank_combos(board_masks: np.ndarray) -> np.ndarray:
+    """Return the rank of every combo (1326 columns) on every complete board (one row per 5 cards mask)"""
+    board_suits: np.ndarray = np.stack([(board_masks >> (13 * suit)) & 0x1FFF for suit in range(4)], axis=1)
+    board_keys: np.ndarray = np.array(QUINARY_MASK_KEYS, dtype=np.int64)[board_suits].sum(axis=1)
+
+    keys: np.ndarray = board_keys[:, None] + UNIQUE_COMBO_KEYS[None, :]
+    positions: np.ndarray = np.minimum(np.searchsorted(VALUE_KEYS_ARRAY, keys), len(VALUE_KEYS_ARRAY) - 1) # Impossible hands (5 cards of a value) are blocked anyway
+    ranks: np.ndarray = VALUE_RANKS_ARRAY[positions][:, COMBO_KEY_INDEXES]
+
+    # A flush needs at least 3 cards of a suit on the board, and only one suit can have them
+    flush_suits: np.ndarray = np.argmax(np.bitwise_count(board_suits.astype(np.uint64)), axis=1)
+    flush_boards: np.ndarray = board_suits[np.arange(len(board_masks)), flush_suits]
+    flush_ranks: np.ndarray = FLUSH_RANKS_ARRAY[flush_boards[:, None] | COMBO_SUIT_MASKS[:, flush_suits].T]
+    return np.maximum(ranks, flush_ranks)
+
+def rank_shares(ranks: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """For every element, sum the weights of the elements of its row (last axis) with a lower rank, plus half the
+    weights of the elements with an equal rank (itself included): the pot share it wins against the row"""
+    row_size: int = ranks.shape[-1]
+    row_offsets: np.ndarray = (np.arange(ranks.size // row_size) * row_size).reshape(ranks.shape[:-1] + (1,))
+    order: np.ndarray = (np.argsort(ranks, axis=-1) + row_offsets).ravel()
+    sorted_ranks: np.ndarray = ranks.ravel()[order].reshape(ranks.shape)
+    sorted_weights: np.ndarray = weights.ravel()[order].reshape(ranks.shape)
+    inclusive: np.ndarray = np.cumsum(sorted_weights, axis=-1)
+    exclusive: np.ndarray = inclusive - sorted_weights
+
+    # Elements of equal rank share the exclusive sum of the first element of their group and the inclusive sum of
+    # the last one. Both sums never decrease along a row, so running max / min carry them over the group
+    group_starts: np.ndarray = np.ones(ranks.shape, dtype=bool)
+    group_starts[..., 1:] = sorted_ranks[..., 1:] != sorted_ranks[..., :-1]
+    group_ends: np.ndarray = np.ones(ranks.shape, dtype=bool)
+    group_ends[..., :-1] = group_starts[..., 1:]
+    below: np.ndarray = np.maximum.accumulate(np.where(group_starts, exclusive, 0), axis=-1)
+    at_most: np.ndarray = np.flip(np.minimum.accumulate(np.flip(np.where(group_ends, inclusive, np.inf), axis=-1), axis=-1), axis=-1)
+
+    shares: np.ndarray = np.empty(ranks.size, dtype=weights.dtype)
+    shares[order] = ((below + at_most) / 2).ravel()
+    return shares.reshape(ranks.shape)
+
+def evaluate_runouts(board_masks: np.ndarray, hero: np.ndarray, villain: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Return, summed over the given boards, each hero combo's weighted share of the pot and weight of the villain combos it faces"""
+    # Single precision is enough within a runout, the sums over the runouts are done in double precision
+    ranks: np.ndarray = rank_combos(board_masks).astype(np.int32)
+    playable: np.ndarray = (COMBO_MASKS[None, :] & board_masks[:, None]) == 0
+    villain_weights: np.ndarray = np.where(playable, villain[None, :], 0.0).astype(np.float32)
+    hero_weights: np.ndarray = np.where(playable, hero[None, :], 0.0)
+
+    # Share won against every villain combo of the runout...
+    shares: np.ndarray = rank_shares(ranks, villain_weights)
+    faced: np.ndarray = villain_weights.sum(axis=1, keepdims=True) + villain_weights # The hero combo is removed twice below
+
+    # ...minus the villain combos that share a card with the hero combo (card removal). Each combo appears in the
+    # list of combos of both its cards, at the positions given by COMBO_CARD_POSITIONS
+    card_weights: np.ndarray = villain_weights[:, CARD_COMBOS]
+    card_shares: np.ndarray = rank_shares(ranks[:, CARD_COMBOS], card_weights)
+    card_totals: np.ndarray = card_weights.sum(axis=2)
+    for column in (0, 1):
+        cards, positions = COMBOS[:, column], COMBO_CARD_POSITIONS[:, column]
+        shares -= card_shares[:, cards, positions]
+        faced -= card_totals[:, cards]
+    shares += villain_weights / 2 # The hero combo ties with itself in both lists
+
+    return (hero_weights * shares).sum(axis=0), (hero_weights * faced).sum(axis=0)
+
+def range_vs_range_equity(hero: np.ndarray, villain: np.ndarray, board: list[Card] | None = None, dead: list[Card] | None = None,
+                          samples: int = 2_000, seed: int | None = None, chunk_size: int = 64) -> RangeEquity:
+    """Calculate the equity of a range (or a single hand, see hand_to_range) against another range on a board
+
+    Every runout of the board is enumerated when there are at most MAX_EXACT_RUNOUTS of them (flop, turn, river),
+    otherwise `samples` random runouts are used."""
+    board = board or []
+    board_mask: int = cards_to_mask(board)
+    blocked_mask: int = board_mask | cards_to_mask(dead or [])
+    hero = remove_blocked_combos(hero, blocked_mask)
+    villain = remove_blocked_combos(villain, blocked_mask)
+
+    remaining: list[int] = [index for index in range(52) if not blocked_mask >> index & 1]
+    missing: int = 5 - len(board)
+    if comb(len(remaining), missing) <= MAX_EXACT_RUNOUTS:
+        runouts: np.ndarray = np.array([board_mask | sum(1 << index for index in runout) for runout in combinations(remaining, missing)], dtype=np.int64)
+    else:
+        rng = np.random.default_rng(seed)
+        dealt: np.ndarray = rng.permuted(np.tile(np.array(remaining, dtype=np.int64), (samples, 1)), axis=1)[:, :missing]
+        runouts = np.bitwise_or.reduce(np.int64(1) << dealt, axis=1) | np.int64(board_mask)
+
+    shares: np.ndarray = np.zeros(COMBOS_COUNT)
+    faced: np.ndarray = np.zeros(COMBOS_COUNT)
+    for start in range(0, len(runouts), chunk_size):
+        chunk_shares, chunk_faced = evaluate_runouts(runouts[start:start + chunk_size], hero, villain)
+        shares += chunk_shares
+        faced += chunk_faced
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        combos_equity: np.ndarray = shares / faced
+    return RangeEquity(equity=float(shares.sum() / faced.sum()), combos_equity=combos_equity, runouts=len(runouts))
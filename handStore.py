@@ -0,0 +1,234 @@
+# External libraries
+import argparse
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO
+
+import numpy as np
+
+# Internal libraries
+from handHistory import CODE_ACTIONS, HandRecord, HandRecorder, read_hand_history
+from player import PlayerAction
+
+# A store is a directory with one raw little-endian file per column, and meta.json (version and player names).
+# Hand columns have one row per hand, seat columns one row per player dealt in: the rows of a hand are
+# first_row[hand]:first_row[hand] + seats[hand]. Every column is opened with numpy.memmap, nothing is parsed.
+STORE_VERSION: int = 1
+STREETS: int = 4
+MAX_STREET_ACTIONS: int = 4 # Actions kept per player and street, the following ones are dropped
+NO_CARD: int = 0xFF
+NO_ACTION: int = 0xFF
+HAND_COLUMNS: dict[str: tuple[str, tuple[int, ...]]] = {
+    "hand_id": ("<u8", ()),
+    "blind_level": ("u1", ()),
+    "board": ("u1", (5,)), # NO_CARD when the hand ended before
+    "pot": ("<u4", ()),
+    "first_row": ("<u8", ()), # Offset of the first seat row of the hand
+    "seats": ("u1", ()),
+}
+SEAT_COLUMNS: dict[str: tuple[str, tuple[int, ...]]] = {
+    "hand": ("<u8", ()), # Row of the hand in the hand columns
+    "player": ("<u4", ()), # Index of the player's name in meta.json
+    "seat": ("u1", ()),
+    "cards": ("u1", (2,)),
+    "actions": ("u1", (STREETS, MAX_STREET_ACTIONS)), # Action codes (handHistory.CODE_ACTIONS), NO_ACTION after the last one
+    "invested": ("<u4", ()), # Tokens put in the pot
+    "winnings": ("<i4", ()), # Tokens won (or lost if negative) during the hand
+    # Derived from the actions when the hand is written, so that the statistics only read a few bytes per row
+    "flags": ("u1", ()), # See the *_FLAG constants
+    "aggressive_actions": ("u1", ()), # Raises and all ins after the flop
+    "calls": ("u1", ()), # Calls after the flop
+}
+VOLUNTARY_FLAG: int = 1 # Called or raised preflop
+PREFLOP_RAISE_FLAG: int = 2 # Raised or went all in preflop
+SHOWDOWN_FLAG: int = 4 # Still in the hand at the showdown
+WON_FLAG: int = 8
+FLAGS_NBR: int = 16
+
+VOLUNTARY_CODES: set[int] = {CODE_ACTIONS.index(action) for action in (PlayerAction.CALL, PlayerAction.RAISE, PlayerAction.ALL_IN)}
+AGGRESSIVE_CODES: set[int] = {CODE_ACTIONS.index(action) for action in (PlayerAction.RAISE, PlayerAction.ALL_IN)}
+CALL_CODE: int = CODE_ACTIONS.index(PlayerAction.CALL)
+
+
+class HandStoreWriter(HandRecorder):
+    """Append hands to a store, either as a GameManager recorder or from records (e.g. of a hand history file)
+
+    Rows are buffered and written every `flush_hands` hands, seat columns before hand columns."""
+    def __init__(self, path: Path | str, flush_hands: int = 10_000) -> None:
+        super().__init__()
+        self.path: Path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.flush_hands: int = flush_hands
+        self.players: list[str] = read_meta(self.path)["players"] if (self.path / "meta.json").exists() else []
+        self.player_indexes: dict[str: int] = {name: index for index, name in enumerate(self.players)}
+        self.files: dict[str: IO[bytes]] = {name: open(self.path / f"{name}.bin", "ab") for name in HAND_COLUMNS | SEAT_COLUMNS}
+        self.stored_hands: int = self.files["first_row"].tell() // 8
+        self.stored_rows: int = self.files["hand"].tell() // 8
+        self.buffers: dict[str: list] = {name: [] for name in HAND_COLUMNS | SEAT_COLUMNS}
+
+    def write_record(self, record: HandRecord) -> None:
+        buffers: dict[str: list] = self.buffers
+        seats_nbr: int = len(record.seats)
+        hand: int = self.stored_hands + len(buffers["hand_id"])
+        actions: list[list[list[int]]] = [[[] for _ in range(STREETS)] for _ in range(seats_nbr)]
+        last_bets: list[int] = [0] * seats_nbr
+        folded: list[bool] = [False] * seats_nbr
+        for street, seat, action, bet in record.get_actions():
+            actions[seat][street].append(CODE_ACTIONS.index(action))
+            last_bets[seat] = bet
+            folded[seat] = folded[seat] or action == PlayerAction.FOLD
+        showdown: bool = folded.count(False) > 1
+        winners: set[int] = set(record.winners)
+
+        pot: int = 0
+        for seat, name in enumerate(record.seats):
+            if name not in self.player_indexes:
+                self.player_indexes[name] = len(self.players)
+                self.players.append(name)
+            invested: int = max(last_bets[seat], record.blinds[seat]) # Bets are counted over the whole hand, a blind may never be followed by an action
+            pot += invested
+            preflop_actions: list[int] = actions[seat][0]
+            postflop_actions: list[int] = [code for street_actions in actions[seat][1:] for code in street_actions]
+            flags: int = (VOLUNTARY_FLAG * any(code in VOLUNTARY_CODES for code in preflop_actions)
+                          | PREFLOP_RAISE_FLAG * any(code in AGGRESSIVE_CODES for code in preflop_actions)
+                          | SHOWDOWN_FLAG * (showdown and not folded[seat]) | WON_FLAG * (seat in winners))
+            buffers["hand"].append(hand)
+            buffers["player"].append(self.player_indexes[name])
+            buffers["seat"].append(seat)
+            buffers["cards"].append(record.hands[seat])
+            buffers["actions"].append([(street_actions + [NO_ACTION] * MAX_STREET_ACTIONS)[:MAX_STREET_ACTIONS] for street_actions in actions[seat]])
+            buffers["invested"].append(invested)
+            buffers["winnings"].append(record.final_stacks[seat] - record.stacks[seat])
+            buffers["flags"].append(flags)
+            buffers["aggressive_actions"].append(sum(code in AGGRESSIVE_CODES for code in postflop_actions))
+            buffers["calls"].append(postflop_actions.count(CALL_CODE))
+
+        buffers["hand_id"].append(record.hand_id)
+        buffers["blind_level"].append(record.blind_level)
+        buffers["board"].append((record.board + [NO_CARD] * 5)[:5])
+        buffers["pot"].append(pot)
+        buffers["first_row"].append(self.stored_rows + len(buffers["hand"]) - seats_nbr)
+        buffers["seats"].append(seats_nbr)
+        if len(buffers["hand_id"]) >= self.flush_hands:
+            self.flush()
+
+    def flush(self) -> None:
+        for name, (dtype, _) in list(SEAT_COLUMNS.items()) + list(HAND_COLUMNS.items()):
+            np.array(self.buffers[name], dtype=dtype).tofile(self.files[name])
+            self.files[name].flush()
+        self.stored_hands += len(self.buffers["hand_id"])
+        self.stored_rows += len(self.buffers["hand"])
+        self.buffers = {name: [] for name in self.buffers}
+        (self.path / "meta.json").write_text(json.dumps({"version": STORE_VERSION, "players": self.players}))
+
+    def close(self) -> None:
+        self.flush()
+        for file in self.files.values():
+            file.close()
+
+def read_meta(path: Path) -> dict:
+    meta: dict = json.loads((path / "meta.json").read_text())
+    if meta["version"] != STORE_VERSION:
+        raise ValueError(f"{path} is not a version {STORE_VERSION} hand store")
+    return meta
+
+
+@dataclass
+class PlayerStats:
+    hands: int = 0
+    voluntary_hands: int = 0 # Hands where the player called or raised preflop
+    preflop_raises: int = 0 # Hands where the player raised (or went all in) preflop
+    aggressive_actions: int = 0 # Raises and all ins after the flop
+    calls: int = 0 # Calls after the flop
+    showdowns: int = 0
+    showdowns_won: int = 0
+    winnings: int = 0
+
+    @property
+    def vpip(self) -> float:
+        """Voluntarily put money in pot: share of the hands where the player paid to see the flop"""
+        return self.voluntary_hands / max(self.hands, 1)
+
+    @property
+    def pfr(self) -> float:
+        """Preflop raise: share of the hands where the player raised preflop"""
+        return self.preflop_raises / max(self.hands, 1)
+
+    @property
+    def aggression_factor(self) -> float:
+        """Raises per call after the flop"""
+        return self.aggressive_actions / max(self.calls, 1)
+
+    @property
+    def showdown_win_rate(self) -> float:
+        return self.showdowns_won / max(self.showdowns, 1)
+
+
+class HandStore:
+    """Read only view of a store, every column is a numpy.memmap (the store can still be appended to)"""
+    def __init__(self, path: Path | str) -> None:
+        self.path: Path = Path(path)
+        self.players: list[str] = read_meta(self.path)["players"]
+        self.columns: dict[str: np.ndarray] = {name: open_column(self.path / f"{name}.bin", dtype, shape)
+                                               for name, (dtype, shape) in (HAND_COLUMNS | SEAT_COLUMNS).items()}
+
+    def __len__(self) -> int:
+        return len(self.columns["first_row"])
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def get_hand_rows(self, hand: int) -> slice:
+        """Return the slice of the seat rows of a hand"""
+        first_row: int = int(self.columns["first_row"][hand])
+        return slice(first_row, first_row + int(self.columns["seats"][hand]))
+
+    def player_stats(self, chunk_rows: int = 8_000_000) -> dict[str: PlayerStats]:
+        """Aggregate the statistics of every player, reading the seat columns by chunks to bound the memory used"""
+        players_nbr: int = len(self.players)
+        flag_counts: np.ndarray = np.zeros((players_nbr, FLAGS_NBR), dtype=np.int64) # Hands of each player with each set of flags
+        sums: np.ndarray = np.zeros((3, players_nbr)) # Aggressive actions, calls, winnings (exact in float64 below 2**53)
+        rows_nbr: int = min(len(self.columns[name]) for name in SEAT_COLUMNS) # A writer may be between two columns
+        for start in range(0, rows_nbr, chunk_rows):
+            rows: slice = slice(start, min(start + chunk_rows, rows_nbr))
+            players: np.ndarray = self.columns["player"][rows].astype(np.int64)
+            flag_counts += np.bincount(players * FLAGS_NBR + self.columns["flags"][rows], minlength=players_nbr * FLAGS_NBR).reshape(players_nbr, FLAGS_NBR)
+            for index, name in enumerate(("aggressive_actions", "calls", "winnings")):
+                sums[index] += np.bincount(players, weights=self.columns[name][rows], minlength=players_nbr)
+
+        flags: np.ndarray = np.arange(FLAGS_NBR)
+        def count(flag: int, player: int) -> int:
+            return int(flag_counts[player, flags & flag == flag].sum())
+        return {name: PlayerStats(hands=int(flag_counts[player].sum()), voluntary_hands=count(VOLUNTARY_FLAG, player),
+                                  preflop_raises=count(PREFLOP_RAISE_FLAG, player), aggressive_actions=int(sums[0, player]),
+                                  calls=int(sums[1, player]), showdowns=count(SHOWDOWN_FLAG, player),
+                                  showdowns_won=count(SHOWDOWN_FLAG | WON_FLAG, player), winnings=int(sums[2, player]))
+                for player, name in enumerate(self.players)}
+
+def open_column(path: Path, dtype: str, shape: tuple[int, ...]) -> np.ndarray:
+    """Map a column file without reading it (an empty file gives an empty array, numpy.memmap refuses them)"""
+    row_size: int = np.dtype(dtype).itemsize * int(np.prod(shape))
+    rows: int = path.stat().st_size // row_size if path.exists() else 0
+    if rows == 0:
+        return np.zeros((0,) + shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=(rows,) + shape)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print the statistics of every player of a hand store")
+    parser.add_argument("store", type=Path)
+    parser.add_argument("--import-history", type=Path, help="hand history file (see handHistory) to add to the store first")
+    arguments = parser.parse_args()
+
+    if arguments.import_history is not None:
+        with HandStoreWriter(arguments.store) as writer:
+            for record in read_hand_history(arguments.import_history):
+                writer.write_record(record)
+
+    store: HandStore = HandStore(arguments.store)
+    print(f"{len(store)} hands | {len(store['player'])} seats")
+    print(f"{'Player':>8} {'Hands':>10} {'VPIP':>7} {'PFR':>7} {'AF':>6} {'WSD':>7} {'Winnings':>12}")
+    for name, stats in sorted(store.player_stats().items(), key=lambda item: (len(item[0]), item[0])):
+        print(f"{name:>8} {stats.hands:>10} {stats.vpip:>7.1%} {stats.pfr:>7.1%} {stats.aggression_factor:>6.2f} "
+              f"{stats.showdown_win_rate:>7.1%} {stats.winnings:>12}")
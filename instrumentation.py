@@ -0,0 +1,267 @@
+# External libraries
+import argparse
+import cProfile
+import inspect
+import io
+import json
+import pstats
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from time import perf_counter_ns
+from typing import Callable, Generator, Iterator
+
+# Internal libraries
+from combinationHandler import CombinationHandler
+from gameManager import GameManager
+from playerBot import Bot
+
+HISTOGRAM_BUCKETS: int = 40 # Bucket n counts the calls that took [2^(n-1), 2^n[ nanoseconds, the last one everything slower
+HAND_BOUNDARY: str = "GameManager.round_start" # A new hand starts with each call of this label
+DECISION_LABEL: str = "Bot.choose_action" # Time of the players, not counted in the steps of the rounds that ask for their decisions
+
+
+class TimingHistogram:
+    """Number of calls, total time and log2 histogram of the durations of an instrumented function"""
+    __slots__ = ("count", "total", "buckets")
+
+    def __init__(self) -> None:
+        self.count: int = 0
+        self.total: int = 0 # Nanoseconds
+        self.buckets: list[int] = [0] * HISTOGRAM_BUCKETS
+
+    def add(self, elapsed: int) -> None:
+        self.count += 1
+        self.total += elapsed
+        self.buckets[min(elapsed.bit_length(), HISTOGRAM_BUCKETS - 1)] += 1
+
+    def percentile(self, share: float) -> int:
+        """Return the upper bound (in nanoseconds) of the bucket holding the given share of the calls"""
+        target: float = share * self.count
+        seen: int = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= target:
+                return 1 << bucket
+        return 0
+
+    def to_dict(self) -> dict:
+        return {"count": self.count, "total_ms": self.total / 1e6, "mean_us": self.total / max(self.count, 1) / 1e3,
+                "p50_us": self.percentile(0.5) / 1e3, "p99_us": self.percentile(0.99) / 1e3,
+                "histogram": {f"<{(1 << bucket) / 1e3:g}us": count for bucket, count in enumerate(self.buckets) if count}}
+
+
+class TimedSteps:
+    """Proxy of a generator (e.g. the steps of a round) that adds up the time of its steps, without the decisions
+    of the bots made during them (they have their own histogram) nor the time spent by its consumer
+
+    It has the send, throw and close methods of a generator, so `yield from` delegates all of them to the wrapped one."""
+    __slots__ = ("steps", "instrumentation", "elapsed")
+
+    def __init__(self, steps: Generator, instrumentation: "Instrumentation") -> None:
+        self.steps: Generator = steps
+        self.instrumentation: Instrumentation = instrumentation
+        self.elapsed: int = 0 # Nanoseconds
+
+    def __iter__(self) -> "TimedSteps":
+        return self
+
+    def __next__(self):
+        return self.send(None)
+
+    def send(self, value):
+        return self.step(self.steps.send, value)
+
+    def throw(self, *exception):
+        return self.step(self.steps.throw, *exception)
+
+    def close(self) -> None:
+        self.steps.close()
+
+    def step(self, method: Callable, *args):
+        decisions_time: int = self.instrumentation.decisions_time
+        start: int = perf_counter_ns()
+        try:
+            return method(*args)
+        finally:
+            self.elapsed += perf_counter_ns() - start - (self.instrumentation.decisions_time - decisions_time)
+
+
+class Instrumentation:
+    """Count and time the calls of the hot functions of the game, in this process, while it is enabled
+
+    Enabling it replaces the functions by timed wrappers on their classes (every Bot subclass defining choose_action
+    at that time included), and disabling it puts them back, so a disabled instrumentation costs nothing. Only one
+    can be enabled at a time. With per_hand, the calls and time of each label are also kept for every hand."""
+    active: "Instrumentation | None" = None
+
+    def __init__(self, per_hand: bool = False) -> None:
+        self.per_hand: bool = per_hand
+        self.timings: dict[str: TimingHistogram] = {}
+        self.hands: list[dict[str: tuple[int, int]]] = [] # Per hand: label -> (calls, nanoseconds)
+        self.hand_start: dict[str: tuple[int, int]] = {} # Calls and time of each label when the current hand started
+        self.patched: list[tuple[type, str, Callable]] = []
+        self.decisions_time: int = 0 # Nanoseconds spent in DECISION_LABEL calls, see TimedSteps
+        self.decisions_depth: int = 0 # A decision calling the choose_action of its parent class is only counted once
+
+    def __enter__(self) -> "Instrumentation":
+        self.enable()
+        return self
+
+    def __exit__(self, *exception) -> None:
+        self.disable()
+
+    def get_targets(self) -> list[tuple[type, str, str]]:
+        """Return the (class, function name, label) of every function to instrument"""
+        targets: list[tuple[type, str, str]] = [(CombinationHandler, "get_final_combination", "CombinationHandler.get_final_combination"),
+                                                (GameManager, "process_player_action", "GameManager.process_player_action"),
+                                                (GameManager, "define_winners", "GameManager.define_winners"),
+                                                (GameManager, "settle_pots", "GameManager.settle_pots"),
+                                                (GameManager, "round_start", "GameManager.round_start"),
+                                                (GameManager, "iter_round", "GameManager.iter_round")]
+        bot_classes: list[type] = [Bot]
+        for bot_class in bot_classes:
+            bot_classes += bot_class.__subclasses__()
+            if "choose_action" in bot_class.__dict__:
+                targets.append((bot_class, "choose_action", DECISION_LABEL))
+        return targets
+
+    def enable(self) -> None:
+        if Instrumentation.active is not None:
+            raise RuntimeError("An instrumentation is already enabled")
+        Instrumentation.active = self
+        for owner, name, label in self.get_targets():
+            function: Callable = owner.__dict__[name]
+            setattr(owner, name, self.wrap(function, label))
+            self.patched.append((owner, name, function))
+
+    def disable(self) -> None:
+        for owner, name, function in reversed(self.patched):
+            setattr(owner, name, function)
+        self.patched.clear()
+        if Instrumentation.active is self:
+            Instrumentation.active = None
+        if self.per_hand:
+            self.end_hand()
+
+    def wrap(self, function: Callable, label: str) -> Callable:
+        histogram: TimingHistogram = self.timings.setdefault(label, TimingHistogram())
+        new_hand: Callable | None = self.end_hand if self.per_hand and label == HAND_BOUNDARY else None
+        decision: bool = label == DECISION_LABEL
+
+        def timed(*args, **kwargs):
+            if new_hand is not None:
+                new_hand()
+            start: int = perf_counter_ns()
+            self.decisions_depth += decision
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed: int = perf_counter_ns() - start
+                if not decision:
+                    histogram.add(elapsed)
+                else: # A decision calling the one of its parent class (super().choose_action) is counted once
+                    self.decisions_depth -= 1
+                    if not self.decisions_depth:
+                        histogram.add(elapsed)
+                        self.decisions_time += elapsed
+
+        def timed_steps(*args, **kwargs):
+            """Same for a generator: the time of all its steps (see TimedSteps)"""
+            steps: TimedSteps = TimedSteps(function(*args, **kwargs), self)
+            try:
+                return (yield from steps)
+            finally:
+                histogram.add(steps.elapsed)
+
+        if inspect.isgeneratorfunction(function):
+            timed = timed_steps
+        timed.__wrapped__ = function
+        timed.__name__ = function.__name__
+        return timed
+
+    def end_hand(self) -> None:
+        """Keep the calls and time of each label since the last hand started"""
+        hand: dict[str: tuple[int, int]] = {}
+        for label, histogram in self.timings.items():
+            calls, elapsed = self.hand_start.get(label, (0, 0))
+            if histogram.count > calls:
+                hand[label] = (histogram.count - calls, histogram.total - elapsed)
+            self.hand_start[label] = (histogram.count, histogram.total)
+        if hand:
+            self.hands.append(hand)
+
+    # Reports
+    def report(self) -> dict:
+        """Return the statistics of the session (and of each hand with per_hand), ready to be saved as JSON"""
+        report: dict = {"timings": {label: histogram.to_dict() for label, histogram in self.timings.items() if histogram.count}}
+        if self.per_hand:
+            report["hands"] = [{label: {"count": calls, "total_us": elapsed / 1e3} for label, (calls, elapsed) in hand.items()} for hand in self.hands]
+        return report
+
+    def format_report(self) -> str:
+        lines: list[str] = [f"{'Function':<40} {'Calls':>10} {'Total ms':>10} {'Mean us':>9} {'p50 us':>9} {'p99 us':>9}"]
+        for label, histogram in sorted(self.timings.items(), key=lambda item: -item[1].total):
+            if histogram.count:
+                timing: dict = histogram.to_dict()
+                lines.append(f"{label:<40} {timing['count']:>10} {timing['total_ms']:>10.1f} {timing['mean_us']:>9.2f} {timing['p50_us']:>9.2f} {timing['p99_us']:>9.2f}")
+        return "\n".join(lines)
+
+
+# Profiling
+@dataclass
+class ProfileReport:
+    profile: str = "" # Functions with the highest cumulative time (cProfile)
+    allocations: list[str] = field(default_factory=list) # Lines that allocated the most memory still used at the end (tracemalloc)
+
+@contextmanager
+def profiled(top: int = 20, profile: bool = True, trace_memory: bool = False) -> Iterator[ProfileReport]:
+    """Run the body of the with statement under cProfile and/or tracemalloc, the report being filled at its end"""
+    report: ProfileReport = ProfileReport()
+    profiler: cProfile.Profile | None = cProfile.Profile() if profile else None
+    if trace_memory:
+        tracemalloc.start()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield report
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        if trace_memory: # Before formatting the profile, whose allocations would be traced
+            snapshot: tracemalloc.Snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            report.allocations = [str(statistic) for statistic in snapshot.statistics("lineno")[:top]]
+        if profiler is not None:
+            stream: io.StringIO = io.StringIO()
+            pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(top)
+            report.profile = stream.getvalue()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play headless games of bots with the instrumentation enabled and print where the time goes")
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--players", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--per-hand", action="store_true", help="also keep the statistics of every hand (in the JSON report)")
+    parser.add_argument("--profile", action="store_true", help="also run the games under cProfile")
+    parser.add_argument("--memory", action="store_true", help="also trace the memory allocations")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--output", type=Path, default=None, help="save the report as JSON")
+    arguments = parser.parse_args()
+
+    from randomGenerator import RandomGenerator
+
+    with Instrumentation(per_hand=arguments.per_hand) as instrumentation, \
+         profiled(arguments.top, arguments.profile, arguments.memory) as profile_report:
+        for seed in RandomGenerator(arguments.seed).seeds(arguments.games):
+            GameManager(arguments.players, headless=True, rng=RandomGenerator(seed)).play()
+    print(instrumentation.format_report())
+    if profile_report.profile:
+        print(profile_report.profile)
+    if profile_report.allocations:
+        print("Top allocations:\n" + "\n".join(profile_report.allocations))
+    if arguments.output is not None:
+        arguments.output.write_text(json.dumps(instrumentation.report() | {"profile": profile_report.profile,
+                                                                            "allocations": profile_report.allocations}, indent=2))
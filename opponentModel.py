@@ -0,0 +1,106 @@
+# Internal libraries
+from card import Card
+from handEvaluator import rank_category
+from player import Player, PlayerAction
+
+VOLUNTARY_ACTIONS: tuple[PlayerAction, ...] = (PlayerAction.CALL, PlayerAction.RAISE, PlayerAction.ALL_IN)
+AGGRESSIVE_ACTIONS: tuple[PlayerAction, ...] = (PlayerAction.RAISE, PlayerAction.ALL_IN)
+VOLUNTARY_FLAG: int = 1 # Called or raised preflop during the current hand
+RAISED_FLAG: int = 2 # Raised preflop during the current hand
+
+
+class OpponentStats:
+    """Counters of what a player did since the model first saw it (a fixed number of integers whatever the number of hands)"""
+    __slots__ = ("hands", "voluntary_hands", "preflop_raises", "raises_faced", "folds_to_raise", "showdowns", "showdown_strength_sum")
+
+    def __init__(self) -> None:
+        self.hands: int = 0
+        self.voluntary_hands: int = 0 # Hands where the player called or raised preflop
+        self.preflop_raises: int = 0 # Hands where the player raised (or went all in) preflop
+        self.raises_faced: int = 0 # Decisions taken after a raise of another player in the same street
+        self.folds_to_raise: int = 0
+        self.showdowns: int = 0
+        self.showdown_strength_sum: int = 0 # Sum of the CardCombinations values shown at showdown
+
+    def __repr__(self) -> str:
+        return (f"OpponentStats(hands={self.hands}, vpip={self.vpip:.2f}, pfr={self.pfr:.2f}, "
+                f"fold_to_raise={self.fold_to_raise:.2f}, showdown_strength={self.showdown_strength:.2f})")
+
+    @property
+    def vpip(self) -> float:
+        """Share of the hands where the player paid to see the flop"""
+        return self.voluntary_hands / max(self.hands, 1)
+
+    @property
+    def pfr(self) -> float:
+        """Share of the hands where the player raised preflop"""
+        return self.preflop_raises / max(self.hands, 1)
+
+    @property
+    def fold_to_raise(self) -> float:
+        return self.folds_to_raise / max(self.raises_faced, 1)
+
+    @property
+    def showdown_strength(self) -> float:
+        """Average CardCombinations value shown at showdown (0 before the first showdown)"""
+        return self.showdown_strength_sum / max(self.showdowns, 1)
+
+
+class OpponentModel:
+    """Fold every action of the games it is given to (GameManager(opponent_model=...)) into per player counters
+
+    Every update is O(1). Besides the counters, only the state of the current hand is kept (a flag per player
+    dealt in), so the memory used doesn't grow with the number of hands. Players read it from choose_action
+    through their opponent_model attribute."""
+    def __init__(self) -> None:
+        self.stats: dict[str: OpponentStats] = {}
+        self.hand_flags: dict[Player: int] = {} # Players dealt in the current hand -> VOLUNTARY_FLAG | RAISED_FLAG
+        self.street_raiser: Player | None = None # Last player that raised in the current street
+        self.preflop: bool = True
+
+    def get(self, name: str) -> OpponentStats:
+        """Return the counters of a player (empty ones for a player never seen)"""
+        return self.stats.get(name) or OpponentStats()
+
+    def get_opponents(self, player: Player) -> list[OpponentStats]:
+        """Return the counters of the other players dealt in the current hand"""
+        return [self.get(other.name) for other in self.hand_flags if other is not player]
+
+    def get_player_stats(self, player: Player) -> OpponentStats:
+        stats: OpponentStats | None = self.stats.get(player.name)
+        if stats is None:
+            stats = self.stats[player.name] = OpponentStats()
+        return stats
+
+    # Hooks called by GameManager
+    def start_hand(self, game) -> None:
+        self.hand_flags = {player: 0 for player in game.active_players}
+        self.street_raiser = None
+        self.preflop = True
+
+    def record_action(self, player: Player, action: PlayerAction) -> None:
+        if self.street_raiser is not None and self.street_raiser is not player:
+            stats: OpponentStats = self.get_player_stats(player)
+            stats.raises_faced += 1
+            stats.folds_to_raise += action == PlayerAction.FOLD
+        if action in AGGRESSIVE_ACTIONS:
+            self.street_raiser = player
+        if self.preflop and action in VOLUNTARY_ACTIONS:
+            self.hand_flags[player] |= VOLUNTARY_FLAG | (RAISED_FLAG if action in AGGRESSIVE_ACTIONS else 0)
+
+    def record_board(self, cards: list[Card]) -> None:
+        self.street_raiser = None
+        self.preflop = False
+
+    def end_hand(self, game, winners: list[Player]) -> None:
+        for player, flags in self.hand_flags.items():
+            stats: OpponentStats = self.get_player_stats(player)
+            stats.hands += 1
+            stats.voluntary_hands += flags & VOLUNTARY_FLAG > 0
+            stats.preflop_raises += flags & RAISED_FLAG > 0
+
+        if len(game.active_players) > 1: # The hand went to showdown
+            for player in game.active_players:
+                stats = self.get_player_stats(player)
+                stats.showdowns += 1
+                stats.showdown_strength_sum += rank_category(player.get_combination_power(game.table, game.table_mask))
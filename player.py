@@ -2,10 +2,14 @@
 from enum import Enum
 
 # Internal libraries
-from card import Card
+from card import Card, cards_to_mask
 from combinationHandler import CombinationHandler, CardCombinations
+from handEvaluator import HandState
 from deck import Deck
 
+STARTING_TOKENS: int = 10_000
+
+
 class PlayerAction(Enum):
     FOLD = "Fold"
     CHECK = "Check"
@@ -16,15 +20,20 @@ class PlayerAction(Enum):
 
 
 class Player:
-    def __init__(self, name: str, starting_tokens: int = 10_000) -> None:
+    def __init__(self, name: str, starting_tokens: int = STARTING_TOKENS) -> None:
         self.name: str = name
         self.hand: list[Card] = []
+        self.hand_mask: int = 0 # 52 bits mask of the cards in the hand
+        self.cards_state: HandState = HandState() # Incremental evaluation state of the hand and of the table cards dealt so far
+        self.combination_handler: CombinationHandler | None = None # Handler of the last evaluated cards, reused while they don't change
+        self.combination_handler_mask: int = 0 # 52 bits mask of the cards of the cached handler
 
         # Betting setup
         self.total_tokens: int = starting_tokens
         self.current_bet: int = 0
         self.checked: bool = False # Is set to true once the player "Checks" (with a raise, a call, an all_in or a check) during a round to see when every player has checked
         self.all_ined: bool = False # Is set to true when the player goes all in
+        self.opponent_model = None # Statistics of the other players (opponentModel.OpponentModel), given by the GameManager
 
     def __repr__(self) -> str:
         return self.name
@@ -32,19 +41,47 @@ class Player:
     def draw_card(self, deck: Deck, nbr_of_cards: int = 1) -> None:
         """Draw a card from the deck and add it to the player's hand"""
         for _ in range(nbr_of_cards):
-            self.hand.append(deck.draw())
+            card: Card = deck.draw()
+            self.hand.append(card)
+            self.hand_mask |= 1 << card.index
+            self.cards_state.add_card(card.index)
+        self.reset_combination_cache()
+
+    def clear_hand(self) -> None:
+        """Remove every card from the player's hand"""
+        self.hand.clear()
+        self.hand_mask = 0
+        self.cards_state = HandState()
+        self.reset_combination_cache()
+
+    def see_table_card(self, card: Card) -> None:
+        """Add a card put on the table to the evaluation state of the player's cards"""
+        self.cards_state.add_card(card.index)
 
 
     # Combination methods
-    def get_combination(self, table: list[Card]) -> tuple[CardCombinations, list[Card]]:
+    def reset_combination_cache(self) -> None:
+        """Forget the cached combination (when the cards of the player change)"""
+        self.combination_handler = None
+
+    def get_combination_handler(self, table: list[Card], table_mask: int | None = None) -> CombinationHandler:
+        """Return the combination handler of the player's cards, only created again when the hand or the table changed"""
+        cards_mask: int = self.hand_mask | (cards_to_mask(table) if table_mask is None else table_mask)
+        if self.combination_handler is None or self.combination_handler_mask != cards_mask:
+            self.combination_handler = CombinationHandler(self.hand + table, cards_mask)
+            self.combination_handler_mask = cards_mask
+        return self.combination_handler
+
+    def get_combination(self, table: list[Card], table_mask: int | None = None) -> tuple[CardCombinations, list[Card]]:
         """Return the best combination of cards the player has"""
-        cards = self.hand + table
-        return CombinationHandler(cards).combination
+        return self.get_combination_handler(table, table_mask).combination
     
-    def get_combination_power(self, table: list[Card]):
-        """Return the power of the best combination of cards the player has"""
-        cards = self.hand + table
-        return CombinationHandler(cards).power
+    def get_combination_power(self, table: list[Card], table_mask: int | None = None) -> int:
+        """Return the power of the best combination of cards the player has, kickers included (the higher the better)"""
+        table_mask = cards_to_mask(table) if table_mask is None else table_mask
+        if self.cards_state.mask == self.hand_mask | table_mask:
+            return self.cards_state.rank
+        return self.get_combination_handler(table, table_mask).power
 
 
     # Action methods
@@ -67,36 +104,16 @@ class Player:
             possible_actions.insert(1, PlayerAction.CHECK)
         return possible_actions
         
-    def choose_action(self, table: list[Card], highest_player_bet: int) -> PlayerAction:
-        """Choose an action to do depending on the current state of the game"""
+    def choose_action(self, table: list[Card], highest_player_bet: int, pot: int = 0, opponents_nbr: int = 1) -> PlayerAction:
+        """Choose an action to do depending on the current state of the game (the pot and the number of opponents
+        still in the round are given for the players that need them)
 
-        possible_actions: list[PlayerAction] = self.define_possible_actions(highest_player_bet)
-        # If the player has no more tokens, he can't do anything other than waiting for the other players to finish the round
-        if possible_actions[0] == PlayerAction.NONE:
-            print("You have no more tokens. You can't play anymore.")
-            return PlayerAction.NONE
-        
-        # While the player doesn't choose a valid action, we ask him to choose one
-        while True:
-            try:
-                best_combination: CardCombinations = self.get_combination(table)[0]
-                best_combination_cards: list[Card] = self.get_combination(table)[1]
-
-                # TODO : color code for the combination
-                # TODO : print better (not lists)
-
-                print(f"Hand: {self.hand} | Table: {table}")
-                print(f"Your current combination: {best_combination.name.replace("_", " ")} | Cards: {best_combination_cards}\n")
-                print(f"Choose an action: {list(map(lambda x: x.value.capitalize(), possible_actions))}")
-                
-                action = PlayerAction(str(input("Action: ")).capitalize())
-                if action in possible_actions:
-                    return action
-                
-                print(f"Invalid action. Please choose one of the following: {possible_actions}")
+        A game with a view asks the people at the terminal through its events, this is only used without one."""
+        from gameEvents import ActionRequest # Events and views are built on the players
+        from terminalView import TerminalView
 
-            except ValueError:
-                print(f"Invalid action. Please choose one of the following: {possible_actions}")
+        request: ActionRequest = ActionRequest(self, table, highest_player_bet, pot, opponents_nbr, self.define_possible_actions(highest_player_bet))
+        return TerminalView().ask_action(request)
 
 
     # Betting methods
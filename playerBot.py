@@ -1,5 +1,5 @@
 # External libraries
-from random import randint
+import random
 
 # Internal libraries
 from card import Card
@@ -7,8 +7,9 @@ from combinationHandler import CardCombinations
 from player import Player, PlayerAction
 
 class Bot(Player): # TODO : print actions like a real player (maybe move the print somewhere to not repeat it)
-    def __init__(self, name) -> None:
+    def __init__(self, name, rng=None) -> None:
         super().__init__(name=name)
+        self.rng = random if rng is None else rng # Random stream of the bot's decisions (see randomGenerator.RandomGenerator)
         self.possible_actions: list[PlayerAction] = []
         self.combination_history: list[CardCombinations] = []
         self.action_history: list[PlayerAction] = []
@@ -48,7 +49,7 @@ class Bot(Player): # TODO : print actions like a real player (maybe move the pri
     def play_high_card(self, table, combination_cards) -> PlayerAction:
         # Bluff mechanic (15% chance)
         if max(card.value for card in self.hand) <= 7:
-            if randint(1, 100) <= 15: 
+            if self.rng.randint(1, 100) <= 15: 
                 return PlayerAction.ALL_IN
             
         # Only Pre-flop
@@ -116,14 +117,19 @@ class Bot(Player): # TODO : print actions like a real player (maybe move the pri
     def play_royal_flush(self, table, combination_cards) -> PlayerAction:
         return PlayerAction.ALL_IN
 
+    def clear_hand(self) -> None:
+        """Remove every card from the hand and forget the decisions of the previous round"""
+        super().clear_hand()
+        self.combination_history.clear()
+        self.action_history.clear()
+
     def update_possible_actions(self, highest_player_bet: int) -> list[PlayerAction]:
         self.possible_actions: list[PlayerAction] = self.define_possible_actions(highest_player_bet)
                 
-    def choose_action(self, table: list[Card], highest_player_bet: int) -> PlayerAction:
+    def choose_action(self, table: list[Card], highest_player_bet: int, pot: int = 0, opponents_nbr: int = 1) -> PlayerAction:
         """Does some math to find an optimal-ish play"""
         # Processing the data
-        combination: CardCombinations = self.get_combination(table)[0]
-        combination_cards: list[Card] = self.get_combination(table)[1]
+        combination, combination_cards = self.get_combination(table)
 
         self.update_possible_actions(highest_player_bet)
 
@@ -132,11 +138,14 @@ class Bot(Player): # TODO : print actions like a real player (maybe move the pri
         
         # Only Post-flop
         if len(table) > 0:
+            # Combination of the last decision, or of the hole cards when the previous actions weren't chosen here (e.g. sent through a GameSession)
+            last_combination: CardCombinations = self.combination_history[-1] if self.combination_history else self.get_combination([])[0]
+
             # Does not raise more than once with the same combination
-            if combination != self.combination_history[-1]:
+            if combination != last_combination:
                 new_action = self.risk_action
 
-            elif combination == self.combination_history[-1] and PlayerAction.RAISE in self.action_history:
+            elif combination == last_combination and PlayerAction.RAISE in self.action_history:
                 new_action = self.follow_action
 
             # Does not call more than once with a low combination
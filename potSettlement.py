@@ -0,0 +1,42 @@
+# External libraries
+from dataclasses import dataclass
+
+# Internal libraries
+from player import Player
+
+
+@dataclass(slots=True)
+class Pot:
+    amount: int
+    eligible: list[Player] # Players still in the round that put enough tokens to win it
+
+
+def build_pots(players: list[Player], active_players: list[Player]) -> list[Pot]:
+    """Split the bets of the round into the main pot and the side pots
+
+    Each level of bet of a player still in the round (a player all in for less than the others, or whose bet
+    stopped there) closes a pot: every player puts in it up to that level, and only the players that reached it
+    can win it. The tokens of folded players above the last level go to the last pot."""
+    bets: list[int] = [player.current_bet for player in players]
+    levels: list[int] = sorted({player.current_bet for player in active_players})
+    pots: list[Pot] = []
+    previous_level: int = 0
+    for level in levels:
+        amount: int = sum(min(bet, level) - min(bet, previous_level) for bet in bets)
+        pots.append(Pot(amount, [player for player in active_players if player.current_bet >= level]))
+        previous_level = level
+    if pots:
+        pots[-1].amount += sum(bet - previous_level for bet in bets if bet > previous_level)
+    return pots
+
+def settle_pots(pots: list[Pot], powers: dict[Player: int]) -> dict[Player: int]:
+    """Give every pot to its eligible players with the highest combination power (split evenly, the odd tokens going
+    to the first ones) and return the tokens won by each player"""
+    payouts: dict[Player: int] = {}
+    for pot in pots:
+        best_power: int = max(powers[player] for player in pot.eligible)
+        winners: list[Player] = [player for player in pot.eligible if powers[player] == best_power]
+        share, remainder = divmod(pot.amount, len(winners))
+        for position, winner in enumerate(winners):
+            payouts[winner] = payouts.get(winner, 0) + share + (position < remainder)
+    return payouts
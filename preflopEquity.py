@@ -0,0 +1,131 @@
+# External libraries
+import argparse
+import struct
+import sys
+from array import array
+from pathlib import Path
+
+# Internal libraries
+from card import Card, CardSuits, CardValues, cards_to_mask
+
+# The table file is a small header followed by the equities as little-endian float32, one row of 169 hand classes per number of
+# players. Changing the layout or the way the equities are computed must bump TABLE_VERSION.
+TABLE_VERSION: int = 1
+TABLE_MAGIC: bytes = b"PKEQ"
+TABLE_HEADER: struct.Struct = struct.Struct("<4sHBBI") # magic, version, min players, max players, samples per equity
+TABLE_PATH: Path = Path(__file__).with_name("preflopEquity.bin")
+
+MIN_PLAYERS: int = 2
+MAX_PLAYERS: int = 9
+HAND_CLASSES: int = 169
+VALUE_NAMES: str = "23456789TJQKA"
+
+
+# Starting hand classes: a 13x13 grid indexed by the card values, pairs on the diagonal, suited hands above it
+# (first index is the highest value) and offsuit hands below it (first index is the lowest value)
+def hand_class_index(hand: list[Card]) -> int:
+    """Return the class (0-168) of a two cards starting hand"""
+    first, second = hand
+    high, low = (first.value, second.value) if first.value >= second.value else (second.value, first.value)
+    if first.suit == second.suit:
+        return (high - 2) * 13 + low - 2
+    return (low - 2) * 13 + high - 2
+
+def hand_class_name(index: int) -> str:
+    """Return the usual name of a hand class (e.g. "AA", "AKs", "72o")"""
+    row, column = divmod(index, 13)
+    if row == column:
+        return VALUE_NAMES[row] * 2
+    if row > column:
+        return VALUE_NAMES[row] + VALUE_NAMES[column] + "s"
+    return VALUE_NAMES[column] + VALUE_NAMES[row] + "o"
+
+def hand_class_cards(index: int) -> list[Card]:
+    """Return a starting hand of a class"""
+    row, column = divmod(index, 13)
+    if row == column:
+        return [Card(row + 2, CardSuits.HEARTS), Card(row + 2, CardSuits.SPADES)]
+    if row > column:
+        return [Card(row + 2, CardSuits.HEARTS), Card(column + 2, CardSuits.HEARTS)]
+    return [Card(column + 2, CardSuits.HEARTS), Card(row + 2, CardSuits.SPADES)]
+
+
+class PreflopEquityTable:
+    def __init__(self, equities: array, samples: int) -> None:
+        self.equities: array = equities # float32, (MAX_PLAYERS - MIN_PLAYERS + 1) rows of HAND_CLASSES equities
+        self.samples: int = samples
+
+    @classmethod
+    def load(cls, path: Path = TABLE_PATH) -> "PreflopEquityTable":
+        """Read a table file into a compact float32 array"""
+        data: bytes = Path(path).read_bytes()
+        magic, version, min_players, max_players, samples = TABLE_HEADER.unpack_from(data)
+        if magic != TABLE_MAGIC or version != TABLE_VERSION or (min_players, max_players) != (MIN_PLAYERS, MAX_PLAYERS):
+            raise ValueError(f"{path} is not a version {TABLE_VERSION} preflop equity table, generate it again with: python preflopEquity.py")
+        equities: array = array("f")
+        equities.frombytes(data[TABLE_HEADER.size:])
+        if sys.byteorder == "big":
+            equities.byteswap()
+        if len(equities) != (MAX_PLAYERS - MIN_PLAYERS + 1) * HAND_CLASSES:
+            raise ValueError(f"{path} is truncated")
+        return cls(equities, samples)
+
+    def save(self, path: Path = TABLE_PATH) -> None:
+        equities: array = array("f", self.equities)
+        if sys.byteorder == "big":
+            equities.byteswap()
+        Path(path).write_bytes(TABLE_HEADER.pack(TABLE_MAGIC, TABLE_VERSION, MIN_PLAYERS, MAX_PLAYERS, self.samples) + equities.tobytes())
+
+    def get_equity(self, hand: list[Card], player_nbr: int) -> float:
+        """Return the share of the pot a starting hand wins on average against `player_nbr - 1` random hands"""
+        if not MIN_PLAYERS <= player_nbr <= MAX_PLAYERS:
+            raise ValueError(f"The number of players must be between {MIN_PLAYERS} and {MAX_PLAYERS}.")
+        return self.equities[(player_nbr - MIN_PLAYERS) * HAND_CLASSES + hand_class_index(hand)]
+
+_default_table: PreflopEquityTable | None = None
+
+def get_preflop_equity(hand: list[Card], player_nbr: int) -> float:
+    """Return the preflop equity of a hand (e.g. a Player.hand) from the table shipped with the game, loaded once"""
+    global _default_table
+    if _default_table is None:
+        _default_table = PreflopEquityTable.load()
+    return _default_table.get_equity(hand, player_nbr)
+
+
+# Generation
+def generate_table(samples: int, seed: int | None = None, batch_size: int = 20_000) -> PreflopEquityTable:
+    """Simulate every hand class against random hands for each number of players (needs NumPy)"""
+    import numpy as np # NumPy is only needed to generate the table, not to read it
+    from batchEvaluator import evaluate_batch
+
+    rng = np.random.default_rng(seed)
+    equities: array = array("f")
+    for player_nbr in range(MIN_PLAYERS, MAX_PLAYERS + 1):
+        for index in range(HAND_CLASSES):
+            hand: list[Card] = hand_class_cards(index)
+            hand_indexes = np.array([card.index for card in hand])
+            remaining = np.array([i for i in range(52) if not cards_to_mask(hand) >> i & 1])
+            share_sum: float = 0.0
+            for start in range(0, samples, batch_size):
+                size: int = min(batch_size, samples - start)
+                # Each row: the board (5 cards) then 2 cards for each opponent
+                dealt = rng.permuted(np.tile(remaining, (size, 1)), axis=1)[:, :5 + 2 * (player_nbr - 1)]
+                board = dealt[:, :5]
+                ranks = [evaluate_batch(np.concatenate([np.tile(hand_indexes, (size, 1)), board], axis=1))]
+                for opponent in range(player_nbr - 1):
+                    ranks.append(evaluate_batch(np.concatenate([dealt[:, 5 + 2 * opponent:7 + 2 * opponent], board], axis=1)))
+                ranks = np.stack(ranks, axis=1)
+                best = ranks.max(axis=1, keepdims=True)
+                winners = (ranks == best).sum(axis=1)
+                share_sum += float(((ranks[:, 0] == best[:, 0]) / winners).sum())
+            equities.append(share_sum / samples)
+    return PreflopEquityTable(equities, samples)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate the preflop equity table of the 169 starting hand classes")
+    parser.add_argument("--samples", type=int, default=50_000, help="random deals per hand class and number of players")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=TABLE_PATH)
+    arguments = parser.parse_args()
+    generate_table(arguments.samples, arguments.seed).save(arguments.output)
@@ -0,0 +1,70 @@
+# External libraries
+from typing import Sequence
+
+import numpy as np
+
+# Children keys are (namespace, index) pairs, so that the streams given by index never repeat the spawned ones
+STREAM_NAMESPACE: int = 0
+SPAWN_NAMESPACE: int = 1
+
+
+class RandomGenerator:
+    """Seedable random stream (PCG64) that can be split into independent streams (NumPy SeedSequence)
+
+    It has the methods of the random module the game uses (random, randint, shuffle, sample, choices), so a Deck,
+    a Bot or a GameManager accept either of them. Without one, they use the global random module as before."""
+    def __init__(self, seed: int | np.random.SeedSequence | None = None) -> None:
+        self.seed_sequence: np.random.SeedSequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        self.generator: np.random.Generator = np.random.Generator(np.random.PCG64(self.seed_sequence))
+        self.children: int = 0 # Streams already given by spawn
+
+    def __repr__(self) -> str:
+        return f"RandomGenerator(entropy={self.seed_sequence.entropy}, spawn_key={self.seed_sequence.spawn_key})"
+
+    # Splitting
+    def child(self, namespace: int, index: int) -> "RandomGenerator":
+        """Return the child stream of an index in a namespace (see STREAM_NAMESPACE and SPAWN_NAMESPACE)"""
+        sequence: np.random.SeedSequence = self.seed_sequence
+        return RandomGenerator(np.random.SeedSequence(sequence.entropy, spawn_key=sequence.spawn_key + (namespace, index), pool_size=sequence.pool_size))
+
+    def stream(self, index: int) -> "RandomGenerator":
+        """Return the index-th child stream: always the same one for an index, independent of this stream and of the
+        other children (e.g. one per table, per player or per hand)"""
+        return self.child(STREAM_NAMESPACE, index)
+
+    def spawn(self, streams_nbr: int) -> list["RandomGenerator"]:
+        """Return the next `streams_nbr` child streams (e.g. one per worker), never the same as the indexed streams"""
+        streams: list[RandomGenerator] = [self.child(SPAWN_NAMESPACE, index) for index in range(self.children, self.children + streams_nbr)]
+        self.children += streams_nbr
+        return streams
+
+    def seeds(self, seeds_nbr: int) -> list[int]:
+        """Return 64 bits seeds derived from this stream's seed, e.g. to send to other processes"""
+        return [int(seed) for seed in self.seed_sequence.generate_state(seeds_nbr, np.uint64)]
+
+    # Same methods as the random module
+    def random(self) -> float:
+        return float(self.generator.random())
+
+    def randint(self, a: int, b: int) -> int:
+        """Random integer in [a, b], both included"""
+        return int(self.generator.integers(a, b + 1))
+
+    def shuffle(self, items: list) -> None:
+        items[:] = [items[index] for index in self.generator.permutation(len(items)).tolist()]
+
+    def sample(self, population: Sequence, k: int) -> list:
+        return [population[index] for index in self.generator.choice(len(population), k, replace=False).tolist()]
+
+    def choices(self, population: Sequence, weights: Sequence[float] | None = None, k: int = 1) -> list:
+        probabilities: np.ndarray | None = None
+        if weights is not None:
+            probabilities = np.asarray(weights, dtype=float)
+            probabilities = probabilities / probabilities.sum()
+        return [population[index] for index in self.generator.choice(len(population), k, p=probabilities).tolist()]
+
+    # Bulk generation
+    def permutations(self, permutations_nbr: int, size: int = 52) -> np.ndarray:
+        """Return a (permutations_nbr, size) array where each row is a random permutation of 0..size-1 (e.g. deck
+        orders of card indexes for Deck.build_deck, which deals the last cards of a row first)"""
+        return self.generator.permuted(np.tile(np.arange(size, dtype=np.uint8), (permutations_nbr, 1)), axis=1)
@@ -0,0 +1,322 @@
+# External libraries
+import argparse
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from time import perf_counter
+from typing import Callable, Generator
+
+# Internal libraries
+from card import Card
+from cfrBot import CFRBot
+from equityBot import EquityBot
+from gameEvents import ActionEvent, ActionRequest, DealEvent, GameEvent, GameOverEvent, PayoutEvent, ShowdownEvent, StreetEvent
+from gameManager import GameManager
+from player import Player, PlayerAction
+from playerBot import Bot
+from randomGenerator import RandomGenerator
+
+# Line protocol (UTF-8, one message per line, words separated by spaces)
+#   client -> server: JOIN <name> [table id], then one action per REQUEST (fold, check, call, raise, all_in) optionally
+#                     followed by the request id, QUIT
+#   server -> client: WELCOME <table id> <name>, HAND <hand> <seats...>, CARDS <card> <card>, ACTION <name> <action> <bet>,
+#                     BOARD <cards...>, SHOWDOWN <name> <card> <card>, PAYOUT <name> <tokens won> <tokens>,
+#                     REQUEST <request id> <highest bet> <pot> <possible actions...>, TIMEOUT <action played>, WINNER <name>,
+#                     ERROR <message>
+# Cards are written as value and suit letters (e.g. Th for the ten of hearts). Lines received before a REQUEST (answers
+# that came after the timeout) are dropped, and so are the answers tagged with the id of an earlier request.
+VALUE_CODES: str = "23456789TJQKA"
+OFFLOADED_BOTS: tuple[type, ...] = (EquityBot, CFRBot) # Bots whose decisions are slow enough to run in the executor
+BOT_KINDS: dict[str: Callable[[str], Player]] = {"rules": Bot, "equity": EquityBot, "cfr": CFRBot} # Bot factories of the command line
+
+
+def card_code(card: Card) -> str:
+    return VALUE_CODES[card.value - 2] + card.suit.value[0].lower()
+
+def parse_action(text: str) -> PlayerAction | None:
+    try:
+        return PlayerAction[text.strip().upper().replace(" ", "_")]
+    except KeyError:
+        return None
+
+def parse_answer(line: str) -> tuple[PlayerAction | None, int | None]:
+    """Return the action of an answer line and the request id it ends with (None without one)"""
+    words: list[str] = line.split()
+    if len(words) > 1 and words[-1].isdigit():
+        return parse_action(" ".join(words[:-1])), int(words[-1])
+    return parse_action(line), None
+
+def get_default_action(possible_actions: list[PlayerAction]) -> PlayerAction:
+    """Action played for a seat that doesn't answer in time (or left): check when possible, fold otherwise"""
+    if PlayerAction.NONE in possible_actions:
+        return PlayerAction.NONE
+    return PlayerAction.CHECK if PlayerAction.CHECK in possible_actions else PlayerAction.FOLD
+
+
+class RemotePlayer(Player):
+    """Seat of a human connected to the server, whose actions are the lines sent by its client"""
+    def __init__(self, name: str, writer: asyncio.StreamWriter, starting_tokens: int = 10_000) -> None:
+        super().__init__(name, starting_tokens)
+        self.writer: asyncio.StreamWriter = writer
+        self.lines: asyncio.Queue[str | None] = asyncio.Queue() # Lines received, None once disconnected
+        self.connected: bool = True
+        self.requests: int = 0 # Id of the last request sent
+
+    def send(self, line: str) -> None:
+        if self.connected:
+            self.writer.write(line.encode() + b"\n")
+
+    def disconnect(self) -> None:
+        self.connected = False
+        self.lines.put_nowait(None)
+
+    def drop_lines(self) -> None:
+        """Forget the lines received since the last request was answered (e.g. an answer sent after the timeout)"""
+        while not self.lines.empty():
+            self.lines.get_nowait()
+        if not self.connected:
+            self.lines.put_nowait(None)
+
+    def choose_action(self, table: list[Card], highest_player_bet: int, pot: int = 0, opponents_nbr: int = 1) -> PlayerAction:
+        """Only used if the game asks the player directly: the server answers its requests instead"""
+        return get_default_action(self.define_possible_actions(highest_player_bet))
+
+
+class Table:
+    """A game of bots and remote humans, played by a coroutine once every human seat is taken
+
+    The bots are the given players, or `bots` players made by the bot factory (called with their name)."""
+    def __init__(self, table_id: int, bots: int, humans: int, rng: RandomGenerator, server: "TableServer",
+                 players: list[Player] | None = None, bot_factory: Callable[[str], Player] = Bot) -> None:
+        self.table_id: int = table_id
+        self.bots: int = bots if players is None else len(players)
+        self.humans: int = humans
+        self.rng: RandomGenerator = rng
+        self.server: TableServer = server
+        self.players: list[Player] | None = players
+        self.bot_factory: Callable[[str], Player] = bot_factory
+        self.remote_players: list[RemotePlayer] = []
+        self.full: asyncio.Event = asyncio.Event()
+        self.game: GameManager | None = None
+        self.winner: Player | None = None
+        if not humans:
+            self.full.set()
+
+    @property
+    def free_seats(self) -> int:
+        return self.humans - len(self.remote_players)
+
+    @property
+    def bot_names(self) -> list[str]:
+        return [player.name for player in self.players] if self.players is not None else [f"Bot{index}" for index in range(self.bots)]
+
+    def is_name_taken(self, name: str) -> bool:
+        """Is a bot or a seated human already called `name` (the protocol and the histories tell the players by name)"""
+        return name in self.bot_names or any(player.name == name for player in self.remote_players)
+
+    def seat(self, player: RemotePlayer) -> None:
+        self.remote_players.append(player)
+        if not self.free_seats:
+            self.full.set()
+
+    async def run(self) -> Player:
+        """Play the game to its end and return the winner"""
+        await self.full.wait()
+        bots: list[Player] = self.players if self.players is not None else [self.bot_factory(name) for name in self.bot_names]
+        players: list[Player] = bots + self.remote_players
+        self.game = GameManager(len(players), headless=True, players=players, rng=self.rng)
+        events: Generator[GameEvent, PlayerAction | None, None] = self.game.iter_game()
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        action: PlayerAction | None = None
+        while True:
+            try:
+                event: GameEvent = events.send(action)
+            except StopIteration:
+                break
+            action = None
+            if self.remote_players:
+                self.broadcast(event)
+
+            if isinstance(event, ActionRequest):
+                player: Player = event.player
+                if isinstance(player, RemotePlayer):
+                    action = await self.ask(player, event)
+                elif isinstance(player, OFFLOADED_BOTS):
+                    action = await loop.run_in_executor(self.server.executor, player.choose_action, event.table, event.highest_bet,
+                                                        event.pot, event.opponents_nbr)
+                self.server.actions += 1
+            elif isinstance(event, ActionEvent):
+                await asyncio.sleep(0) # Let the other tables play
+            elif isinstance(event, DealEvent):
+                self.server.hands += 1
+        self.winner = self.game.players[0]
+        return self.winner
+
+    async def ask(self, player: RemotePlayer, request: ActionRequest) -> PlayerAction:
+        """Wait for the action of a remote player, or play the default action once the timeout is over"""
+        default_action: PlayerAction = get_default_action(request.possible_actions)
+        player.drop_lines()
+        if request.possible_actions == [PlayerAction.NONE] or not player.connected:
+            return default_action
+
+        player.requests += 1
+        player.send(f"REQUEST {player.requests} {request.highest_bet} {request.pot} " + " ".join(action.name.lower() for action in request.possible_actions))
+        start: float = perf_counter()
+        deadline: float = start + self.server.action_timeout
+        while True:
+            try:
+                line: str | None = await asyncio.wait_for(player.lines.get(), max(deadline - perf_counter(), 0))
+            except TimeoutError:
+                player.send(f"TIMEOUT {default_action.name.lower()}")
+                return default_action
+            if line is None: # Disconnected
+                return default_action
+            action, request_id = parse_answer(line)
+            if request_id is not None and request_id != player.requests: # Late answer to an earlier request
+                continue
+            if action in request.possible_actions:
+                self.server.latencies.append(perf_counter() - start)
+                return action
+            player.send(f"ERROR {line.strip()!r} is not one of the possible actions")
+
+    def broadcast(self, event: GameEvent) -> None:
+        """Send an event to the remote players of the table"""
+        lines: list[str] = []
+        if isinstance(event, ActionEvent):
+            lines.append(f"ACTION {event.player.name} {event.action.name.lower()} {event.bet}")
+        elif isinstance(event, StreetEvent):
+            lines.append("BOARD " + " ".join(card_code(card) for card in event.table))
+        elif isinstance(event, DealEvent):
+            lines.append(f"HAND {event.hand} " + " ".join(player.name for player in event.players))
+            for player in self.remote_players:
+                if player in event.players:
+                    player.send("CARDS " + " ".join(card_code(card) for card in player.hand))
+        elif isinstance(event, ShowdownEvent):
+            lines += [f"SHOWDOWN {player.name} " + " ".join(card_code(card) for card in player.hand) for player in event.players]
+        elif isinstance(event, PayoutEvent):
+            lines += [f"PAYOUT {winner.name} {event.payouts[winner]} {winner.total_tokens}" for winner in event.winners]
+        elif isinstance(event, GameOverEvent):
+            lines.append(f"WINNER {event.winner.name}")
+        for player in self.remote_players:
+            for line in lines:
+                player.send(line)
+
+
+class TableServer:
+    """Host many tables in one asyncio event loop, humans joining them over a local TCP or Unix socket
+
+    Each table is a coroutine stepping through its game (see GameManager.iter_game): bots play inline (slow ones in a
+    thread pool), and remote players have `action_timeout` seconds to answer each request, after which they check or
+    fold, so an idle player never stalls its table."""
+    def __init__(self, action_timeout: float = 30.0, workers: int = 4, seed: int | None = None) -> None:
+        self.action_timeout: float = action_timeout
+        self.executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=workers)
+        self.rng: RandomGenerator = RandomGenerator(seed)
+        self.tables: list[Table] = []
+        self.tasks: list[asyncio.Task] = []
+        self.server: asyncio.Server | None = None
+        self.hands: int = 0
+        self.actions: int = 0
+        self.latencies: list[float] = [] # Seconds between each request sent to a remote player and its answer
+
+    def add_table(self, bots: int = 0, humans: int = 0, players: list[Player] | None = None, bot_factory: Callable[[str], Player] = Bot) -> Table:
+        """Add a table that starts once its `humans` seats are taken (at once without humans), its bots being the given
+        players or `bots` players made by the bot factory (e.g. EquityBot, whose decisions run in the executor)"""
+        table: Table = Table(len(self.tables), bots, humans, self.rng.stream(len(self.tables)), self, players, bot_factory)
+        self.tables.append(table)
+        self.tasks.append(asyncio.create_task(table.run()))
+        return table
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0, path: Path | str | None = None) -> str:
+        """Start accepting clients on a TCP port (0 picks a free one) or a Unix socket, and return the address"""
+        if path is not None:
+            self.server = await asyncio.start_unix_server(self.handle_client, path)
+            return str(path)
+        self.server = await asyncio.start_server(self.handle_client, host, port)
+        host, port = self.server.sockets[0].getsockname()[:2]
+        return f"{host}:{port}"
+
+    async def wait_tables(self) -> list[Player]:
+        """Wait for every table to end and return their winners"""
+        return await asyncio.gather(*self.tasks)
+
+    async def close(self) -> None:
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        for task in self.tasks:
+            task.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def find_table(self, table_id: int | None) -> Table | None:
+        """Return the asked table if it has a free seat, otherwise the first table that has one"""
+        if table_id is not None:
+            table: Table | None = self.tables[table_id] if 0 <= table_id < len(self.tables) else None
+            return table if table is not None and table.free_seats else None
+        return next((table for table in self.tables if table.free_seats), None)
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        player: RemotePlayer | None = None
+        try:
+            words: list[str] = (await reader.readline()).decode().split()
+            table_id: int | None = int(words[2]) if len(words) > 2 and words[2].isdigit() else None
+            table: Table | None = self.find_table(table_id)
+            if len(words) < 2 or words[0].upper() != "JOIN":
+                writer.write(b"ERROR expected JOIN <name> [table id]\n")
+            elif table is None:
+                writer.write(b"ERROR no free seat\n")
+            elif table.is_name_taken(words[1]):
+                writer.write(b"ERROR name taken\n")
+            else:
+                player = RemotePlayer(words[1], writer)
+                table.seat(player)
+                player.send(f"WELCOME {table.table_id} {player.name}")
+                while line := await reader.readline():
+                    text: str = line.decode().strip()
+                    if text.upper() == "QUIT":
+                        break
+                    player.lines.put_nowait(text)
+        except (ConnectionError, UnicodeDecodeError):
+            pass
+        finally:
+            if player is not None:
+                player.disconnect()
+            writer.close()
+
+
+async def host_tables(tables: int, bots: int, humans: int, action_timeout: float, seed: int | None, host: str, port: int,
+                      path: Path | None, on_start: Callable[[str], None] = print, bot_factory: Callable[[str], Player] = Bot) -> TableServer:
+    """Run a server hosting `tables` tables until every game is over"""
+    server: TableServer = TableServer(action_timeout=action_timeout, seed=seed)
+    for _ in range(tables):
+        server.add_table(bots, humans, bot_factory=bot_factory)
+    on_start(await server.start(host, port, path))
+    try:
+        await server.wait_tables()
+    finally:
+        await server.close()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Host many poker tables in one process, humans joining them over a local socket (e.g. with nc)")
+    parser.add_argument("--tables", type=int, default=100)
+    parser.add_argument("--bots", type=int, default=5, help="bots per table")
+    parser.add_argument("--bot-kind", choices=list(BOT_KINDS), default="rules", help="kind of the bots (equity and cfr bots decide in threads)")
+    parser.add_argument("--humans", type=int, default=0, help="human seats per table, each table waits for them before starting")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds a human has to answer before checking or folding")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", type=Path, default=None, help="listen on a Unix socket instead of TCP")
+    arguments = parser.parse_args()
+
+    start: float = perf_counter()
+    served: TableServer = asyncio.run(host_tables(arguments.tables, arguments.bots, arguments.humans, arguments.timeout, arguments.seed,
+                                                  arguments.host, arguments.port, arguments.unix,
+                                                  on_start=lambda address: print(f"Listening on {address}"), bot_factory=BOT_KINDS[arguments.bot_kind]))
+    elapsed: float = perf_counter() - start
+    print(f"{len(served.tables)} tables | {served.hands} hands | {served.actions} actions in {elapsed:.1f}s ({served.actions / elapsed:,.0f} actions/s)")
+    if served.latencies:
+        latencies: list[float] = sorted(served.latencies)
+        print(f"Human answers: {len(latencies)} | median {latencies[len(latencies) // 2] * 1e3:.2f}ms | p99 {latencies[int(len(latencies) * 0.99)] * 1e3:.2f}ms")
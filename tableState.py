@@ -0,0 +1,58 @@
+# Internal libraries
+from player import Player
+
+
+class TableState:
+    """Seats of the players dealt in the current hand, with the running totals of their bets
+
+    The players still in the hand are a bitmask of their seats, and the pot and the highest bet are updated with
+    each bet, so every update and query costs the same whatever the number of players."""
+    def __init__(self, players: list[Player] | None = None) -> None:
+        self.players: list[Player] = [] # Players dealt in, by seat (the first two post the small and the big blind)
+        self.seats: dict[Player: int] = {}
+        self.active_mask: int = 0 # Bit n is set while the player of seat n hasn't folded
+        self.active_count: int = 0
+        self.active_list: tuple[Player, ...] | None = None # Players still in the hand, rebuilt after a fold when needed
+        self.pot: int = 0 # Sum of the bets of the hand
+        self.highest: int = 0 # Highest bet of the hand
+        if players is not None:
+            self.start_hand(players)
+
+    def start_hand(self, players: list[Player]) -> None:
+        """Seat the players dealt in a new hand (a copy of the list is kept, so the seating order is never changed)"""
+        self.players = list(players)
+        self.seats = {player: seat for seat, player in enumerate(self.players)}
+        self.active_mask = (1 << len(self.players)) - 1
+        self.active_count = len(self.players)
+        self.active_list = None
+        self.pot = sum(player.current_bet for player in self.players)
+        self.highest = max((player.current_bet for player in self.players), default=0)
+
+    @property
+    def active_players(self) -> tuple[Player, ...]:
+        """Players still in the hand, by seat (a tuple, since it is cached: a fold goes through fold)"""
+        if self.active_list is None:
+            self.active_list = tuple(player for seat, player in enumerate(self.players) if self.active_mask >> seat & 1)
+        return self.active_list
+
+    def is_active(self, player: Player) -> bool:
+        """Is the player dealt in the hand and still in it"""
+        seat: int | None = self.seats.get(player)
+        return seat is not None and self.active_mask >> seat & 1 == 1
+
+    def fold(self, player: Player) -> None:
+        seat_bit: int = 1 << self.seats[player]
+        if self.active_mask & seat_bit:
+            self.active_mask ^= seat_bit
+            self.active_count -= 1
+            self.active_list = None
+
+    def add_bet(self, player: Player, amount: int) -> None:
+        """Count the `amount` tokens a player just added to its bet (player.current_bet already includes them)"""
+        self.pot += amount
+        if player.current_bet > self.highest:
+            self.highest = player.current_bet
+
+    def reset_bets(self) -> None:
+        self.pot = 0
+        self.highest = 0
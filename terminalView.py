@@ -0,0 +1,91 @@
+# External libraries
+import os
+from termcolor import colored
+from time import sleep
+from typing import Callable
+
+# Internal libraries
+from gameEvents import ActionEvent, ActionRequest, GameEvent, GameOverEvent, PayoutEvent
+from player import Player, PlayerAction
+
+
+class TerminalView:
+    """Terminal interface of a game, built on its events (GameManager gives it every event as a listener)
+
+    The players of the terminal are asked their actions when the game requests them, and the answer is sent back
+    to the game (see gameEvents.notify)."""
+    def __init__(self, output: Callable = print, pause: bool = False, action_delay: float = 0, players: list[Player] | None = None,
+                 read_input: Callable[[str], str] = input) -> None:
+        self.output: Callable = output
+        self.read_input: Callable[[str], str] = read_input
+        self.pause: bool = pause # Wait for Enter after each hand and clear the screen
+        self.action_delay: float = action_delay # Seconds to wait after each action
+        self.players: list[Player] = list(players or []) # People playing at this terminal
+        self.handlers: dict[type: Callable] = {
+            ActionRequest: self.show_action_request,
+            ActionEvent: self.show_action,
+            PayoutEvent: self.show_payout,
+            GameOverEvent: self.show_game_over
+        }
+
+    def __call__(self, event: GameEvent) -> PlayerAction | None:
+        handler: Callable | None = self.handlers.get(type(event))
+        if handler is not None:
+            return handler(event)
+        return None
+
+    def show_action_request(self, event: ActionRequest) -> PlayerAction | None:
+        """Show whose turn it is, and return the action of a player of this terminal"""
+        player = event.player
+        self.output("--------------------------------------------------------------------------------------------------")
+        self.output(colored(f"Player {player.name}", "yellow", attrs=["bold"]))
+        self.output(f"The highest bet is: {event.highest_bet}")
+        self.output(f"Your current bet is: {player.current_bet}")
+        self.output(f"Total tokens: {player.total_tokens} tokens.\n")
+        if player in self.players:
+            return self.ask_action(event)
+        return None
+
+    def ask_action(self, event: ActionRequest) -> PlayerAction:
+        """Ask the requested player an action until it is one of the possible actions"""
+        player, table, possible_actions = event.player, event.table, event.possible_actions
+        # If the player has no more tokens, he can't do anything other than waiting for the other players to finish the round
+        if possible_actions[0] == PlayerAction.NONE:
+            self.output("You have no more tokens. You can't play anymore.")
+            return PlayerAction.NONE
+
+        # While the player doesn't choose a valid action, we ask him to choose one
+        while True:
+            try:
+                best_combination, best_combination_cards = player.get_combination(table)
+
+                # TODO : color code for the combination
+                # TODO : print better (not lists)
+
+                self.output(f"Hand: {player.hand} | Table: {table}")
+                self.output(f"Your current combination: {best_combination.name.replace("_", " ")} | Cards: {best_combination_cards}\n")
+                self.output(f"Choose an action: {list(map(lambda x: x.value.capitalize(), possible_actions))}")
+
+                action = PlayerAction(str(self.read_input("Action: ")).capitalize())
+                if action in possible_actions:
+                    return action
+
+                self.output(f"Invalid action. Please choose one of the following: {possible_actions}")
+
+            except ValueError:
+                self.output(f"Invalid action. Please choose one of the following: {possible_actions}")
+
+    def show_action(self, event: ActionEvent) -> None:
+        if self.action_delay:
+            sleep(self.action_delay)
+
+    def show_payout(self, event: PayoutEvent) -> None:
+        for winner in event.winners:
+            combination, combination_cards = winner.get_combination(event.table)
+            self.output(f"Player {winner} won {event.payouts[winner]} tokens with a {combination.name.replace("_", " ")} : {combination_cards} !")
+        if self.pause:
+            input("Press Enter to continue...")
+            os.system("cls")
+
+    def show_game_over(self, event: GameOverEvent) -> None:
+        self.output(f"Player {event.winner} won the game with {event.winner.total_tokens} tokens !")
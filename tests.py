@@ -1,10 +1,583 @@
+# External libraries
+import asyncio
+import math
+import threading
+import random
+import time
+from collections import Counter
+from itertools import combinations, permutations
+
+import pytest
 from termcolor import colored
 
-print(colored("This is grey text", "grey"))
-print(colored("This is red text", "red"))
-print(colored("This is green text", "green"))
-print(colored("This is yellow text", "yellow"))
-print(colored("This is blue text", "blue"))
-print(colored("This is magenta text", "magenta"))
-print(colored("This is cyan text", "cyan"))
-print(colored("This is white text", "white"))
\ No newline at end of file
+# Internal libraries
+from card import CARDS, Card, CardSuits
+from cfrBot import CFRBot
+from cfrSolver import BIG_BLIND, DEFAULT_STACK_BLINDS, get_default_policy
+from combinationHandler import CombinationHandler
+from deck import Deck
+from equity import EquityResult, exact_equity
+from equityBot import EquityBot
+from gameEvents import ActionEvent, ActionRequest, GameSession
+from gameManager import BLINDS_AMOUNT, GameManager
+from handEvaluator import evaluate, make_rank, rank_category
+from handHistory import CODE_ACTIONS, HandHistoryRecorder, HandRecord, HandRecorder, read_hand_history, replay_hand
+from handRange import COMBOS, parse_range, range_vs_range_equity
+from handStore import HandStore, HandStoreWriter
+from instrumentation import DECISION_LABEL, Instrumentation
+from player import STARTING_TOKENS, Player, PlayerAction
+from playerBot import Bot
+from potSettlement import build_pots, settle_pots
+from randomGenerator import RandomGenerator
+from tableState import TableState
+from tableServer import RemotePlayer, Table, TableServer
+from terminalView import TerminalView
+
+H, D, C, S = CardSuits.HEARTS, CardSuits.DIAMONDS, CardSuits.CLUBS, CardSuits.SPADES
+
+
+# Hand evaluator
+def brute_force_rank(five: tuple[Card, ...]) -> tuple[int, list[int]]:
+    """Category and ordered values of exactly 5 cards, straight from the poker rules"""
+    values: list[int] = sorted((card.value for card in five), reverse=True)
+    flush: bool = len({card.suit for card in five}) == 1
+    distinct: list[int] = sorted(set(values), reverse=True)
+    straight: int = 0
+    if len(distinct) == 5 and distinct[0] - distinct[4] == 4:
+        straight = distinct[0]
+    elif distinct == [14, 5, 4, 3, 2]: # Wheel, the ace plays low
+        straight = 5
+    groups: list[tuple[int, int]] = sorted(Counter(values).items(), key=lambda group: (group[1], group[0]), reverse=True)
+    shape: list[int] = [count for _, count in groups]
+    order: list[int] = [value for value, _ in groups]
+    if straight and flush:
+        return (10 if straight == 14 else 9, [straight])
+    if shape[0] == 4:
+        return (8, order)
+    if shape == [3, 2]:
+        return (7, order)
+    if flush:
+        return (6, values)
+    if straight:
+        return (5, [straight])
+    if shape[0] == 3:
+        return (4, order)
+    if shape[:2] == [2, 2]:
+        return (3, order)
+    return (2 if shape[0] == 2 else 1, order)
+
+def brute_force_best(cards: list[Card]) -> int:
+    """Rank of the best 5 cards hand among all the 5 of 7 choices"""
+    return max(make_rank(*brute_force_rank(five)) for five in combinations(cards, 5))
+
+def test_evaluator_matches_brute_force_on_random_hands():
+    rng = random.Random(0)
+    for _ in range(3000):
+        cards = rng.sample(CARDS, 7)
+        rank = evaluate(cards)
+        assert rank == brute_force_best(cards), cards
+        assert CombinationHandler(cards).combination[0].value == rank_category(rank)
+
+def test_evaluator_matches_brute_force_on_edge_cases():
+    hands = [
+        [Card(14, H), Card(2, D), Card(3, C), Card(4, S), Card(5, H), Card(9, D), Card(11, C)], # Wheel
+        [Card(14, S), Card(13, S), Card(12, S), Card(11, S), Card(10, S), Card(9, S), Card(2, H)], # Royal flush over a straight flush
+        [Card(6, H), Card(5, H), Card(4, H), Card(3, H), Card(2, H), Card(14, H), Card(7, D)], # Straight flush beside an ace high flush
+        [Card(9, H), Card(9, D), Card(9, C), Card(4, S), Card(4, H), Card(4, D), Card(2, C)], # Two three of a kind
+        [Card(8, H), Card(8, D), Card(6, C), Card(6, S), Card(3, H), Card(3, D), Card(13, C)], # Three pairs
+        [Card(7, H), Card(7, D), Card(7, C), Card(7, S), Card(12, H), Card(12, D), Card(12, C)], # Four of a kind and a full house
+        [Card(2, H), Card(7, H), Card(9, H), Card(11, H), Card(13, H), Card(3, H), Card(5, D)], # Six cards flush
+    ]
+    for cards in hands:
+        assert evaluate(cards) == brute_force_best(cards), cards
+
+
+
+# Exact equity
+EQUITY_SPOTS: list[tuple[list[list[Card]], list[Card], list[Card]]] = [ # Hands, board, dead cards
+    ([[Card(14, H), Card(13, H)], [Card(12, H), Card(11, H)]], [Card(2, H), Card(3, H), Card(4, D)], []),
+    ([[Card(14, H), Card(14, D)], [Card(13, S), Card(13, C)]], [Card(9, H), Card(9, D), Card(9, S)], []),
+    ([[Card(14, H), Card(13, D)], [Card(8, S), Card(7, S)], [Card(2, C), Card(2, H)]], [Card(9, S), Card(6, S), Card(12, C)], []),
+    ([[Card(14, H), Card(13, D)], [Card(8, S), Card(7, S)]], [Card(9, S), Card(6, S), Card(12, C), Card(2, D)], [Card(5, S)]),
+    ([[Card(14, H), Card(14, D)], [Card(13, S), Card(13, C)]], [Card(7, C), Card(2, D)], []), # Many symmetric runouts
+]
+
+def brute_force_equity(hands: list[list[Card]], board: list[Card], dead: list[Card]) -> list[EquityResult]:
+    """Equity of each hand from every runout of the board, without any suit reduction"""
+    known: set[Card] = {card for hand in hands for card in hand} | set(board) | set(dead)
+    results: list[EquityResult] = [EquityResult() for _ in hands]
+    for runout in combinations([card for card in CARDS if card not in known], 5 - len(board)):
+        ranks: list[int] = [evaluate(hand + board + list(runout)) for hand in hands]
+        winners: int = ranks.count(max(ranks))
+        for result, rank in zip(results, ranks):
+            result.samples += 1
+            if rank == max(ranks):
+                result.wins += winners == 1
+                result.ties += winners > 1
+                result.equity_sum += 1 / winners
+    return results
+
+def test_exact_equity_matches_brute_force():
+    for hands, board, dead in EQUITY_SPOTS:
+        for exact, brute_force in zip(exact_equity(hands, board, dead), brute_force_equity(hands, board, dead)):
+            assert (exact.samples, exact.wins, exact.ties) == (brute_force.samples, brute_force.wins, brute_force.ties)
+            assert abs(exact.equity - brute_force.equity) < 1e-9
+
+def test_exact_equity_is_suit_isomorphism_invariant():
+    """Renaming the suits of every card changes no result"""
+    suits: list[CardSuits] = list(CardSuits)
+    for hands, board, dead in EQUITY_SPOTS:
+        reference: list[EquityResult] = exact_equity(hands, board, dead)
+        for suits_permutation in list(permutations(suits))[1::5]:
+            rename = lambda cards: [Card(card.value, suits_permutation[suits.index(card.suit)]) for card in cards]
+            renamed: list[EquityResult] = exact_equity([rename(hand) for hand in hands], rename(board), rename(dead))
+            for result, renamed_result in zip(reference, renamed):
+                assert (result.samples, result.wins, result.ties) == (renamed_result.samples, renamed_result.wins, renamed_result.ties)
+                assert abs(result.equity - renamed_result.equity) < 1e-9
+
+
+
+# Range vs range equity
+def test_parse_range_weights():
+    assert [int(parse_range(notation).sum()) for notation in ("AA", "AKs", "AKo", "AK", "TT+", "A2s+", "22-55", "A2s-A5s")] == [6, 4, 12, 16, 30, 48, 24, 16]
+    weights = parse_range("AhKd, QQ:0.5")
+    assert weights.sum() == 4 and sorted(set(weights.tolist())) == [0, 0.5, 1]
+
+def test_range_vs_range_matches_weighted_combos():
+    """The equity of a range is the average of the exact equities of every pair of combos, weighted by both ranges"""
+    hero, villain = parse_range("AK, QQ"), parse_range("98s, JJ:0.5, 66:0.25")
+    board: list[Card] = [Card(9, S), Card(6, S), Card(12, C), Card(2, D)]
+    equity_sum = weights_sum = 0.0
+    hero_equity_sum: dict[int: float] = {}
+    hero_weights_sum: dict[int: float] = {}
+    for hero_combo in hero.nonzero()[0].tolist():
+        hero_hand: list[Card] = [CARDS[index] for index in COMBOS[hero_combo].tolist()]
+        for villain_combo in villain.nonzero()[0].tolist():
+            villain_hand: list[Card] = [CARDS[index] for index in COMBOS[villain_combo].tolist()]
+            if set(hero_hand + board) & set(villain_hand) or set(hero_hand) & set(board):
+                continue
+            weight: float = hero[hero_combo] * villain[villain_combo]
+            equity: float = exact_equity([hero_hand, villain_hand], board)[0].equity
+            equity_sum += weight * equity
+            weights_sum += weight
+            hero_equity_sum[hero_combo] = hero_equity_sum.get(hero_combo, 0.0) + weight * equity
+            hero_weights_sum[hero_combo] = hero_weights_sum.get(hero_combo, 0.0) + weight
+
+    result = range_vs_range_equity(hero, villain, board)
+    assert abs(result.equity - equity_sum / weights_sum) < 1e-9
+    for combo, combo_equity_sum in hero_equity_sum.items():
+        assert abs(result.combos_equity[combo] - combo_equity_sum / hero_weights_sum[combo]) < 1e-9
+    assert math.isnan(result.combos_equity[parse_range("QcQd").nonzero()[0][0]]) # Blocked by the board
+
+def test_range_vs_range_only_depends_on_relative_weights():
+    board: list[Card] = [Card(9, S), Card(6, S), Card(12, C), Card(2, D)]
+    hero, villain = parse_range("AK, QQ"), parse_range("98s, JJ:0.5, 66")
+    reference: float = range_vs_range_equity(hero, villain, board).equity
+    assert abs(range_vs_range_equity(hero * 3, villain * 0.2, board).equity - reference) < 1e-6
+    assert abs(range_vs_range_equity(hero, villain + parse_range("72o:0"), board).equity - reference) < 1e-9
+
+
+
+# Hand history
+class KeepingRecorder(HandHistoryRecorder):
+    """Hand history recorder that also keeps the records it writes"""
+    def __init__(self, path) -> None:
+        super().__init__(path)
+        self.records: list[HandRecord] = []
+
+    def write_record(self, record: HandRecord) -> None:
+        self.records.append(record)
+        super().write_record(record)
+
+def record_games(path, games_nbr: int = 5) -> list[HandRecord]:
+    """Play seeded headless games into a hand history file, and return the records as they were written"""
+    with KeepingRecorder(path) as recorder:
+        for seed in range(games_nbr):
+            random.seed(seed)
+            GameManager(random.randint(2, 9), headless=True, recorder=recorder).play()
+    return recorder.records
+
+def test_hand_recorder_is_abstract():
+    with pytest.raises(TypeError):
+        HandRecorder()
+
+def test_hand_history_round_trip(tmp_path):
+    for name in ("hands.bin", "hands.bin.gz"):
+        written: list[HandRecord] = record_games(tmp_path / name)
+        assert written and list(read_hand_history(tmp_path / name)) == written
+
+def test_hand_history_replays_to_the_recorded_stacks(tmp_path):
+    for record in record_games(tmp_path / "hands.bin"):
+        game: GameManager = replay_hand(record)
+        stacks: dict[str: int] = {player.name: player.total_tokens for player in game.players} # Busted players are eliminated
+        assert stacks == {name: stack for name, stack in zip(record.seats, record.final_stacks) if stack > 0}
+
+
+
+# Hand store
+def test_hand_store_counts_the_blinds_of_a_walk(tmp_path):
+    """The big blind wins when the small blind folds: both blinds are in the pot, though the big blind never acted"""
+    record: HandRecord = HandRecord(hand_id=0, blind_level=1, seats=["small", "big"], stacks=[9000, 51000], hands=[[0, 1], [2, 3]],
+                                    blinds=[500, 1000], actions=[CODE_ACTIONS.index(PlayerAction.FOLD), 500], winners=[1],
+                                    final_stacks=[8500, 51500])
+    with HandStoreWriter(tmp_path / "store") as writer:
+        writer.write_record(record)
+    store: HandStore = HandStore(tmp_path / "store")
+    assert store["pot"][0] == 1500
+    assert store["invested"].tolist() == [500, 1000]
+    assert store["winnings"].tolist() == [-500, 500]
+
+def test_hand_store_pots_match_the_recorded_chips(tmp_path):
+    """Every token won was invested by someone, and the pot is what the players put in"""
+    with HandStoreWriter(tmp_path / "store") as writer:
+        records: list[HandRecord] = record_games(tmp_path / "hands.bin")
+        for record in records:
+            writer.write_record(record)
+    store: HandStore = HandStore(tmp_path / "store")
+    invested, winnings = store["invested"].astype("<i8"), store["winnings"]
+    for hand in range(len(store)):
+        rows: slice = store.get_hand_rows(hand)
+        assert store["pot"][hand] == invested[rows].sum()
+        assert winnings[rows].sum() == 0
+        assert (winnings[rows] >= -invested[rows]).all()
+        assert (invested[rows] >= records[hand].blinds).all()
+
+
+
+
+# Side pots
+def bet_players(bets: list[int]) -> list[Player]:
+    players: list[Player] = [Player(str(seat)) for seat in range(len(bets))]
+    for player, bet in zip(players, bets):
+        player.bet(bet)
+    return players
+
+def test_side_pots_of_an_all_in_for_less():
+    short, big, caller = bet_players([1000, 3000, 3000])
+    pots = build_pots([short, big, caller], [short, big, caller])
+    assert [(pot.amount, pot.eligible) for pot in pots] == [(3000, [short, big, caller]), (4000, [big, caller])]
+    assert settle_pots(pots, {short: 3, big: 2, caller: 1}) == {short: 3000, big: 4000}
+    assert settle_pots(pots, {short: 1, big: 2, caller: 2}) == {big: 3500, caller: 3500}
+
+def test_side_pots_keep_the_bets_of_folded_players():
+    folded, short, big = bet_players([2500, 1000, 4000])
+    pots = build_pots([folded, short, big], [short, big])
+    assert [pot.amount for pot in pots] == [3000, 4500]
+    assert settle_pots(pots, {short: 2, big: 1}) == {short: 3000, big: 4500}
+
+def test_side_pots_give_the_odd_chips_to_the_first_winners():
+    first, second, third = bet_players([1001, 1000, 1000])
+    payouts = settle_pots(build_pots([first, second, third], [first, second, third]), {first: 1, second: 1, third: 1})
+    assert payouts == {first: 1001, second: 1000, third: 1000}
+    first, second, folded = bet_players([500, 500, 1])
+    assert settle_pots(build_pots([first, second, folded], [first, second]), {first: 1, second: 1}) == {first: 501, second: 500}
+
+def test_side_pots_conserve_chips():
+    rng = random.Random(0)
+    for _ in range(2000):
+        players: list[Player] = bet_players([rng.choice((0, 1, 250, 500, 999, 1000, 3000, 10_000)) for _ in range(rng.randint(2, 9))])
+        active: list[Player] = [player for player in players if rng.random() < 0.7] or players[:1]
+        pots = build_pots(players, active)
+        payouts: dict[Player: int] = settle_pots(pots, {player: rng.randint(0, 3) for player in active})
+        assert sum(pot.amount for pot in pots) == sum(payouts.values()) == sum(player.current_bet for player in players)
+        assert set(payouts) <= set(active)
+
+def test_games_conserve_chips():
+    for seed in range(30):
+        random.seed(seed)
+        players_nbr: int = random.randint(2, 9)
+        game: GameManager = GameManager(players_nbr, headless=True)
+        while len(game.players) > 1:
+            game.play_round()
+            assert sum(player.total_tokens for player in game.players) == players_nbr * STARTING_TOKENS
+
+def test_tables_settled_in_batch_play_like_single_games():
+    seeds: list[int] = RandomGenerator(5).seeds(20)
+    single: list[GameManager] = [GameManager(6, headless=True, rng=RandomGenerator(seed)) for seed in seeds]
+    for game in single:
+        game.play()
+    batch: list[GameManager] = [GameManager(6, headless=True, rng=RandomGenerator(seed)) for seed in seeds]
+    GameManager.play_tables(batch)
+    summary = lambda games: [(game.turns, [(player.name, player.total_tokens) for player in game.players]) for game in games]
+    assert summary(batch) == summary(single)
+
+
+
+
+
+def test_active_players_follow_the_folds():
+    """The cached players still in the hand can't be changed by a caller, only by a fold"""
+    players: list[Player] = bet_players([50, 100, 100])
+    state: TableState = TableState(players)
+    active_players = state.active_players
+    with pytest.raises(AttributeError):
+        active_players.remove(players[0])
+    state.fold(players[0])
+    assert state.active_players == (players[1], players[2]) and state.active_count == 2
+    assert active_players == tuple(players)
+
+# Events and views
+class TerminalPlayer(Player):
+    """Person at a terminal, who must never be asked outside of the view"""
+    def choose_action(self, table: list[Card], highest_player_bet: int, pot: int = 0, opponents_nbr: int = 1) -> PlayerAction:
+        raise AssertionError("the view didn't answer the action request")
+
+def scripted_view(player: Player, lines: list[str]) -> TerminalView:
+    """View whose player types an invalid action, then always calls, checks or goes all in"""
+    typed: list[str] = ["bet"]
+
+    def read_input(prompt: str) -> str:
+        if typed:
+            return typed.pop()
+        return "call" if "'Call'" in lines[-1] else "check" if "'Check'" in lines[-1] else "all in"
+    return TerminalView(lines.append, players=[player], read_input=read_input)
+
+def test_view_answers_the_human_seat_in_played_games():
+    lines: list[str] = []
+    human: TerminalPlayer = TerminalPlayer("me")
+    game: GameManager = GameManager(3, headless=True, players=[Bot("0"), Bot("1"), human], rng=RandomGenerator(2),
+                                    listeners=[scripted_view(human, lines)])
+    for _ in range(5):
+        game.play_round()
+    assert any(line.startswith("Invalid action") for line in lines)
+    assert any(line.startswith("Hand:") for line in lines)
+
+def test_view_answers_the_human_seat_in_sessions():
+    lines: list[str] = []
+    human: TerminalPlayer = TerminalPlayer("me")
+    game: GameManager = GameManager(3, headless=True, players=[Bot("0"), Bot("1"), human], rng=RandomGenerator(2),
+                                    listeners=[scripted_view(human, lines)])
+    session: GameSession = GameSession(game)
+    requests: int = 0
+    while (event := session.next_event()) is not None and game.turns < 5:
+        requests += isinstance(event, ActionRequest) and event.player is human
+    assert requests > 0
+
+
+
+def test_answers_that_cant_be_played_are_replaced():
+    """A listener always answering CHECK (even facing a bet), stepped by a session: only possible actions are played"""
+    for seed in range(3):
+        game: GameManager = GameManager(3, headless=True, players=[EquityBot(str(index), max_samples=50) for index in range(3)],
+                                        rng=RandomGenerator(seed))
+        possible_actions: list[PlayerAction] = []
+
+        def always_check(event) -> PlayerAction:
+            nonlocal possible_actions
+            if isinstance(event, ActionRequest):
+                possible_actions = list(event.possible_actions)
+            elif isinstance(event, ActionEvent):
+                assert event.action in possible_actions
+            return PlayerAction.CHECK # Also answered to the showdowns, which must not take it for the powers
+        game.listeners.append(always_check)
+        session: GameSession = GameSession(game)
+        while session.next_event() is not None and game.turns < 10:
+            pass
+
+# Table server
+class LineWriter:
+    """Stands for the stream writer of a client, keeping the lines sent to it"""
+    def __init__(self) -> None:
+        self.lines: list[str] = []
+
+    def write(self, data: bytes) -> None:
+        self.lines.append(data.decode().strip())
+
+    def close(self) -> None:
+        pass
+
+def test_late_answers_are_not_used_for_the_next_request():
+    async def play() -> None:
+        server: TableServer = TableServer(action_timeout=0.05)
+        table: Table = Table(0, 1, 1, server.rng, server)
+        player: RemotePlayer = RemotePlayer("alice", LineWriter())
+        possible_actions: list[PlayerAction] = [PlayerAction.FOLD, PlayerAction.CALL, PlayerAction.RAISE, PlayerAction.ALL_IN]
+        request: ActionRequest = ActionRequest(player, [], 500, 750, 1, possible_actions)
+        assert await table.ask(player, request) == PlayerAction.FOLD # Timed out
+        player.lines.put_nowait("all_in") # Answer of the first request, after its timeout
+        asyncio.get_running_loop().call_later(0.01, player.lines.put_nowait, "raise 1") # Tagged with the first request's id
+        asyncio.get_running_loop().call_later(0.02, player.lines.put_nowait, "call 2")
+        assert await table.ask(player, request) == PlayerAction.CALL
+        assert player.writer.lines == ["REQUEST 1 500 750 fold call raise all_in", "TIMEOUT fold", "REQUEST 2 500 750 fold call raise all_in"]
+        server.executor.shutdown()
+    asyncio.run(play())
+
+def test_names_already_at_the_table_are_refused():
+    async def join(server: TableServer, name: str) -> list[str]:
+        reader: asyncio.StreamReader = asyncio.StreamReader()
+        reader.feed_data(f"JOIN {name}\n".encode())
+        reader.feed_eof()
+        writer: LineWriter = LineWriter()
+        await server.handle_client(reader, writer)
+        return writer.lines
+
+    async def play() -> list[list[str]]:
+        server: TableServer = TableServer()
+        server.tables.append(Table(0, 2, 3, server.rng, server))
+        answers: list[list[str]] = [await join(server, name) for name in ("alice", "alice", "Bot1", "bob")]
+        server.executor.shutdown()
+        return answers
+    alice, second_alice, bot, bob = asyncio.run(play())
+    assert alice == ["WELCOME 0 alice"] and bob == ["WELCOME 0 bob"]
+    assert second_alice == bot == ["ERROR name taken"]
+
+class ThreadCFRBot(CFRBot):
+    """CFR bot keeping the threads its decisions ran in"""
+    def __init__(self, name: str) -> None:
+        super().__init__(name)
+        self.threads: set[threading.Thread] = set()
+
+    def choose_action(self, table: list[Card], highest_player_bet: int, pot: int = 0, opponents_nbr: int = 1) -> PlayerAction:
+        self.threads.add(threading.current_thread())
+        return super().choose_action(table, highest_player_bet, pot, opponents_nbr)
+
+def test_slow_bots_decide_in_the_executor():
+    async def play() -> tuple[list[Player], list[ThreadCFRBot]]:
+        server: TableServer = TableServer(seed=1)
+        made: list[ThreadCFRBot] = []
+
+        def make_bot(name: str) -> ThreadCFRBot:
+            made.append(ThreadCFRBot(name))
+            return made[-1]
+
+        server.add_table(3, bot_factory=make_bot)
+        given: list[Player] = [ThreadCFRBot("given"), Bot("rules")]
+        server.add_table(players=given)
+        winners: list[Player] = await server.wait_tables()
+        await server.close()
+        return winners, made + given[:1]
+    winners, bots = asyncio.run(play())
+    assert len(winners) == 2 and len(bots) == 4
+    assert all(bot.threads and threading.main_thread() not in bot.threads for bot in bots)
+
+
+# Instrumentation
+class SlowBot(Bot):
+    """Bot taking at least a millisecond to decide"""
+    def choose_action(self, table: list[Card], highest_player_bet: int, pot: int = 0, opponents_nbr: int = 1) -> PlayerAction:
+        time.sleep(0.001)
+        return super().choose_action(table, highest_player_bet, pot, opponents_nbr)
+
+def test_round_timings_exclude_the_decisions():
+    game: GameManager = GameManager(3, headless=True, players=[SlowBot(str(seat)) for seat in range(3)], rng=RandomGenerator(1))
+    requests: list[ActionRequest] = []
+    game.listeners.append(lambda event: requests.append(event) if isinstance(event, ActionRequest) else None)
+    with Instrumentation() as instrumentation:
+        for _ in range(3):
+            game.play_round()
+    decisions = instrumentation.timings[DECISION_LABEL]
+    assert decisions.count == len(requests) >= 3 # Once per decision, though SlowBot calls Bot.choose_action
+    assert instrumentation.timings["GameManager.iter_round"].total < instrumentation.decisions_time
+    assert instrumentation.decisions_time >= decisions.count * 1_000_000
+
+def test_timed_steps_delegate_throw_and_close():
+    closed: list[bool] = []
+
+    def steps():
+        try:
+            while True:
+                try:
+                    yield "step"
+                except ValueError:
+                    yield "caught"
+        finally:
+            closed.append(True)
+
+    instrumentation: Instrumentation = Instrumentation()
+    timed_steps = instrumentation.wrap(steps, "steps")()
+    assert next(timed_steps) == "step"
+    assert timed_steps.throw(ValueError()) == "caught"
+    timed_steps.close()
+    assert closed == [True] and instrumentation.timings["steps"].count == 1
+
+def test_closing_a_session_closes_its_round():
+    with Instrumentation() as instrumentation:
+        session: GameSession = GameSession(GameManager(3, headless=True, rng=RandomGenerator(1)))
+        for _ in range(3):
+            session.next_event()
+        session.close()
+        assert session.next_event() is None
+        assert instrumentation.timings["GameManager.iter_round"].count == 1
+
+
+# Random streams
+def test_spawned_streams_never_repeat_indexed_streams():
+    rng: RandomGenerator = RandomGenerator(7)
+    first_draws = lambda streams: {tuple(stream.generator.random(4).tolist()) for stream in streams}
+    indexed = first_draws([rng.stream(index) for index in range(16)])
+    spawned = first_draws(rng.spawn(8) + rng.spawn(8))
+    assert len(indexed) == len(spawned) == 16 and not indexed & spawned
+    assert first_draws([RandomGenerator(7).stream(3)]) <= indexed
+
+def test_permutations_are_dealt_from_their_end():
+    order: list[int] = RandomGenerator(7).permutations(1)[0].tolist()
+    assert sorted(order) == list(range(52))
+    deck: Deck = Deck()
+    deck.build_deck(order=order)
+    assert [deck.draw().index for _ in range(5)] == order[::-1][:5]
+
+
+# Bots
+def test_bot_decides_postflop_after_actions_sent_for_it():
+    """Preflop actions sent through a session never reach choose_action, the bot still decides after the flop"""
+    for seed in range(5):
+        game: GameManager = GameManager(3, headless=True, rng=RandomGenerator(seed))
+        session: GameSession = GameSession(game)
+        postflop_decisions: int = 0
+        event = session.next_event()
+        while event is not None and game.turns < 20:
+            action: PlayerAction | None = None
+            if isinstance(event, ActionRequest):
+                if event.table:
+                    postflop_decisions += isinstance(event.player, Bot)
+                else:
+                    action = next(action for action in event.possible_actions if action != PlayerAction.FOLD)
+            event = session.next_event(action)
+        assert postflop_decisions > 0
+
+def test_equity_bots_only_play_possible_actions():
+    """Every action an EquityBot plays is one of the possible actions of its request, even when it can't cover a call"""
+    for seed in range(5):
+        game: GameManager = GameManager(4, headless=True, players=[EquityBot(str(index), max_samples=100) for index in range(4)],
+                                        rng=RandomGenerator(seed))
+        possible_actions: list[PlayerAction] = []
+
+        def check_action(event) -> None:
+            nonlocal possible_actions
+            if isinstance(event, ActionRequest):
+                possible_actions = list(event.possible_actions)
+            elif isinstance(event, ActionEvent):
+                assert event.action in possible_actions
+        game.listeners.append(check_action)
+        game.play()
+
+def test_equity_bot_needs_samples():
+    with pytest.raises(ValueError):
+        EquityBot("0", max_samples=0)
+
+
+# CFR policy
+def test_cfr_policy_has_the_game_stack():
+    assert DEFAULT_STACK_BLINDS == 20
+    assert get_default_policy().stack == DEFAULT_STACK_BLINDS * BIG_BLIND
+
+def test_cfr_policy_finds_the_opening_spot():
+    """The small blind of a new game, first to act preflop, is an infoset of the shipped policy"""
+    policy = get_default_policy()
+    small_blind, big_blind = BLINDS_AMOUNT[0] // 2, BLINDS_AMOUNT[0]
+    assert small_blind * policy.stack / STARTING_TOKENS == 1 # In units of the abstract game: a small blind against a big blind
+    assert (0, 1, 2) in policy.infoset_indexes
+    for bucket in range(policy.buckets):
+        strategy = policy.get_strategy(0, small_blind, big_blind, STARTING_TOKENS, bucket)
+        assert strategy is not None and abs(sum(strategy.values()) - 1) < 1e-2
+
+
+if __name__ == "__main__":
+    print(colored("This is grey text", "grey"))
+    print(colored("This is red text", "red"))
+    print(colored("This is green text", "green"))
+    print(colored("This is yellow text", "yellow"))
+    print(colored("This is blue text", "blue"))
+    print(colored("This is magenta text", "magenta"))
+    print(colored("This is cyan text", "cyan"))
+    print(colored("This is white text", "white"))
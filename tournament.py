@@ -0,0 +1,109 @@
+# External libraries
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Callable, Iterator
+
+# Internal libraries
+from gameManager import GameManager
+from randomGenerator import RandomGenerator
+
+
+@dataclass
+class GameResult:
+    seed: int
+    winner: str
+    rounds: int
+    blind_level: int # Index of the blind level reached (in GameManager.blinds_amount)
+    starting_stacks: dict[str: int]
+    final_stacks: dict[str: int] # Tokens of every starting player at the end of the game (0 once eliminated)
+
+
+@dataclass
+class TournamentStats:
+    games: int = 0
+    rounds: int = 0
+    wins: dict[str: int] = field(default_factory=dict)
+    chips: dict[str: int] = field(default_factory=dict) # Sum of the tokens won (or lost if negative) by each player
+    blind_levels: dict[int: int] = field(default_factory=dict) # Number of games that ended at each blind level
+
+    def add(self, result: GameResult) -> None:
+        """Add the result of a game to the statistics"""
+        self.games += 1
+        self.rounds += result.rounds
+        self.wins[result.winner] = self.wins.get(result.winner, 0) + 1
+        for name, stack in result.final_stacks.items():
+            self.wins.setdefault(name, 0)
+            self.chips[name] = self.chips.get(name, 0) + stack - result.starting_stacks[name]
+        self.blind_levels[result.blind_level] = self.blind_levels.get(result.blind_level, 0) + 1
+
+    def win_rate(self, name: str) -> float:
+        return self.wins[name] / self.games
+
+    def chip_ev(self, name: str) -> float:
+        """Average number of tokens won (or lost if negative) by a player per game"""
+        return self.chips[name] / self.games
+
+    def table(self) -> str:
+        """Return the statistics of every player as a text table"""
+        lines: list[str] = [f"{self.games} games | {self.rounds} rounds | {self.rounds / max(self.games, 1):.1f} rounds per game",
+                            f"{'Player':>8} {'Win rate':>10} {'Chip EV':>12}"]
+        for name in sorted(self.wins, key=lambda name: (len(name), name)):
+            lines.append(f"{name:>8} {self.win_rate(name):>10.2%} {self.chip_ev(name):>12.1f}")
+        lines.append("Blind levels reached: " + " | ".join(f"{level}: {count}" for level, count in sorted(self.blind_levels.items())))
+        return "\n".join(lines)
+
+
+def play_game(player_nbr: int, seed: int) -> GameResult:
+    """Play a headless game of bots whose deck and bots only draw from random streams derived from the seed"""
+    game: GameManager = GameManager(player_nbr, headless=True, rng=RandomGenerator(seed))
+    starting_stacks: dict[str: int] = {player.name: player.total_tokens for player in game.players}
+    winner = game.play()
+    final_stacks: dict[str: int] = {name: 0 for name in starting_stacks} | {player.name: player.total_tokens for player in game.players}
+    return GameResult(seed=seed, winner=winner.name, rounds=game.turns, blind_level=game.current_blind_index,
+                      starting_stacks=starting_stacks, final_stacks=final_stacks)
+
+def play_games(player_nbr: int, seeds: list[int]) -> list[GameResult]:
+    """Play a batch of games in a worker (batching keeps the inter-process traffic low)"""
+    return [play_game(player_nbr, seed) for seed in seeds]
+
+def iter_tournament(games: int, player_nbr: int, workers: int | None = None, seed: int | None = None,
+                    batch_size: int = 50) -> Iterator[GameResult]:
+    """Play `games` headless games spread over a process pool and yield their results as soon as they are done
+
+    Every game gets its own seed drawn from `seed`, so a seeded tournament gives the same results (in a possibly
+    different order) whatever the number of workers."""
+    seeds: list[int] = RandomGenerator(seed).seeds(games)
+    batches: list[list[int]] = [seeds[start:start + batch_size] for start in range(0, games, batch_size)]
+
+    workers = os.cpu_count() if workers is None else workers
+    if workers <= 1:
+        for batch in batches:
+            yield from play_games(player_nbr, batch)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(play_games, player_nbr, batch) for batch in batches]
+        for future in as_completed(futures):
+            yield from future.result()
+
+def run_tournament(games: int, player_nbr: int, workers: int | None = None, seed: int | None = None,
+                   batch_size: int = 50, on_result: Callable[[GameResult], None] | None = None) -> TournamentStats:
+    """Play `games` headless games in parallel and aggregate their results (on_result is called for each game)"""
+    stats: TournamentStats = TournamentStats()
+    for result in iter_tournament(games, player_nbr, workers, seed, batch_size):
+        stats.add(result)
+        if on_result is not None:
+            on_result(result)
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play many headless games of bots and print their statistics")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--players", type=int, default=6)
+    parser.add_argument("--workers", type=int, default=None, help="number of processes (default: one per core)")
+    parser.add_argument("--seed", type=int, default=None)
+    arguments = parser.parse_args()
+    print(run_tournament(arguments.games, arguments.players, arguments.workers, arguments.seed).table())